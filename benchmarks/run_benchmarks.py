@@ -0,0 +1,201 @@
+"""
+핫 패스 벤치마크
+
+합성 볼트를 만들고 주요 함수의 실행 시간을 측정해
+benchmarks/results/ 아래에 JSON으로 저장한다.
+
+    python -m benchmarks.run_benchmarks --notes 10000
+    python -m benchmarks.run_benchmarks --notes 10000 --compare benchmarks/results/<이전 결과>.json
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from benchmarks.synthetic_vault import SyntheticVault, concept_name, RELATION_TYPES
+
+RESULTS_DIR = Path(__file__).parent / 'results'
+
+def measure(func, repeat=5, number=1):
+    """func를 number번 호출하는 측정을 repeat번 반복해 호출당 시간 목록 반환"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return timings
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=Path(__file__).parent, check=True
+        ).stdout.strip()
+    except Exception:
+        return 'unknown'
+
+def synthetic_ontology(size, seed=0):
+    """generate_mermaid용 온톨로지 (size개 관계)"""
+    import random
+
+    rng = random.Random(seed)
+    names = [concept_name(i) for i in range(max(2, size // 2))]
+    relationships = [
+        {'source': rng.choice(names), 'target': rng.choice(names), 'type': rng.choice(RELATION_TYPES)}
+        for _ in range(size)
+    ]
+    return {'concepts': names, 'relationships': relationships}
+
+def build_benchmarks(vault_path, vault, args):
+    """(이름, 호출 가능 객체, 반복 횟수, 호출 횟수) 목록
+
+    LLM 클라이언트가 필요 없는 로컬 코드만 측정한다 (google.generativeai 없이 실행 가능).
+    """
+    from src.centrality import Centrality
+    from src.note_index import NoteIndex
+    from src.note_manager import NoteManager
+    from src.obsidian.note import ObsidianNote
+    from src.tagger import AutoTagger
+    from src.template_manager import TemplateManager
+    from src.visualizer import OntologyVisualizer
+
+    obsidian_note = ObsidianNote(vault_path)
+    note_manager = NoteManager(vault_path)
+    tagger = AutoTagger()
+    template_manager = TemplateManager(vault_path)
+    visualizer = OntologyVisualizer()
+    note_index = NoteIndex(vault_path, use_cache=False)
+    note_index.refresh()
+    centrality = Centrality(note_index)
+    centrality.refresh()
+
+    # 중간 빈도의 개념으로 조회 (가장 흔한 개념은 거의 모든 노트에 걸림)
+    query_concepts = {concept_name(i) for i in (5, 50, 500) if i < vault.concepts}
+    sample_bodies = [
+        path.read_text(encoding='utf-8')
+        for path in sorted(Path(vault_path).glob('0000/*.md'))[:100]
+    ]
+    mermaid_ontology = synthetic_ontology(args.relations)
+    template_vars = {
+        'title': 'benchmark', 'created': '2024-01-01 00:00:00', 'modified': '2024-01-01 00:00:00',
+        'tags': ['a', 'b', 'c'], 'concepts': sorted(query_concepts),
+        'content': sample_bodies[0] if sample_bodies else '',
+        'relationships': mermaid_ontology['relationships'][:10],
+        'mermaid_diagram': visualizer.generate_mermaid(mermaid_ontology),
+        'related_notes': [vault.note_title(i) for i in range(20)],
+    }
+
+    # add_links는 파일을 수정하므로 측정 전용 노트를 새로 만들어 사용
+    link_targets = [vault.note_title(i) for i in range(args.links)]
+    link_source = note_manager.create_note('bench-link-source', '# bench\n')
+
+    def tag_sample():
+        for body in sample_bodies:
+            tagger.combine_tags(tagger.extract_tags(body), [], tagger.extract_keywords(body))
+
+    scan_repeat = args.scan_repeat
+    return [
+        ('Centrality.rank_by_concepts', lambda: centrality.rank_by_concepts(query_concepts, limit=20), args.repeat, 10),
+        ('NoteIndex.refresh[unchanged]', note_index.refresh, scan_repeat, 1),
+        ('NoteIndex.find_by_concepts', lambda: note_index.find_by_concepts(query_concepts), args.repeat, 100),
+        ('ObsidianNote.find_related_notes', lambda: obsidian_note.find_related_notes(sorted(query_concepts)), scan_repeat, 1),
+        ('NoteManager.add_links', lambda: note_manager.add_links(link_source, link_targets), args.repeat, 1),
+        ('OntologyVisualizer.generate_mermaid', lambda: visualizer.generate_mermaid(mermaid_ontology), args.repeat, 20),
+        ('AutoTagger.combine_tags[100 notes]', tag_sample, args.repeat, 1),
+        ('TemplateManager.render_template', lambda: template_manager.render_template('concept.md', template_vars), args.repeat, 100),
+    ]
+
+def compare(results, baseline_path):
+    """이전 결과 대비 중앙값 변화 출력"""
+    baseline = json.loads(Path(baseline_path).read_text(encoding='utf-8'))
+    previous = {item['name']: item for item in baseline['benchmarks']}
+    print(f"\n비교 기준: {baseline_path} ({baseline['revision']})")
+    for item in results['benchmarks']:
+        before = previous.get(item['name'])
+        if before is None:
+            continue
+        ratio = item['median'] / before['median'] if before['median'] else float('inf')
+        marker = '  (느려짐)' if ratio > 1.1 else '  (빨라짐)' if ratio < 0.9 else ''
+        print(f"{item['name']:<45} {before['median'] * 1000:10.3f}ms -> {item['median'] * 1000:10.3f}ms  x{ratio:.2f}{marker}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="핫 패스 벤치마크")
+    parser.add_argument('--notes', type=int, default=1000, help="합성 볼트 노트 수 (1k ~ 1M)")
+    parser.add_argument('--concepts', type=int, default=None, help="개념 어휘 수")
+    parser.add_argument('--concepts-per-note', type=int, default=5)
+    parser.add_argument('--links-per-note', type=int, default=3)
+    parser.add_argument('--extra-fields', type=int, default=5, help="frontmatter 추가 필드 수")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--vault-dir', default=None,
+                        help="합성 볼트를 만들 빈 디렉토리 (기본: 임시 디렉토리, 지정하면 실행 후에도 남김)")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--scan-repeat', type=int, default=3, help="볼트 전체 스캔 벤치마크 반복 횟수")
+    parser.add_argument('--relations', type=int, default=200, help="Mermaid 벤치마크 관계 수")
+    parser.add_argument('--links', type=int, default=20, help="add_links 벤치마크 링크 수")
+    parser.add_argument('--only', default=None, help="이름에 이 문자열이 포함된 벤치마크만 실행")
+    parser.add_argument('--output', default=None, help="결과 JSON 경로 (기본: benchmarks/results/)")
+    parser.add_argument('--compare', default=None, help="비교할 이전 결과 JSON")
+    args = parser.parse_args(argv)
+
+    vault = SyntheticVault(
+        notes=args.notes, concepts=args.concepts, concepts_per_note=args.concepts_per_note,
+        links_per_note=args.links_per_note, extra_fields=args.extra_fields, seed=args.seed
+    )
+    temp_dir = None
+    if args.vault_dir:
+        vault_path = Path(args.vault_dir)
+        # 벤치마크가 노트(bench-link-source)와 .ontology/, .templates/를 만들므로 기존 볼트에는 실행하지 않음
+        if vault_path.exists() and any(vault_path.iterdir()):
+            print(f"--vault-dir는 비어 있는 디렉토리여야 합니다: {vault_path}")
+            return 1
+    else:
+        temp_dir = tempfile.TemporaryDirectory(prefix='bench-vault-')
+        vault_path = Path(temp_dir.name)
+
+    start = time.perf_counter()
+    vault.generate(vault_path)
+    print(f"합성 볼트 준비: {args.notes}개 노트 ({time.perf_counter() - start:.1f}s)")
+
+    results = {
+        'revision': git_revision(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'vault': vault.params(),
+        'benchmarks': [],
+    }
+    for name, func, repeat, number in build_benchmarks(vault_path, vault, args):
+        if args.only and args.only not in name:
+            continue
+        timings = measure(func, repeat=repeat, number=number)
+        item = {
+            'name': name,
+            'repeat': repeat,
+            'number': number,
+            'min': min(timings),
+            'median': statistics.median(timings),
+            'max': max(timings),
+        }
+        results['benchmarks'].append(item)
+        print(f"{name:<45} median {item['median'] * 1000:10.3f}ms  min {item['min'] * 1000:10.3f}ms")
+
+    output = Path(args.output) if args.output else (
+        RESULTS_DIR / f"{results['revision']}-{args.notes}-{datetime.now():%Y%m%d%H%M%S}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f"\n결과 저장: {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+    if temp_dir is not None:
+        temp_dir.cleanup()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+벤치마크용 합성 옵시디언 볼트 생성기
+
+같은 인자와 seed로 실행하면 항상 같은 볼트가 생성된다.
+
+    python -m benchmarks.synthetic_vault /tmp/bench-vault --notes 10000
+"""
+import argparse
+import json
+import random
+from pathlib import Path
+
+RELATION_TYPES = ('is_a', 'part_of', 'used_for', 'related_to')
+
+SYLLABLES = ['데이터', '모델', '학습', '신경', '구조', '분석', '처리', '시스템', '지식', '그래프',
+             '추론', '검색', '인덱스', '스트림', '분산', '캐시', '언어', '벡터', '규칙', '개념']
+
+def concept_name(index):
+    """인덱스로부터 결정적인 개념 이름 생성"""
+    first = SYLLABLES[index % len(SYLLABLES)]
+    second = SYLLABLES[(index // len(SYLLABLES)) % len(SYLLABLES)]
+    return f"{first}{second}-{index}"
+
+class SyntheticVault:
+    def __init__(self, notes=1000, concepts=None, concepts_per_note=5, links_per_note=3,
+                 extra_fields=5, body_paragraphs=4, zipf=1.1, seed=42):
+        self.notes = notes
+        self.concepts = concepts or max(50, notes // 10)
+        self.concepts_per_note = concepts_per_note
+        self.links_per_note = links_per_note
+        self.extra_fields = extra_fields
+        self.body_paragraphs = body_paragraphs
+        self.zipf = zipf
+        self.seed = seed
+
+    def params(self):
+        return dict(vars(self))
+
+    def _concept_weights(self):
+        # 소수의 개념이 많은 노트에 등장하는 Zipf 분포
+        return [1.0 / (rank + 1) ** self.zipf for rank in range(self.concepts)]
+
+    def note_title(self, index):
+        return f"note-{index:07d}"
+
+    def generate(self, vault_path):
+        """볼트를 생성하고 생성된 노트 수 반환 (manifest가 같으면 재사용)"""
+        vault_path = Path(vault_path)
+        manifest_path = vault_path / '.obsidian' / 'synthetic.json'
+        if manifest_path.exists() and json.loads(manifest_path.read_text()) == self.params():
+            return self.notes
+
+        (vault_path / '.obsidian').mkdir(parents=True, exist_ok=True)
+        rng = random.Random(self.seed)
+        weights = self._concept_weights()
+        names = [concept_name(i) for i in range(self.concepts)]
+
+        for index in range(self.notes):
+            # 1000개 단위 하위 폴더로 분산
+            folder = vault_path / f"{index // 1000:04d}"
+            if index % 1000 == 0:
+                folder.mkdir(exist_ok=True)
+            concepts = list(dict.fromkeys(rng.choices(names, weights, k=self.concepts_per_note)))
+            (folder / f"{self.note_title(index)}.md").write_text(
+                self._render_note(rng, index, concepts), encoding='utf-8'
+            )
+
+        manifest_path.write_text(json.dumps(self.params()))
+        return self.notes
+
+    def _render_note(self, rng, index, concepts):
+        relationships = [
+            {'source': source, 'target': target, 'type': rng.choice(RELATION_TYPES)}
+            for source, target in zip(concepts, concepts[1:])
+        ]
+        links = [self.note_title(rng.randrange(self.notes)) for _ in range(self.links_per_note)]
+
+        # JSON은 YAML의 부분집합이므로 frontmatter 값으로 그대로 사용
+        lines = ['---', f'title: {self.note_title(index)}', 'type: concept',
+                 f'concepts: {json.dumps(concepts, ensure_ascii=False)}',
+                 f'tags: {json.dumps(concepts[:3], ensure_ascii=False)}',
+                 f'relationships: {json.dumps(relationships, ensure_ascii=False)}']
+        for field in range(self.extra_fields):
+            lines.append(f'field_{field}: {rng.randrange(10 ** 6)}')
+        lines += ['---', '', f'# {self.note_title(index)}', '', '## 정의']
+
+        for _ in range(self.body_paragraphs):
+            words = rng.choices(concepts + SYLLABLES, k=40)
+            lines += [' '.join(words), '']
+        lines.append('## 관계')
+        for rel in relationships:
+            lines.append(f"- {rel['source']} {rel['type']} {rel['target']}")
+        lines += ['', '## 관련 노트']
+        lines += [f'- [[{link}]]' for link in links]
+        return '\n'.join(lines) + '\n'
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="합성 옵시디언 볼트 생성")
+    parser.add_argument('vault_path')
+    parser.add_argument('--notes', type=int, default=1000)
+    parser.add_argument('--concepts', type=int, default=None, help="개념 어휘 수 (기본: 노트 수 / 10)")
+    parser.add_argument('--concepts-per-note', type=int, default=5)
+    parser.add_argument('--links-per-note', type=int, default=3)
+    parser.add_argument('--extra-fields', type=int, default=5, help="frontmatter 추가 필드 수")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    vault = SyntheticVault(
+        notes=args.notes, concepts=args.concepts, concepts_per_note=args.concepts_per_note,
+        links_per_note=args.links_per_note, extra_fields=args.extra_fields, seed=args.seed
+    )
+    print(f"{vault.generate(args.vault_path)}개 노트 생성: {args.vault_path}")
+
+if __name__ == "__main__":
+    main()
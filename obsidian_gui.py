@@ -3,15 +3,38 @@ from PyQt6.QtWidgets import (
     QLineEdit, QTextEdit, QComboBox, QPushButton,
     QLabel, QFileDialog, QMessageBox
 )
-from PyQt6.QtCore import Qt
-from test_ontology import ObsidianOntology
+from PyQt6.QtCore import Qt, QThreadPool
+from src.workers import Worker
+
+def create_ontology():
+    """ObsidianOntology 생성 (무거운 임포트 포함, 백그라운드 스레드에서 호출)"""
+    from test_ontology import ObsidianOntology
+    return ObsidianOntology()
 
 class ObsidianGUI(QMainWindow):
     def __init__(self):
         super().__init__()
-        self.ontology = ObsidianOntology()
+        self.ontology = None
+        self.thread_pool = QThreadPool()
         self.init_ui()
 
+        # 창을 먼저 띄우고 온톨로지는 백그라운드에서 초기화
+        self.statusBar().showMessage('초기화 중...')
+        worker = Worker(create_ontology)
+        worker.signals.finished.connect(self.on_ontology_ready)
+        worker.signals.error.connect(self.on_ontology_error)
+        self.thread_pool.start(worker)
+
+    def on_ontology_ready(self, ontology):
+        self.ontology = ontology
+        self.create_btn.setEnabled(True)
+        self.statusBar().showMessage('준비')
+        self.thread_pool.start(Worker(self.ontology.warm_up))
+
+    def on_ontology_error(self, message):
+        self.statusBar().showMessage(f'초기화 실패: {message}')
+        QMessageBox.critical(self, '오류', f'초기화 중 오류가 발생했습니다: {message}')
+
     def init_ui(self):
         self.setWindowTitle('Obsidian Note Automation')
         self.setGeometry(100, 100, 800, 600)
@@ -53,9 +76,10 @@ class ObsidianGUI(QMainWindow):
         button_layout.addWidget(upload_btn)
         
         # 노트 생성 버튼
-        create_btn = QPushButton('노트 생성')
-        create_btn.clicked.connect(self.create_note)
-        button_layout.addWidget(create_btn)
+        self.create_btn = QPushButton('노트 생성')
+        self.create_btn.clicked.connect(self.create_note)
+        self.create_btn.setEnabled(False)
+        button_layout.addWidget(self.create_btn)
         
         layout.addLayout(button_layout)
 
@@ -83,14 +107,35 @@ class ObsidianGUI(QMainWindow):
             QMessageBox.warning(self, '경고', '내용을 입력해주세요.')
             return
 
-        try:
-            self.ontology.process_new_note(
-                title=title,
-                content=content,
-                template_name=template
-            )
-            QMessageBox.information(self, '성공', '노트가 생성되었습니다.')
-            self.title_input.clear()
-            self.content_input.clear()
-        except Exception as e:
-            QMessageBox.critical(self, '오류', f'노트 생성 중 오류가 발생했습니다: {str(e)}')
+        # 노트 생성은 백그라운드 스레드에서 실행
+        worker = Worker(
+            self.ontology.process_new_note,
+            title=title,
+            content=content,
+            template_name=template
+        )
+        worker.signals.finished.connect(self.on_note_created)
+        worker.signals.error.connect(self.on_note_error)
+        self.thread_pool.start(worker)
+        self.title_input.clear()
+        self.content_input.clear()
+        self.statusBar().showMessage(f"'{title}' 노트 생성 중...")
+
+    def on_note_created(self, note_path):
+        # process_new_note는 오류를 출력하고 None을 반환함
+        if note_path is None:
+            self.on_note_error('노트를 저장하지 못했습니다. 자세한 내용은 콘솔 출력을 확인하세요.')
+            return
+        self.statusBar().showMessage(f'노트가 생성되었습니다: {note_path}')
+        QMessageBox.information(self, '성공', '노트가 생성되었습니다.')
+
+    def on_note_error(self, message):
+        self.statusBar().clearMessage()
+        QMessageBox.critical(self, '오류', f'노트 생성 중 오류가 발생했습니다: {message}')
+
+    def closeEvent(self, event):
+        # 진행 중인 노트 생성이 끝날 때까지 대기
+        self.thread_pool.waitForDone()
+        if self.ontology is not None:
+            self.ontology.close()
+        super().closeEvent(event)
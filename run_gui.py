@@ -1,39 +1,113 @@
 #!/usr/bin/env python3
 import sys
-from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QTextEdit, QPushButton
-from src.ontology import ObsidianOntology
+from PyQt6.QtCore import QThreadPool
+from PyQt6.QtWidgets import (
+    QApplication, QMainWindow, QWidget, QVBoxLayout, QTextEdit, QPushButton,
+    QListWidget, QListWidgetItem, QMessageBox
+)
+from src.workers import Worker
+
+# 동시에 실행할 노트 생성 작업 수
+MAX_CONCURRENT_JOBS = 3
+
+def create_ontology():
+    """ObsidianOntology 생성 (볼트 탐색, API 설정 포함)
+
+    google.generativeai 임포트 자체가 느리므로 창이 뜬 뒤
+    백그라운드 스레드에서 임포트한다.
+    """
+    from src.ontology import ObsidianOntology
+    return ObsidianOntology()
 
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("노트 생성기")
         self.setGeometry(100, 100, 600, 400)
-        
+
         # 중앙 위젯 설정
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
         layout = QVBoxLayout(central_widget)
-        
+
         # 내용 입력 필드
         self.content_edit = QTextEdit()
         self.content_edit.setPlaceholderText("내용을 입력하세요...")
         layout.addWidget(self.content_edit)
-        
+
         # 생성 버튼
         self.generate_button = QPushButton("노트 생성")
         self.generate_button.clicked.connect(self.generate_note)
+        self.generate_button.setEnabled(False)
         layout.addWidget(self.generate_button)
-        
-        # Obsidian Ontology 초기화
-        self.ontology = ObsidianOntology()
-    
+
+        # 작업 목록 (대기 / 진행 단계 / 완료 / 오류)
+        self.job_list = QListWidget()
+        layout.addWidget(self.job_list)
+
+        # 백그라운드 작업 풀 (초과 요청은 풀 내부 대기열에 쌓임)
+        self.thread_pool = QThreadPool()
+        self.thread_pool.setMaxThreadCount(MAX_CONCURRENT_JOBS)
+
+        # Obsidian Ontology는 창이 표시된 뒤 백그라운드에서 초기화
+        self.ontology = None
+        self.statusBar().showMessage("초기화 중...")
+        worker = Worker(create_ontology)
+        worker.signals.finished.connect(self._on_ontology_ready)
+        worker.signals.error.connect(self._on_ontology_error)
+        self.thread_pool.start(worker)
+
+    def _on_ontology_ready(self, ontology):
+        self.ontology = ontology
+        self.generate_button.setEnabled(True)
+        self.statusBar().showMessage("준비")
+
+        # 템플릿 컴파일, 볼트 인덱스 로드는 계속 백그라운드에서 진행
+        # (노트 생성 작업 슬롯을 차지하지 않도록 전역 스레드 풀에서 실행)
+        QThreadPool.globalInstance().start(Worker(self.ontology.warm_up))
+
+    def _on_ontology_error(self, message):
+        self.statusBar().showMessage(f"초기화 실패: {message}")
+        QMessageBox.critical(self, "초기화 오류", message)
+
     def generate_note(self):
         content = self.content_edit.toPlainText().strip()
         if not content:
             return
-        self.ontology.process_new_note(content=content)
         self.content_edit.clear()
 
+        label = content.splitlines()[0][:40]
+        item = QListWidgetItem(f"[대기] {label}")
+        self.job_list.addItem(item)
+
+        worker = Worker(self.ontology.process_new_note, content=content, with_progress=True)
+        worker.signals.started.connect(lambda: self._set_job_status(item, label, "시작"))
+        worker.signals.progress.connect(lambda stage: self._set_job_status(item, label, stage))
+        worker.signals.finished.connect(lambda path: self._on_job_finished(item, label, path))
+        worker.signals.error.connect(lambda message: self._set_job_status(item, label, f"오류: {message}"))
+        self.thread_pool.start(worker)
+        self._update_status()
+
+    def _set_job_status(self, item, label, status):
+        item.setText(f"[{status}] {label}")
+        self._update_status()
+
+    def _on_job_finished(self, item, label, note_path):
+        if note_path is None:
+            self._set_job_status(item, label, "실패")
+        else:
+            self._set_job_status(item, label, f"완료: {note_path}")
+
+    def _update_status(self):
+        self.statusBar().showMessage(f"실행 중인 작업: {self.thread_pool.activeThreadCount()}")
+
+    def closeEvent(self, event):
+        # 진행 중인 노트 생성이 끝날 때까지 대기
+        self.thread_pool.waitForDone()
+        if self.ontology is not None:
+            self.ontology.close()
+        super().closeEvent(event)
+
 def main():
     app = QApplication(sys.argv)
     window = MainWindow()
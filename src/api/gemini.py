@@ -4,6 +4,8 @@ Gemini API wrapper for text processing
 import os
 import google.generativeai as genai
 from dotenv import load_dotenv
+from .llm_client import LLMClient
+from .scheduler import INTERACTIVE
 
 class GeminiAPI:
     def __init__(self):
@@ -14,13 +16,17 @@ class GeminiAPI:
         
         genai.configure(api_key=api_key)
         self.model = genai.GenerativeModel('gemini-pro')
+        # GUI 요청이므로 배치 작업보다 먼저 실행
+        self.llm = LLMClient(self.model, 'gemini-pro', priority=INTERACTIVE, model_factory=genai.GenerativeModel)
 
-    async def generate_text(self, prompt: str) -> str:
+    async def generate_text(self, prompt: str, caller: str = 'generate') -> str:
         """
         Generate text using Gemini API
+
+        caller labels the call in usage statistics (summarize, keywords, ...)
         """
         try:
-            response = await self.model.generate_content_async(prompt)
+            response = await self.llm.generate_async(prompt, caller=caller)
             return response.text
         except Exception as e:
             print(f"Error generating text: {e}")
@@ -33,7 +39,7 @@ class GeminiAPI:
         prompt = f"""다음 텍스트를 요약해주세요. 핵심 내용만 간단히 정리해주세요:
 
 {text}"""
-        return await self.generate_text(prompt)
+        return await self.generate_text(prompt, caller='summarize')
 
     async def explain_concept(self, concept: str) -> str:
         """
@@ -42,7 +48,7 @@ class GeminiAPI:
         prompt = f"""다음 개념에 대해 자세히 설명해주세요:
 
 {concept}"""
-        return await self.generate_text(prompt)
+        return await self.generate_text(prompt, caller='explain')
 
     async def generate_questions(self, text: str) -> str:
         """
@@ -51,7 +57,7 @@ class GeminiAPI:
         prompt = f"""다음 텍스트를 바탕으로 학습 내용을 점검할 수 있는 질문들을 생성해주세요:
 
 {text}"""
-        return await self.generate_text(prompt)
+        return await self.generate_text(prompt, caller='questions')
 
     async def extract_keywords(self, text: str) -> str:
         """
@@ -60,7 +66,7 @@ class GeminiAPI:
         prompt = f"""다음 텍스트에서 중요한 키워드들을 추출해주세요:
 
 {text}"""
-        return await self.generate_text(prompt)
+        return await self.generate_text(prompt, caller='keywords')
 
     async def expand_idea(self, idea: str) -> str:
         """
@@ -69,4 +75,4 @@ class GeminiAPI:
         prompt = f"""다음 아이디어나 주제에 대해 연관된 내용을 확장해서 설명해주세요:
 
 {idea}"""
-        return await self.generate_text(prompt)
+        return await self.generate_text(prompt, caller='expand')
@@ -0,0 +1,99 @@
+"""
+Gemini 모델 호출 래퍼
+
+모든 호출의 토큰 수, 지연 시간, 모델, 호출 종류(title / content / ontology /
+summarize 등), 캐시 여부를 usage_tracker에 기록한다.
+호출은 llm_scheduler의 슬롯을 받은 뒤 실행되며, 우선순위는 priority() 컨텍스트가
+있으면 그 값을, 없으면 클라이언트 기본값을 사용한다.
+호출 종류별 모델과 generation_config는 Router(routing.py)가 정한다.
+"""
+import threading
+import time
+from .usage import usage_tracker
+from .scheduler import llm_scheduler, current_priority, INTERACTIVE, PRIORITY_NAMES
+from .routing import Router
+
+def usage_from_response(response):
+    """응답의 usage_metadata에서 토큰 수와 캐시 여부 추출"""
+    usage = getattr(response, 'usage_metadata', None)
+    prompt_tokens = getattr(usage, 'prompt_token_count', 0) or 0
+    output_tokens = getattr(usage, 'candidates_token_count', 0) or 0
+    cached_tokens = getattr(usage, 'cached_content_token_count', 0) or 0
+    return {
+        'prompt_tokens': prompt_tokens,
+        'output_tokens': output_tokens,
+        'cached_tokens': cached_tokens,
+        'cache': 'hit' if cached_tokens else 'miss',
+    }
+
+class LLMClient:
+    def __init__(self, model, model_name, tracker=None, scheduler=None, priority=INTERACTIVE,
+                 router=None, model_factory=None):
+        """model_factory(모델 이름)가 있으면 라우트가 지정한 모델을 만들어 사용하고,
+        없으면 모든 호출에 model을 쓰되 라우트의 generation_config만 적용한다."""
+        self.model = model
+        self.model_name = model_name
+        self.tracker = tracker or usage_tracker
+        self.scheduler = scheduler or llm_scheduler
+        # 배치 작업은 BULK로 바꿔서 사용 (GUI 요청이 밀리지 않도록)
+        self.priority = priority
+        self.router = router or Router()
+        self.model_factory = model_factory
+        self._models = {model_name: model}
+        self._models_lock = threading.Lock()
+
+    def model_name_for(self, caller):
+        """caller 호출에 사용할 모델 이름"""
+        route = self.router.route(caller)
+        if route.model and self.model_factory is not None:
+            return route.model
+        return self.model_name
+
+    def _resolve(self, caller, kwargs):
+        """(라우트, 모델 이름, 모델, 호출 인자) - 호출자가 준 generation_config 값이 라우트 설정보다 우선"""
+        route = self.router.route(caller)
+        name = self.model_name_for(caller)
+        with self._models_lock:
+            model = self._models.get(name)
+            if model is None:
+                model = self._models[name] = self.model_factory(name)
+        config = kwargs.get('generation_config')
+        if route.generation_config and (config is None or isinstance(config, dict)):
+            kwargs = {**kwargs, 'generation_config': {**route.generation_config, **(config or {})}}
+        return route, name, model, kwargs
+
+    def _priority(self):
+        level = current_priority()
+        return self.priority if level is None else level
+
+    def generate(self, prompt, caller, **kwargs):
+        """스케줄러 슬롯을 받아 generate_content 호출 후 사용량 기록 (예외는 기록 후 다시 발생)"""
+        level = self._priority()
+        route, name, model, kwargs = self._resolve(caller, kwargs)
+        with self.scheduler.slot(level) as waited:
+            start = time.perf_counter()
+            try:
+                response = model.generate_content(prompt, **kwargs)
+            except Exception:
+                self._record(caller, route, name, start, level, waited, ok=False)
+                raise
+        self._record(caller, route, name, start, level, waited, **usage_from_response(response))
+        return response
+
+    async def generate_async(self, prompt, caller, **kwargs):
+        """generate_content_async 호출 후 사용량 기록 (슬롯 대기 중에도 이벤트 루프를 막지 않음)"""
+        level = self._priority()
+        route, name, model, kwargs = self._resolve(caller, kwargs)
+        async with self.scheduler.slot_async(level) as waited:
+            start = time.perf_counter()
+            try:
+                response = await model.generate_content_async(prompt, **kwargs)
+            except Exception:
+                self._record(caller, route, name, start, level, waited, ok=False)
+                raise
+        self._record(caller, route, name, start, level, waited, **usage_from_response(response))
+        return response
+
+    def _record(self, caller, route, model_name, start, level, waited, **usage):
+        self.tracker.record(caller, model_name, time.perf_counter() - start, route=route.name,
+                            priority=PRIORITY_NAMES[level], queue_wait=waited, **usage)
@@ -0,0 +1,85 @@
+"""
+호출 종류별 모델 라우팅
+
+제목 추출, 온톨로지 추출처럼 출력이 짧은 호출은 작고 빠른 모델로, 본문 생성은 기본 모델로 보낸다.
+라우트마다 모델과 generation_config(max_output_tokens, temperature 등)를 지정한다.
+
+호출 종류(caller)가 라우트 이름과 같거나 '라우트_'로 시작하면(ontology_repair -> ontology)
+그 라우트를 쓰고, 없으면 클라이언트 기본 모델을 설정 없이 사용한다.
+
+ONTOLOGY_LLM_ROUTES 환경 변수로 라우트를 바꿀 수 있다 (JSON/YAML 문자열 또는 파일 경로):
+
+    ONTOLOGY_LLM_ROUTES='{"content": {"model": "gemini-1.5-pro", "max_output_tokens": 8192}}'
+    ONTOLOGY_LLM_ROUTES=~/llm_routes.yaml
+
+지정한 라우트의 키만 기본값을 덮어쓰며, model을 null로 주면 기본 모델을 사용한다.
+"""
+import os
+from pathlib import Path
+import yaml
+
+FAST_MODEL = 'gemini-1.5-flash'
+
+DEFAULT_ROUTES = {
+    'title': {'model': FAST_MODEL, 'max_output_tokens': 64, 'temperature': 0.2},
+    'ontology': {'model': FAST_MODEL, 'max_output_tokens': 2048, 'temperature': 0.1},
+    'keywords': {'model': FAST_MODEL, 'max_output_tokens': 256, 'temperature': 0.2},
+    'summarize': {'model': FAST_MODEL, 'max_output_tokens': 1024, 'temperature': 0.3},
+    'questions': {'model': FAST_MODEL, 'max_output_tokens': 1024, 'temperature': 0.7},
+    'content': {'model': None, 'max_output_tokens': 4096, 'temperature': 0.7},
+}
+
+# 같은 라우트를 쓰는 호출 종류
+ROUTE_ALIASES = {
+    'explain': 'content',
+    'expand': 'content',
+}
+
+class Route:
+    __slots__ = ('name', 'model', 'generation_config')
+
+    def __init__(self, name, model=None, **generation_config):
+        self.name = name
+        self.model = model
+        self.generation_config = generation_config
+
+    def __repr__(self):
+        return f"Route({self.name!r}, model={self.model!r}, {self.generation_config!r})"
+
+DEFAULT_ROUTE = Route('default')
+
+def _load_overrides(value):
+    path = Path(os.path.expanduser(value))
+    if path.is_file():
+        value = path.read_text(encoding='utf-8')
+    overrides = yaml.safe_load(value) or {}
+    if not isinstance(overrides, dict):
+        raise ValueError("ONTOLOGY_LLM_ROUTES는 {라우트: 설정} 형식이어야 합니다")
+    return overrides
+
+def load_routes(overrides=None):
+    """기본 라우트에 overrides(없으면 ONTOLOGY_LLM_ROUTES)를 합친 {이름: Route}"""
+    if overrides is None:
+        value = os.getenv('ONTOLOGY_LLM_ROUTES')
+        try:
+            overrides = _load_overrides(value) if value else {}
+        except (OSError, ValueError, yaml.YAMLError) as e:
+            print(f"ONTOLOGY_LLM_ROUTES를 읽을 수 없어 기본 라우트를 사용합니다: {e}")
+            overrides = {}
+    config = {name: dict(settings) for name, settings in DEFAULT_ROUTES.items()}
+    for name, settings in overrides.items():
+        config.setdefault(name, {}).update(settings or {})
+    return {name: Route(name, **settings) for name, settings in config.items()}
+
+class Router:
+    def __init__(self, routes=None):
+        self.routes = routes if routes is not None else load_routes()
+
+    def route(self, caller):
+        """호출 종류에 맞는 Route (없으면 기본 모델, 설정 없음)"""
+        name = ROUTE_ALIASES.get(caller, caller)
+        route = self.routes.get(name)
+        if route is None and '_' in name:
+            base = name.rsplit('_', 1)[0]
+            route = self.routes.get(ROUTE_ALIASES.get(base, base))
+        return route or DEFAULT_ROUTE
@@ -0,0 +1,408 @@
+"""
+LLM 요청 우선순위 스케줄러
+
+같은 API 할당량을 쓰는 호출을 우선순위 등급으로 나눠 순서를 정한다.
+
+- INTERACTIVE: GUI에서 사용자가 기다리는 요청
+- INCREMENTAL: 기존 노트 한두 개를 갱신하는 요청 (upsert의 병합, 재생성)
+- BULK: 대량 가져오기, 크롤링 같은 백필 작업
+
+동시 실행 슬롯과 분당 요청 수 중 일부는 INTERACTIVE 전용으로 남겨 두어
+배치 작업이 할당량을 모두 쓰고 있어도 사용자 요청은 바로 실행된다. 나머지 요청은
+우선순위 순으로 실행하되, 오래 기다린 요청은 우선순위가 올라가(aging) 굶지 않는다.
+
+share(경로)를 호출하면 같은 SQLite 파일(<볼트>/.ontology/llm_scheduler.sqlite)을 쓰는
+모든 프로세스가 슬롯과 호출 수를 함께 나눠 쓴다. GUI와 CLI 배치(ingest, crawl)가 서로
+다른 프로세스여도 GUI 요청이 먼저 실행된다. 대기 중에는 파일을 주기적으로 확인하므로
+share_enabled일 때만(ONTOLOGY_LLM_SHARED=1 또는 CLI --share-llm) 사용하고,
+그 외에는 프로세스 안에서만 스케줄링한다.
+
+- ONTOLOGY_LLM_CONCURRENCY: 동시 호출 수 (기본: 8)
+- ONTOLOGY_LLM_RPM: 분당 최대 호출 수 (기본: 제한 없음)
+- ONTOLOGY_LLM_SHARED: 1이면 같은 볼트를 쓰는 프로세스끼리 슬롯 공유 (기본: 사용 안 함)
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager, asynccontextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+INTERACTIVE = 0
+INCREMENTAL = 1
+# 대기 시간 AGING_SECONDS * 2가 지나야 새 INTERACTIVE 요청과 같은 순위가 됨
+BULK = 2
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', INCREMENTAL: 'incremental', BULK: 'bulk'}
+
+# 이 시간(초)을 기다릴 때마다 우선순위 한 등급만큼 앞당김
+AGING_SECONDS = 30.0
+
+# 공유 스케줄러: 다른 프로세스의 슬롯 확인 간격(기다릴수록 POLL_MAX_SECONDS까지 늘림),
+# 응답 없는 대기 요청/실행 슬롯을 지우는 시간
+POLL_SECONDS = 0.05
+POLL_MAX_SECONDS = 1.0
+WAITER_TIMEOUT = 10.0
+LEASE_SECONDS = 300.0
+
+SHARED_SCHEMA = """
+CREATE TABLE IF NOT EXISTS waiters (
+    id TEXT PRIMARY KEY,
+    priority INTEGER NOT NULL,
+    enqueued REAL NOT NULL,
+    seen REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    id TEXT PRIMARY KEY,
+    priority INTEGER NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS grants (
+    at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS grants_at ON grants (at);
+"""
+
+_priority = ContextVar('llm_priority', default=None)
+
+def current_priority():
+    """현재 컨텍스트에 지정된 우선순위 (없으면 None)"""
+    return _priority.get()
+
+@contextmanager
+def priority(level):
+    """블록 안의 LLM 호출 우선순위 지정 (스레드 풀로 넘길 때는 컨텍스트를 복사해야 함)"""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+class _Waiter:
+    __slots__ = ('priority', 'enqueued', 'granted', 'notify')
+
+    def __init__(self, priority, notify=None):
+        self.priority = priority
+        self.enqueued = time.monotonic()
+        self.granted = False
+        self.notify = notify
+
+class SharedSlots:
+    """여러 프로세스가 함께 쓰는 대기열, 실행 슬롯, 최근 1분 호출 기록 (SQLite)"""
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None,
+                                    timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SHARED_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def enqueue(self, priority):
+        waiter = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self.conn.execute('INSERT INTO waiters (id, priority, enqueued, seen) VALUES (?, ?, ?, ?)',
+                              (waiter, priority, now, now))
+        return waiter
+
+    def cancel(self, waiter):
+        with self._lock:
+            self.conn.execute('DELETE FROM waiters WHERE id = ?', (waiter,))
+
+    def try_grant(self, waiter, allowed, aging):
+        """모든 프로세스의 대기 요청을 우선순위 순으로 배정해 보고 waiter 차례면 슬롯을 잡고 True
+
+        allowed(priority, active, used)는 LLMScheduler의 한도 검사.
+        """
+        now = time.time()
+        with self._lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                # 비정상 종료한 프로세스의 대기 요청과 슬롯 정리
+                self.conn.execute('DELETE FROM waiters WHERE seen < ?', (now - WAITER_TIMEOUT,))
+                self.conn.execute('DELETE FROM leases WHERE expires < ?', (now,))
+                self.conn.execute('DELETE FROM grants WHERE at < ?', (now - 60.0,))
+                self.conn.execute('UPDATE waiters SET seen = ? WHERE id = ?', (now, waiter))
+                active = self.conn.execute('SELECT COUNT(*) FROM leases').fetchone()[0]
+                used = self.conn.execute('SELECT COUNT(*) FROM grants').fetchone()[0]
+                rows = self.conn.execute('SELECT id, priority, enqueued FROM waiters').fetchall()
+                order = sorted(rows, key=lambda row: (row[1] - (now - row[2]) / aging, row[2]))
+                granted = False
+                for waiter_id, level, _ in order:
+                    if not allowed(level, active, used):
+                        continue
+                    if waiter_id == waiter:
+                        self.conn.execute('DELETE FROM waiters WHERE id = ?', (waiter,))
+                        self.conn.execute('INSERT INTO leases (id, priority, expires) VALUES (?, ?, ?)',
+                                          (waiter, level, now + LEASE_SECONDS))
+                        self.conn.execute('INSERT INTO grants (at) VALUES (?)', (now,))
+                        granted = True
+                        break
+                    # 앞선 요청은 그 프로세스가 다음 확인 때 가져가므로 몫을 빼 둠
+                    active += 1
+                    used += 1
+                self.conn.execute('COMMIT')
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                raise
+        return granted
+
+    def release(self, lease):
+        with self._lock:
+            self.conn.execute('DELETE FROM leases WHERE id = ?', (lease,))
+
+    def counts(self):
+        """전체 프로세스의 등급별 대기/실행 수"""
+        with self._lock:
+            waiting = self.conn.execute('SELECT priority, COUNT(*) FROM waiters GROUP BY priority').fetchall()
+            active = self.conn.execute('SELECT priority, COUNT(*) FROM leases GROUP BY priority').fetchall()
+        return {
+            'waiting': {PRIORITY_NAMES.get(level, str(level)): n for level, n in waiting},
+            'active': {PRIORITY_NAMES.get(level, str(level)): n for level, n in active},
+        }
+
+class LLMScheduler:
+    def __init__(self, max_concurrent=8, rate_per_minute=0, interactive_slots=2,
+                 interactive_rate_share=0.2, aging=AGING_SECONDS, share_enabled=False):
+        self._cond = threading.Condition()
+        self._waiters = []
+        self.configure(max_concurrent, rate_per_minute, interactive_slots, interactive_rate_share, aging)
+        self.active = 0
+        self.stats = {name: {'granted': 0, 'wait': 0.0} for name in PRIORITY_NAMES.values()}
+        self.shared = None
+        # ObsidianOntology가 볼트의 공유 파일로 share()할지 여부
+        self.share_enabled = share_enabled
+
+    def share(self, db_path):
+        """db_path를 쓰는 다른 프로세스와 슬롯과 호출 수를 함께 나눠 씀 (None이면 프로세스 안에서만)"""
+        with self._cond:
+            if self.shared is not None:
+                self.shared.close()
+            self.shared = SharedSlots(db_path) if db_path else None
+
+    def configure(self, max_concurrent=None, rate_per_minute=None, interactive_slots=None,
+                  interactive_rate_share=None, aging=None):
+        """한도 변경 (None인 값은 유지)"""
+        with self._cond:
+            if max_concurrent is not None:
+                self.max_concurrent = max(1, int(max_concurrent))
+            if rate_per_minute is not None:
+                self.rate_per_minute = float(rate_per_minute)
+                self._tokens = self.rate_per_minute
+                self._refilled = time.monotonic()
+            if interactive_slots is not None:
+                self.interactive_slots = int(interactive_slots)
+            if interactive_rate_share is not None:
+                self.interactive_rate_share = float(interactive_rate_share)
+            if aging is not None:
+                self.aging = float(aging)
+            self._grant()
+            self._cond.notify_all()
+
+    def _refill(self, now):
+        if self.rate_per_minute <= 0:
+            return
+        self._tokens = min(self.rate_per_minute,
+                           self._tokens + (now - self._refilled) * self.rate_per_minute / 60.0)
+        self._refilled = now
+
+    def _limits(self, priority):
+        """(동시 슬롯 수, 남겨 둘 호출 수) - 배치 요청은 INTERACTIVE 몫으로 남긴 슬롯과 호출 수를 쓰지 못함"""
+        if priority == INTERACTIVE:
+            return self.max_concurrent, 0.0
+        return max(1, self.max_concurrent - self.interactive_slots), self.rate_per_minute * self.interactive_rate_share
+
+    def _allowed(self, waiter):
+        slots, reserve = self._limits(waiter.priority)
+        if self.active >= slots:
+            return False
+        return self.rate_per_minute <= 0 or self._tokens >= 1 + reserve
+
+    def _shared_allowed(self, priority, active, used):
+        """공유 모드 한도 검사 (호출 수는 최근 1분 동안 배정한 수로 계산)"""
+        slots, reserve = self._limits(priority)
+        if active >= slots:
+            return False
+        return self.rate_per_minute <= 0 or self.rate_per_minute - used >= 1 + reserve
+
+    def _granted(self, level, waited):
+        with self._cond:
+            self.active += 1
+            stats = self.stats[PRIORITY_NAMES[level]]
+            stats['granted'] += 1
+            stats['wait'] += waited
+
+    def _grant(self):
+        """실행 가능한 대기 요청에 슬롯 배정 (락을 잡은 상태에서 호출)"""
+        if not self._waiters:
+            return
+        now = time.monotonic()
+        self._refill(now)
+        order = sorted(self._waiters, key=lambda w: (w.priority - (now - w.enqueued) / self.aging, w.enqueued))
+        for waiter in order:
+            if not self._allowed(waiter):
+                # 배치 요청이 막혀도 뒤의 INTERACTIVE 요청은 남은 몫으로 실행 가능
+                continue
+            self._waiters.remove(waiter)
+            waiter.granted = True
+            self.active += 1
+            if self.rate_per_minute > 0:
+                self._tokens -= 1
+            stats = self.stats[PRIORITY_NAMES[waiter.priority]]
+            stats['granted'] += 1
+            stats['wait'] += now - waiter.enqueued
+            if waiter.notify is not None:
+                waiter.notify()
+
+    def _retry_after(self):
+        """호출 수 제한으로 막혔을 때 다음 토큰까지 남은 시간"""
+        if self.rate_per_minute <= 0:
+            return None
+        return max(0.01, 60.0 / self.rate_per_minute)
+
+    def _acquire_shared(self, shared, level):
+        """공유 슬롯을 받을 때까지 대기하고 (슬롯 id, 대기 시간) 반환"""
+        start = time.monotonic()
+        waiter = shared.enqueue(level)
+        delay = POLL_SECONDS
+        try:
+            while not shared.try_grant(waiter, self._shared_allowed, self.aging):
+                # 같은 프로세스에서 슬롯이 반납되면 바로 다시 확인
+                with self._cond:
+                    self._cond.wait(delay)
+                delay = min(delay * 2, POLL_MAX_SECONDS)
+        except BaseException:
+            shared.cancel(waiter)
+            raise
+        waited = time.monotonic() - start
+        self._granted(level, waited)
+        return waiter, waited
+
+    async def _acquire_shared_async(self, shared, level):
+        start = time.monotonic()
+        waiter = await asyncio.to_thread(shared.enqueue, level)
+        delay = POLL_SECONDS
+        try:
+            while not await asyncio.to_thread(shared.try_grant, waiter, self._shared_allowed, self.aging):
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, POLL_MAX_SECONDS)
+        except BaseException:
+            shared.cancel(waiter)
+            # 취소되기 직전에 슬롯을 받았을 수도 있으므로 돌려줌
+            shared.release(waiter)
+            raise
+        waited = time.monotonic() - start
+        self._granted(level, waited)
+        return waiter, waited
+
+    def _release_shared(self, shared, lease):
+        shared.release(lease)
+        with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    def acquire(self, level=INCREMENTAL):
+        """슬롯을 받을 때까지 대기하고 대기 시간(초) 반환 (프로세스 안에서만 스케줄링)"""
+        start = time.monotonic()
+        waiter = _Waiter(level)
+        with self._cond:
+            self._waiters.append(waiter)
+            self._grant()
+            while not waiter.granted:
+                self._cond.wait(self._retry_after())
+                if not waiter.granted:
+                    self._grant()
+        return time.monotonic() - start
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._grant()
+            self._cond.notify_all()
+
+    async def acquire_async(self, level=INCREMENTAL):
+        """acquire의 비동기 버전 (이벤트 루프를 막지 않음)"""
+        start = time.monotonic()
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def notify():
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+
+        waiter = _Waiter(level, notify)
+        with self._cond:
+            self._waiters.append(waiter)
+            self._grant()
+        try:
+            while not granted.done():
+                try:
+                    await asyncio.wait_for(asyncio.shield(granted), self._retry_after())
+                except asyncio.TimeoutError:
+                    with self._cond:
+                        self._grant()
+        except asyncio.CancelledError:
+            with self._cond:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    raise
+            # 취소되기 직전에 슬롯을 받았으면 돌려줌
+            self.release()
+            raise
+        return time.monotonic() - start
+
+    @contextmanager
+    def slot(self, level=INCREMENTAL):
+        """with 블록 동안 슬롯을 점유. 대기 시간(초)을 반환"""
+        shared = self.shared
+        if shared is not None:
+            lease, waited = self._acquire_shared(shared, level)
+            try:
+                yield waited
+            finally:
+                self._release_shared(shared, lease)
+            return
+        waited = self.acquire(level)
+        try:
+            yield waited
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def slot_async(self, level=INCREMENTAL):
+        shared = self.shared
+        if shared is not None:
+            lease, waited = await self._acquire_shared_async(shared, level)
+            try:
+                yield waited
+            finally:
+                self._release_shared(shared, lease)
+            return
+        waited = await self.acquire_async(level)
+        try:
+            yield waited
+        finally:
+            self.release()
+
+    def snapshot(self):
+        """대기/실행 중인 요청 수와 등급별 누적 대기 시간"""
+        with self._cond:
+            waiting = {name: 0 for name in PRIORITY_NAMES.values()}
+            for waiter in self._waiters:
+                waiting[PRIORITY_NAMES[waiter.priority]] += 1
+            snapshot = {'active': self.active, 'waiting': waiting,
+                        'stats': {name: dict(stats) for name, stats in self.stats.items()}}
+        if self.shared is not None:
+            snapshot['shared'] = self.shared.counts()
+        return snapshot
+
+llm_scheduler = LLMScheduler(
+    max_concurrent=int(os.getenv('ONTOLOGY_LLM_CONCURRENCY', 8)),
+    rate_per_minute=float(os.getenv('ONTOLOGY_LLM_RPM', 0)),
+    share_enabled=os.getenv('ONTOLOGY_LLM_SHARED', '') not in ('', '0'),
+)
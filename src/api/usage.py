@@ -0,0 +1,202 @@
+"""
+LLM 호출별 토큰, 비용, 지연 시간 집계
+
+집계는 (호출 종류, 모델)별로 하며, by='route'로 라우트(routing.py)별 집계도 볼 수 있다.
+"""
+import bisect
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+
+# 지연 시간(초), 토큰 수 히스토그램 구간 상한
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 16, 32, 64)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+# 기본 롤링 윈도우 (초)
+ROLLING_WINDOW = 3600
+
+# 모델별 100만 토큰당 가격 (USD, 입력/출력). 이름이 가장 길게 일치하는 항목을 사용하고,
+# 목록에 없는 모델은 비용 0으로 집계
+MODEL_PRICES = {
+    'gemini-pro': (0.5, 1.5),
+    'gemini-1.0-pro': (0.5, 1.5),
+    'gemini-1.5-flash': (0.075, 0.3),
+    'gemini-1.5-flash-8b': (0.0375, 0.15),
+    'gemini-1.5-pro': (1.25, 5.0),
+    'gemini-2.0-flash': (0.1, 0.4),
+}
+
+def estimate_cost(model, prompt_tokens, output_tokens):
+    """토큰 수로 추정한 호출 비용 (USD)"""
+    name = (model or '').split('/')[-1]
+    matches = [prefix for prefix in MODEL_PRICES if name.startswith(prefix)]
+    if not matches:
+        return 0.0
+    input_price, output_price = MODEL_PRICES[max(matches, key=len)]
+    return (prompt_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+class Histogram:
+    """고정 구간 히스토그램 (마지막 구간은 +Inf)"""
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """구간 상한으로 근사한 분위수"""
+        if self.total == 0:
+            return 0.0
+        target = q * self.total
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return self.bounds[index] if index < len(self.bounds) else float('inf')
+        return float('inf')
+
+    def to_dict(self):
+        return {
+            'buckets': dict(zip([str(b) for b in self.bounds] + ['+Inf'], self.counts)),
+            'count': self.total,
+            'sum': self.sum,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+        }
+
+class _Aggregate:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.cached_tokens = 0
+        self.cost = 0.0
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.tokens = Histogram(TOKEN_BUCKETS)
+
+    def add(self, record):
+        self.calls += 1
+        self.errors += 0 if record['ok'] else 1
+        self.cache_hits += 1 if record['cache'] == 'hit' else 0
+        self.prompt_tokens += record['prompt_tokens']
+        self.output_tokens += record['output_tokens']
+        self.cached_tokens += record['cached_tokens']
+        cost = record.get('cost')
+        if cost is None:
+            cost = estimate_cost(record['model'], record['prompt_tokens'], record['output_tokens'])
+        self.cost += cost
+        self.latency.observe(record['latency'])
+        self.tokens.observe(record['prompt_tokens'] + record['output_tokens'])
+
+    def to_dict(self):
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'cache_hits': self.cache_hits,
+            'prompt_tokens': self.prompt_tokens,
+            'output_tokens': self.output_tokens,
+            'cached_tokens': self.cached_tokens,
+            'cost': round(self.cost, 6),
+            'latency': self.latency.to_dict(),
+            'tokens': self.tokens.to_dict(),
+        }
+
+def _group_key(record, by):
+    # 라우트가 기록되지 않은 예전 로그는 호출 종류로 묶음
+    return f"{record.get(by) or record['caller']}/{record['model']}"
+
+def summarize_records(records, by='caller'):
+    """기록 목록을 (호출 종류 또는 라우트, 모델)별로 집계"""
+    groups = defaultdict(_Aggregate)
+    for record in records:
+        groups[_group_key(record, by)].add(record)
+    return {key: groups[key].to_dict() for key in sorted(groups)}
+
+class UsageTracker:
+    """프로세스 전체의 LLM 호출 기록
+
+    - 실행 단위 집계: 프로세스 시작 이후 모든 호출
+    - 롤링 집계: 최근 window초 동안의 호출
+    - log_path를 지정하면 호출마다 JSON lines로 추가 기록 (실행 간 누적 분석용)
+    """
+    def __init__(self, window=ROLLING_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._run = defaultdict(_Aggregate)
+        self._run_routes = defaultdict(_Aggregate)
+        self._recent = deque()
+        self._log = None
+        self.log_path = None
+
+    def configure(self, log_path=None):
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+            self.log_path = Path(log_path) if log_path else None
+            if self.log_path is not None:
+                self._log = open(self.log_path, 'a', encoding='utf-8', buffering=1)
+
+    def record(self, caller, model, latency, prompt_tokens=0, output_tokens=0, cached_tokens=0,
+               cache='miss', ok=True, **extra):
+        record = {
+            'time': time.time(),
+            'caller': caller,
+            'model': model,
+            'latency': latency,
+            'prompt_tokens': prompt_tokens,
+            'output_tokens': output_tokens,
+            'cached_tokens': cached_tokens,
+            'cache': cache,
+            'ok': ok,
+            'cost': estimate_cost(model, prompt_tokens, output_tokens),
+            **extra,
+        }
+        with self._lock:
+            self._run[f"{caller}/{model}"].add(record)
+            self._run_routes[_group_key(record, 'route')].add(record)
+            self._recent.append(record)
+            self._expire(record['time'])
+            if self._log is not None:
+                self._log.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return record
+
+    def _expire(self, now):
+        while self._recent and self._recent[0]['time'] < now - self.window:
+            self._recent.popleft()
+
+    def run_summary(self, by='caller'):
+        """프로세스 시작 이후 (호출 종류 또는 라우트/모델)별 집계"""
+        groups = self._run_routes if by == 'route' else self._run
+        with self._lock:
+            return {key: groups[key].to_dict() for key in sorted(groups)}
+
+    def rolling_summary(self, by='caller'):
+        """최근 window초 동안의 (호출 종류 또는 라우트/모델)별 집계"""
+        with self._lock:
+            self._expire(time.time())
+            records = list(self._recent)
+        return summarize_records(records, by)
+
+def load_usage_log(log_path, since=None):
+    """JSON lines 로그에서 since(epoch 초) 이후 기록 읽기"""
+    records = []
+    with open(log_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if since is None or record['time'] >= since:
+                records.append(record)
+    return records
+
+usage_tracker = UsageTracker()
@@ -0,0 +1,140 @@
+"""
+볼트 전체 노트 일괄 태깅
+
+    python -m src.cli retag ~/Obsidian/Study --dry-run
+"""
+import sys
+import time
+from multiprocessing import Pool
+from pathlib import Path
+import frontmatter
+from src.tagger import AutoTagger
+from src.note_index import frontmatter_list
+from src.utils.vault_scanner import iter_note_paths, iter_chunks, get_state_dir
+from src.tracing import span
+from src.profiling import profiled, profile_block
+from src.obsidian.safe_write import update_file
+
+# 워커 프로세스별 태거 (initializer에서 생성)
+_tagger = None
+
+def _init_worker():
+    global _tagger
+    _tagger = AutoTagger()
+
+def compute_tags(tagger, post):
+    """노트 본문과 frontmatter 온톨로지로부터 태그 계산"""
+    relationships = [
+        rel for rel in post.metadata.get('relationships') or []
+        if isinstance(rel, dict) and {'source', 'target', 'type'} <= rel.keys()
+    ]
+    ontology = {
+        'concepts': frontmatter_list(post.metadata.get('concepts')),
+        'relationships': relationships,
+    }
+    text_tags = tagger.extract_tags(post.content)
+    ontology_tags = tagger.suggest_tags_from_ontology(ontology)
+    keywords = tagger.extract_keywords(post.content)
+    return tagger.combine_tags(text_tags, ontology_tags, keywords)
+
+def _tag_note(args):
+    """워커: 노트 하나의 태그를 계산하고 변경된 경우에만 저장"""
+    path, dry_run = args
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            post = frontmatter.load(f)
+
+        old_tags = frontmatter_list(post.metadata.get('tags'))
+        new_tags = compute_tags(_tagger, post)
+
+        # 순서는 실행마다 달라질 수 있으므로 집합으로 비교
+        if set(old_tags) == set(new_tags):
+            return path, 'unchanged', None
+
+        if not dry_run:
+            # 계산하는 동안 노트가 바뀌었으면 최신 내용의 태그만 교체
+            def apply(text):
+                latest = frontmatter.loads(text)
+                latest.metadata['tags'] = new_tags
+                return frontmatter.dumps(latest)
+            update_file(path, apply)
+        return path, 'changed', None
+    except Exception as e:
+        return path, 'error', str(e)
+
+def _tag_chunk(args):
+    """워커: 노트 묶음의 태그를 계산 (CPU 프로파일은 실제 계산이 일어나는 워커 프로세스에서 측정)"""
+    paths, dry_run = args
+    with profile_block('retag_chunk'):
+        return [_tag_note((path, dry_run)) for path in paths]
+
+class BatchTagger:
+    def __init__(self, vault_path, workers=None, chunksize=64):
+        self.vault_path = Path(vault_path)
+        self.workers = workers
+        self.chunksize = chunksize
+        self.checkpoint_path = get_state_dir(self.vault_path) / 'retag.checkpoint'
+
+    def _load_checkpoint(self):
+        """이전 실행에서 처리 완료한 노트 목록"""
+        if not self.checkpoint_path.exists():
+            return set()
+        with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+            return {line.rstrip('\n') for line in f if line.strip()}
+
+    @profiled('retag', cpu=False)
+    def run(self, dry_run=False, resume=False, report_every=1000):
+        """볼트 전체 태그 재계산 후 결과 통계 반환"""
+        done = self._load_checkpoint() if resume else set()
+        paths = (
+            str(path) for path in iter_note_paths(self.vault_path)
+            if str(path.relative_to(self.vault_path)) not in done
+        )
+
+        stats = {'processed': 0, 'changed': 0, 'unchanged': 0, 'error': 0, 'skipped': len(done)}
+        start = time.perf_counter()
+
+        # 드라이런은 체크포인트를 남기지 않음
+        mode = 'a' if resume else 'w'
+        checkpoint = None if dry_run else open(self.checkpoint_path, mode, encoding='utf-8')
+        try:
+            with span('vault_retag', dry_run=dry_run) as sp, Pool(self.workers, initializer=_init_worker) as pool:
+                jobs = ((chunk, dry_run) for chunk in iter_chunks(paths, self.chunksize))
+                results = (result for chunk in pool.imap_unordered(_tag_chunk, jobs) for result in chunk)
+                for path, status, error in results:
+                    stats['processed'] += 1
+                    stats[status] += 1
+                    if status == 'error':
+                        print(f"Error processing {path}: {error}")
+                    elif status == 'changed' and dry_run:
+                        print(f"[dry-run] 태그 변경: {path}")
+                    elif checkpoint is not None:
+                        checkpoint.write(str(Path(path).relative_to(self.vault_path)) + '\n')
+
+                    if stats['processed'] % report_every == 0:
+                        self._report(stats, start)
+                sp.set(files=stats['processed'], changed=stats['changed'])
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+
+        stats['elapsed'] = time.perf_counter() - start
+        self._report(stats, start)
+        return stats
+
+    def _report(self, stats, start):
+        elapsed = time.perf_counter() - start
+        rate = stats['processed'] / elapsed if elapsed > 0 else 0.0
+        print(
+            f"처리 {stats['processed']} | 변경 {stats['changed']} | "
+            f"오류 {stats['error']} | {rate:.1f} notes/s"
+        )
+
+def main(argv=None):
+    """python -m src.batch_tagger <볼트> [...]는 python -m src.cli retag <볼트> [...]와 같음"""
+    from src.cli import main as cli_main
+
+    return cli_main(['retag', *(sys.argv[1:] if argv is None else argv)])
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""
+볼트 링크 그래프 중심성
+
+노트 사이의 [[위키링크]]와 노트-개념(온톨로지) 연결로 그래프를 만들고 PageRank를 계산한다.
+관련 노트 순위와 Mermaid 다이어그램 노드 선택에 쓰여, 주변부 노트보다 볼트에서
+많이 연결된 노트와 개념이 먼저 나온다.
+
+- 노드: 노트, 그리고 노트로 존재하지 않는 링크 대상/개념 (제목·별칭이 같으면 같은 노드)
+- 간선: 노트 -> 링크한 노드, 노트 <-> 노트의 개념
+- PageRank는 희소 행렬 거듭제곱법(power iteration)으로 계산하고, 인덱스가 바뀌면
+  이전 점수에서 시작(warm start)해 몇 번의 반복만으로 수렴시킨다
+- 순위는 대략적인 중요도로만 쓰므로 조금 오래된 값을 허용한다. 인덱스가 바뀌어도
+  REFRESH_SECONDS가 지났거나 REFRESH_CHANGES번 이상 바뀌었을 때만 다시 계산하고,
+  계산은 잠금 밖에서 해 그동안 조회는 이전 순위를 그대로 쓴다
+"""
+import threading
+import time
+import numpy as np
+from scipy import sparse
+from src.note_index import title_key
+from src.tracing import span
+
+DAMPING = 0.85
+TOLERANCE = 1e-6
+MAX_ITERATIONS = 100
+# 인덱스가 바뀐 뒤 그래프를 다시 만들기까지 허용하는 최대 지연과 변경 횟수
+REFRESH_SECONDS = 5.0
+REFRESH_CHANGES = 50
+# Mermaid 다이어그램에 남길 최대 개념 수
+MERMAID_MAX_NODES = 15
+
+def prune_ontology(ontology, score, max_nodes=MERMAID_MAX_NODES):
+    """점수가 높은 개념 max_nodes개와 그 사이의 관계만 남긴 온톨로지
+
+    score(concept)는 볼트 중심성 같은 개념 점수. 점수가 같으면 온톨로지 안에서
+    관계가 많은 개념을 남긴다.
+    """
+    relationships = ontology.get('relationships', [])
+    concepts = list(ontology.get('concepts', []))
+    for rel in relationships:
+        for name in (rel['source'], rel['target']):
+            if name not in concepts:
+                concepts.append(name)
+    if len(concepts) <= max_nodes:
+        return ontology
+
+    degree = {}
+    for rel in relationships:
+        degree[rel['source']] = degree.get(rel['source'], 0) + 1
+        degree[rel['target']] = degree.get(rel['target'], 0) + 1
+    ranked = sorted(concepts, key=lambda c: (-score(c), -degree.get(c, 0), concepts.index(c)))
+    kept = set(ranked[:max_nodes])
+    pruned = dict(ontology)
+    pruned['concepts'] = [c for c in ontology.get('concepts', []) if c in kept]
+    pruned['relationships'] = [
+        rel for rel in relationships if rel['source'] in kept and rel['target'] in kept
+    ]
+    return pruned
+
+class Centrality:
+    def __init__(self, index, damping=DAMPING, tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS,
+                 refresh_seconds=REFRESH_SECONDS, refresh_changes=REFRESH_CHANGES):
+        self.index = index
+        self.damping = damping
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.refresh_seconds = refresh_seconds
+        self.refresh_changes = refresh_changes
+        # _lock은 계산된 순위 읽기/교체, _build_lock은 한 번에 한 스레드만 다시 계산하도록
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._generation = None
+        self._built_at = 0.0
+        self._nodes = {}                      # 노드 키 -> 번호
+        self._rank = np.zeros(0)
+        self._in_degree = np.zeros(0, dtype=np.int64)
+        # 노트 파일 -> PageRank (관련 노트 조회마다 제목으로 노드를 찾지 않도록 계산할 때 한 번 만듦)
+        self._note_rank = {}
+        self.iterations = 0
+
+    def _build_graph(self):
+        """(노드 키 -> 번호, 간선 출발 번호 배열, 간선 도착 번호 배열, 노트 파일 -> 노드 번호)"""
+        records = list(self.index)
+        nodes = {}
+        # 제목, 파일명, 별칭이 모두 같은 노트 노드를 가리키도록
+        aliases = {}
+        for record in records:
+            key = title_key(record.title)
+            nodes.setdefault(key, len(nodes))
+            for name in (record.title, record.path.stem, *record.aliases):
+                aliases.setdefault(title_key(name), key)
+
+        def node_id(name):
+            key = title_key(name)
+            key = aliases.get(key, key)
+            node = nodes.get(key)
+            if node is None:
+                node = nodes[key] = len(nodes)
+            return node
+
+        sources = []
+        targets = []
+        for record in records:
+            source = nodes[title_key(record.title)]
+            for link in record.links:
+                target = node_id(link)
+                if target != source:
+                    sources.append(source)
+                    targets.append(target)
+            for concept in record.concepts:
+                target = node_id(concept)
+                if target != source:
+                    sources.extend((source, target))
+                    targets.extend((target, source))
+        note_nodes = {record.file: nodes[title_key(record.title)] for record in records}
+        return nodes, np.array(sources, dtype=np.int64), np.array(targets, dtype=np.int64), note_nodes
+
+    def refresh(self, force=False):
+        """인덱스 변경이 쌓였으면 그래프를 다시 만들고 PageRank 갱신. 반복 횟수 반환
+
+        처음 계산할 때와 force가 True일 때를 빼면, 다른 스레드가 계산 중이거나 변경이 아직
+        적으면 이전 순위를 그대로 쓴다.
+        """
+        generation = self.index.generation
+        with self._lock:
+            if generation == self._generation:
+                return 0
+            stale = (
+                self._generation is None or force
+                or generation - self._generation >= self.refresh_changes
+                or time.monotonic() - self._built_at >= self.refresh_seconds
+            )
+            if not stale:
+                return 0
+            first = self._generation is None
+        # 처음 계산하는 스레드 외에는 기다리지 않음 (다른 스레드가 계산한 순위를 다음에 사용)
+        if not self._build_lock.acquire(blocking=first or force):
+            return 0
+        try:
+            generation = self.index.generation
+            with self._lock:
+                if generation == self._generation:
+                    return 0
+                previous_nodes, previous_rank = self._nodes, self._rank
+            with span('centrality') as sp:
+                nodes, sources, targets, note_nodes = self._build_graph()
+                size = len(nodes)
+                # 같은 간선이 여러 번 나와도 한 번으로 (노트가 같은 대상을 링크와 개념으로 모두 가진 경우)
+                adjacency = sparse.csr_matrix(
+                    (np.ones(len(sources)), (sources, targets)), shape=(size, size)
+                )
+                adjacency.data[:] = 1.0
+                out_degree = np.asarray(adjacency.sum(axis=1)).ravel()
+                in_degree = np.asarray(adjacency.sum(axis=0)).ravel().astype(np.int64)
+
+                # 이전 점수로 시작 (새 노드는 균등 분포 값)
+                start = np.full(size, 1.0 / max(size, 1))
+                for key, old in previous_nodes.items():
+                    new = nodes.get(key)
+                    if new is not None:
+                        start[new] = previous_rank[old]
+                rank, iterations = self._pagerank(adjacency, out_degree, start)
+                note_rank = {file: float(rank[node]) for file, node in note_nodes.items()}
+                sp.set(nodes=size, edges=int(adjacency.nnz), iterations=iterations, warm=bool(previous_nodes))
+
+            with self._lock:
+                self._nodes = nodes
+                self._rank = rank
+                self._in_degree = in_degree
+                self._note_rank = note_rank
+                self._generation = generation
+                self._built_at = time.monotonic()
+                self.iterations = iterations
+            return iterations
+        finally:
+            self._build_lock.release()
+
+    def _pagerank(self, adjacency, out_degree, start):
+        size = adjacency.shape[0]
+        if size == 0:
+            return start, 0
+        dangling = out_degree == 0
+        inverse = np.divide(1.0, out_degree, out=np.zeros(size), where=~dangling)
+        # 전이 행렬의 전치 (열 j: 노드 j에서 나가는 확률)
+        transition = (sparse.diags(inverse) @ adjacency).T.tocsr()
+        rank = start / start.sum()
+        teleport = (1.0 - self.damping) / size
+        for iteration in range(1, self.max_iterations + 1):
+            leaked = self.damping * rank[dangling].sum() / size
+            updated = self.damping * (transition @ rank) + teleport + leaked
+            if np.abs(updated - rank).sum() < self.tolerance:
+                return updated, iteration
+            rank = updated
+        return rank, self.max_iterations
+
+    def _node(self, name):
+        return self._nodes.get(title_key(name))
+
+    def score(self, name):
+        """노트 제목 또는 개념의 PageRank (그래프에 없으면 0)"""
+        self.refresh()
+        with self._lock:
+            node = self._node(name)
+            return float(self._rank[node]) if node is not None else 0.0
+
+    def note_score(self, record):
+        """노트 레코드의 PageRank (마지막 계산 뒤에 추가된 노트는 제목으로 조회)"""
+        self.refresh()
+        with self._lock:
+            rank = self._note_rank.get(record.file)
+        return rank if rank is not None else self.score(record.title)
+
+    def degree(self, name):
+        """노트 제목 또는 개념으로 들어오는 간선 수"""
+        self.refresh()
+        with self._lock:
+            node = self._node(name)
+            return int(self._in_degree[node]) if node is not None else 0
+
+    def rank_by_concepts(self, concepts, limit=None, exclude=()):
+        """겹치는 개념 수, 그다음 PageRank가 높은 순으로 노트 레코드 정렬 (NoteIndex.rank_by_concepts 사용)"""
+        self.refresh()
+        with self._lock:
+            note_rank = self._note_rank
+        # 마지막 계산 뒤에 추가된 노트는 다음 계산 전까지 0점
+        return self.index.rank_by_concepts(concepts, limit=limit, exclude=exclude,
+                                           score=lambda record: note_rank.get(record.file, 0.0))
+
+    def top(self, limit=20):
+        """PageRank가 높은 노드 [(노드 키, 점수)]"""
+        self.refresh()
+        with self._lock:
+            keys = [None] * len(self._nodes)
+            for key, node in self._nodes.items():
+                keys[node] = key
+            order = np.argsort(-self._rank, kind='stable')[:limit]
+            return [(keys[i], float(self._rank[i])) for i in order]
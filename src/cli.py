@@ -0,0 +1,415 @@
+"""
+명령줄 인터페이스
+
+    python -m src.cli ingest topics.txt --workers 4
+    python -m src.cli ingest docs/ --vault ~/Obsidian/Study
+    python -m src.cli ingest topics.txt --queue      # 중단 후 같은 명령으로 재개
+    python -m src.cli ingest topics.txt --upsert     # 이미 생성된 노트는 건너뜀
+    python -m src.cli jobs --retry-failed
+    python -m src.cli crawl 분산시스템 --depth 2 --max-notes 50   # 관련 개념으로 확장하며 생성
+    python -m src.cli retag ~/Obsidian/Study --dry-run
+    python -m src.cli usage --hours 24
+    python -m src.cli check --fix                         # 볼트 무결성 검사/수정
+    python -m src.cli serve --vault ~/Obsidian/Study      # 상주 조회 서비스
+    python -m src.cli query related --title 카프카
+    python -m src.cli query suggest --title 카프카
+"""
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from src.utils.progress import ThroughputReporter
+from src.profiling import profiled
+
+def load_inputs(source):
+    """입력 소스에서 (내용, 템플릿) 목록을 읽음
+
+    - 디렉토리: 각 .md/.txt 파일의 내용을 하나의 문서로 처리
+    - .jsonl 파일: 줄마다 {"topic" 또는 "content", "template"(선택)}
+    - 그 외 텍스트 파일: 한 줄에 주제 하나 (빈 줄, #으로 시작하는 줄은 무시)
+    """
+    source = Path(source)
+    items = []
+    if source.is_dir():
+        for path in sorted(source.rglob('*')):
+            if path.suffix in ('.md', '.txt') and path.is_file():
+                items.append((path.read_text(encoding='utf-8'), None))
+    elif source.suffix == '.jsonl':
+        with open(source, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                content = record.get('content') or record.get('topic')
+                if not content:
+                    raise ValueError(f"{source}:{line_no}: 'topic' 또는 'content'가 필요합니다.")
+                items.append((content, record.get('template')))
+    else:
+        with open(source, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    items.append((line, None))
+    return [(content, template) for content, template in items if content.strip()]
+
+@profiled('ingest', cpu=False)
+def run_ingest(ontology, items, workers=4, template_name='concept.md', reporter=None, upsert=False):
+    """노트 생성 파이프라인을 병렬로 실행하고 통계 반환"""
+    reporter = reporter or ThroughputReporter(total=len(items))
+    # 템플릿 컴파일과 볼트 인덱스 갱신은 노트마다가 아니라 배치 시작 시 한 번만
+    ontology.warm_up()
+
+    def process(item):
+        content, template = item
+        start = time.perf_counter()
+        try:
+            note_path = ontology.process_new_note(content, template_name=template or template_name, upsert=upsert)
+        except Exception as e:
+            print(f"오류 발생: {e}")
+            note_path = None
+        reporter.record(time.perf_counter() - start, ok=note_path is not None)
+        return note_path
+
+    # 진행 중인 작업 수를 제한해 입력이 많아도 Future가 한꺼번에 쌓이지 않도록 함
+    pending = set()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for item in items:
+            if len(pending) >= workers * 2:
+                _, pending = wait(pending, return_when=FIRST_COMPLETED)
+            pending.add(executor.submit(process, item))
+        wait(pending)
+
+    reporter.print_line(final=True)
+    return reporter.summary()
+
+def open_job_queue(vault_path, db_path=None):
+    from src.job_queue import JobQueue
+    from src.utils.vault_scanner import get_state_dir
+
+    return JobQueue(db_path or get_state_dir(vault_path) / 'jobs.sqlite')
+
+def cmd_ingest(args):
+    from src.ontology import ObsidianOntology
+    from src.api.usage import usage_tracker
+    from src.api.scheduler import BULK
+
+    items = load_inputs(args.source)
+    if not items:
+        print("처리할 입력이 없습니다.")
+        return 1
+
+    ontology = ObsidianOntology(args.vault)
+    # 일괄 생성은 같은 프로세스의 대화형 요청보다 뒤로 미룸
+    ontology.llm.priority = BULK
+    if not args.queue:
+        stats = run_ingest(ontology, items, workers=args.workers, template_name=args.template, upsert=args.upsert)
+        ontology.close()
+        print(json.dumps(stats, ensure_ascii=False))
+        print_usage_table(usage_tracker.run_summary())
+        return 0 if stats['failures'] == 0 else 2
+
+    # 작업 큐 모드: 이미 큐에 있는 입력은 다시 추가되지 않고, 완료된 단계는 건너뜀
+    from src.job_queue import JobRunner
+
+    queue = open_job_queue(ontology.vault_path, args.db)
+    added = queue.enqueue(items, template_name=args.template)
+    counts = queue.counts()
+    print(f"새 작업 {added}개 추가 (대기 {counts.get('pending', 0)}, 완료 {counts.get('done', 0)})")
+    reporter = ThroughputReporter(total=counts.get('pending', 0) + counts.get('running', 0))
+    counts = JobRunner(ontology, queue, workers=args.workers, upsert=args.upsert).run(reporter)
+    ontology.close()
+    reporter.print_line(final=True)
+    print(json.dumps(counts, ensure_ascii=False))
+    print_usage_table(usage_tracker.run_summary())
+    queue.close()
+    return 0 if not counts.get('failed') else 2
+
+def cmd_crawl(args):
+    from src.ontology import ObsidianOntology
+    from src.api.usage import usage_tracker
+    from src.api.scheduler import BULK
+    from src.crawler import CrawlState, OntologyCrawler
+    from src.utils.vault_scanner import get_state_dir
+
+    seeds = list(args.seeds)
+    if args.file:
+        seeds.extend(content for content, _ in load_inputs(args.file))
+    ontology = ObsidianOntology(args.vault)
+    ontology.llm.priority = BULK
+    state = CrawlState(args.db or get_state_dir(ontology.vault_path) / 'crawl.sqlite')
+    if args.restart:
+        state.reset()
+    if not seeds and not state.counts().get('pending'):
+        print("시드 주제를 지정하세요.")
+        state.close()
+        return 1
+
+    crawler = OntologyCrawler(
+        ontology, state, max_depth=args.depth, max_notes=args.max_notes, max_tokens=args.max_tokens,
+        branching=args.branching, workers=args.workers, template_name=args.template,
+    )
+    reporter = ThroughputReporter(total=args.max_notes)
+    counts = crawler.run(seeds, reporter)
+    ontology.close()
+    reporter.print_line(final=True)
+    print(json.dumps({
+        'notes': crawler.notes_created(), 'tokens': crawler.tokens_used(), 'nodes': counts,
+    }, ensure_ascii=False))
+    print_usage_table(usage_tracker.run_summary())
+    state.close()
+    return 0 if not counts.get('failed') else 2
+
+def cmd_jobs(args):
+    vault_path = args.vault
+    if args.db is None:
+        vault_path = resolve_vault(vault_path)
+        if vault_path is None:
+            return 1
+    queue = open_job_queue(vault_path, args.db)
+    if args.retry_failed:
+        print(f"실패한 작업 {queue.retry_failed()}개를 다시 대기열에 넣었습니다.")
+    print(json.dumps(queue.counts(), ensure_ascii=False))
+    queue.close()
+    return 0
+
+def resolve_vault(vault_path):
+    """볼트 경로가 없으면 자동 탐색 (찾지 못하면 None)"""
+    if vault_path is not None:
+        return vault_path
+    from src.utils.vault_finder import find_obsidian_vaults
+
+    vaults = find_obsidian_vaults()
+    if not vaults:
+        print("옵시디언 볼트를 찾을 수 없습니다.")
+        return None
+    return vaults[0]
+
+def cmd_usage(args):
+    from src.api.usage import load_usage_log, summarize_records
+    from src.utils.vault_scanner import get_state_dir
+
+    vault_path = resolve_vault(args.vault)
+    if vault_path is None:
+        return 1
+    log_path = get_state_dir(vault_path) / 'llm_usage.jsonl'
+    if not log_path.exists():
+        print("기록된 LLM 호출이 없습니다.")
+        return 0
+
+    since = time.time() - args.hours * 3600 if args.hours else None
+    summary = summarize_records(load_usage_log(log_path, since), by=args.by)
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+        return 0
+
+    print_usage_table(summary)
+    return 0
+
+def print_usage_table(summary):
+    """호출 종류(또는 라우트)/모델별 사용량 표 출력 (토큰 사용량이 많은 순)"""
+    print(f"{'호출/모델':<32}{'호출':>7}{'오류':>6}{'입력 토큰':>12}{'출력 토큰':>12}{'비용($)':>10}{'p50':>8}{'p95':>8}")
+    for key, stats in sorted(summary.items(), key=lambda kv: -(kv[1]['prompt_tokens'] + kv[1]['output_tokens'])):
+        print(
+            f"{key:<32}{stats['calls']:>7}{stats['errors']:>6}{stats['prompt_tokens']:>12}"
+            f"{stats['output_tokens']:>12}{stats['cost']:>10.4f}{stats['latency']['p50']:>7}s{stats['latency']['p95']:>7}s"
+        )
+
+def cmd_check(args):
+    from src.vault_checker import VaultChecker, ISSUE_KINDS
+
+    vault_path = resolve_vault(args.vault)
+    if vault_path is None:
+        return 1
+    start = time.perf_counter()
+    checker = VaultChecker(vault_path, workers=args.workers)
+    notes = checker.scan()
+    issues = checker.check()
+    elapsed = time.perf_counter() - start
+
+    fixed = 0
+    if args.fix:
+        fixed = checker.fix(issues, create_stubs=args.create_stubs)
+
+    if args.json:
+        print(json.dumps({
+            'notes': notes, 'elapsed': elapsed, 'fixed': fixed,
+            'issues': [issue.to_dict() for issue in issues],
+        }, ensure_ascii=False, indent=2))
+    else:
+        by_kind = {kind: [issue for issue in issues if issue.kind == kind] for kind in ISSUE_KINDS}
+        for kind, found in by_kind.items():
+            fixable = sum(1 for issue in found if issue.fix is not None)
+            print(f"{kind}: {len(found)}개 (자동 수정 가능 {fixable}개)")
+            for issue in found[:args.limit]:
+                where = f"{Path(issue.file).relative_to(vault_path)}: " if issue.file else ''
+                print(f"  {where}{issue.target} ({issue.detail})")
+            if len(found) > args.limit:
+                print(f"  ... 외 {len(found) - args.limit}개")
+        print(f"노트 {notes}개 검사 ({elapsed:.1f}s)" + (f", {fixed}개 항목 수정" if args.fix else ''))
+
+    unfixed = [
+        issue for issue in issues
+        if not args.fix or issue.fix is None or (issue.kind == 'missing_concept' and not args.create_stubs)
+    ] + checker.failed
+    if checker.failed and not args.json:
+        print(f"수정하지 못한 항목 {len(checker.failed)}개")
+    return 0 if not unfixed else 2
+
+def cmd_retag(args):
+    from src.batch_tagger import BatchTagger
+
+    tagger = BatchTagger(args.vault_path, workers=args.workers)
+    stats = tagger.run(dry_run=args.dry_run, resume=args.resume)
+    print(json.dumps(stats, ensure_ascii=False))
+    return 0 if stats['error'] == 0 else 2
+
+def cmd_serve(args):
+    from src.query_service import QueryService
+
+    vault_path = resolve_vault(args.vault)
+    if vault_path is None:
+        return 1
+    QueryService(vault_path, port=args.port).serve_forever()
+    return 0
+
+def cmd_query(args):
+    """실행 중인 조회 서비스를 사용하고, 없으면 인덱스를 직접 읽어 한 번 조회"""
+    from src.query_service import QueryClient, QueryServiceError, VaultQueryModel
+
+    vault_path = resolve_vault(args.vault)
+    if vault_path is None:
+        return 1
+    params = {
+        'title': args.title, 'concept': args.concept, 'tag': args.tag,
+        'depth': args.depth, 'limit': args.limit,
+    }
+    if args.name not in ('related', 'suggest', 'cooccur') and args.concept:
+        params['concept'] = args.concept[0]
+    # --depth 0처럼 0도 유효한 값이므로 지정하지 않은 옵션만 뺌
+    params = {key: value for key, value in params.items() if value is not None}
+
+    client = QueryClient.connect(vault_path)
+    try:
+        if client is not None:
+            result = client.query(args.name, **params)
+        else:
+            model = VaultQueryModel(vault_path)
+            model.refresh()
+            result = model.query(args.name, params)
+    except KeyError as e:
+        print(f"필수 옵션이 없습니다: {e}")
+        return 1
+    except QueryServiceError as e:
+        # 서비스는 필수 옵션이 빠지면 400과 함께 오류 메시지를 돌려줌
+        print(f"조회 실패: {e}")
+        return 1
+
+    if args.name == 'mermaid':
+        print(result)
+    else:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m src.cli', description="옵시디언 온톨로지 자동화 도구")
+    parser.add_argument('--trace', default=None, help="단계별 스팬을 JSON lines로 기록할 파일")
+    parser.add_argument('--metrics', default=None, help="단계별 지연 시간 요약을 기록할 Prometheus textfile")
+    parser.add_argument('--profile', default=None, help="프로파일링 모드: cpu, mem 또는 cpu,mem")
+    parser.add_argument('--profile-dir', default=None, help="프로파일 보고서 저장 디렉토리 (기본: ./profiles)")
+    parser.add_argument('--profile-top', type=int, default=None, help="보고서 요약에 포함할 상위 항목 수")
+    parser.add_argument('--profile-limit', type=int, default=None, help="진입점별 최대 보고서 수 (기본: 5)")
+    parser.add_argument('--share-llm', action='store_true',
+                        help="같은 볼트를 쓰는 GUI/CLI 프로세스와 LLM 슬롯 공유 (ONTOLOGY_LLM_SHARED=1과 같음)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    ingest = subparsers.add_parser('ingest', help="주제/문서 목록으로 노트 일괄 생성")
+    ingest.add_argument('source', help="디렉토리, 텍스트 파일(한 줄에 주제 하나) 또는 JSONL 파일")
+    ingest.add_argument('--vault', default=None, help="옵시디언 볼트 경로 (기본: 자동 탐색)")
+    ingest.add_argument('--workers', type=int, default=4, help="동시에 처리할 노트 수")
+    ingest.add_argument('--template', default='concept.md', help="기본 노트 템플릿")
+    ingest.add_argument('--queue', action='store_true', help="SQLite 작업 큐를 사용해 단계별로 체크포인트 (재실행 시 이어서 처리)")
+    ingest.add_argument('--db', default=None, help="작업 큐 DB 경로 (기본: <볼트>/.ontology/jobs.sqlite)")
+    ingest.add_argument('--upsert', action='store_true',
+                        help="같은 입력/프롬프트 버전으로 만든 노트는 건너뛰고, 같은 제목의 노트는 병합 또는 재생성")
+    ingest.set_defaults(func=cmd_ingest)
+
+    crawl = subparsers.add_parser('crawl', help="시드 주제에서 관련 개념으로 너비 우선 확장하며 노트 생성")
+    crawl.add_argument('seeds', nargs='*', help="시드 주제")
+    crawl.add_argument('--file', default=None, help="시드 주제 파일 (ingest와 같은 형식)")
+    crawl.add_argument('--vault', default=None, help="옵시디언 볼트 경로 (기본: 자동 탐색)")
+    crawl.add_argument('--depth', type=int, default=2, help="시드로부터 최대 확장 깊이")
+    crawl.add_argument('--max-notes', type=int, default=50, help="새로 만들 최대 노트 수 (이전 실행 포함)")
+    crawl.add_argument('--max-tokens', type=int, default=300_000, help="최대 LLM 토큰 수 (이전 실행 포함)")
+    crawl.add_argument('--branching', type=int, default=5, help="노트 하나에서 확장할 최대 개념 수")
+    crawl.add_argument('--workers', type=int, default=4, help="동시에 처리할 노트 수")
+    crawl.add_argument('--template', default='concept.md', help="노트 템플릿")
+    crawl.add_argument('--db', default=None, help="크롤링 상태 DB 경로 (기본: <볼트>/.ontology/crawl.sqlite)")
+    crawl.add_argument('--restart', action='store_true', help="이전 크롤링 상태를 지우고 처음부터 시작")
+    crawl.set_defaults(func=cmd_crawl)
+
+    jobs = subparsers.add_parser('jobs', help="작업 큐 상태 확인")
+    jobs.add_argument('--vault', default=None, help="옵시디언 볼트 경로 (기본: 자동 탐색)")
+    jobs.add_argument('--db', default=None, help="작업 큐 DB 경로")
+    jobs.add_argument('--retry-failed', action='store_true', help="실패한 작업을 다시 대기 상태로 변경")
+    jobs.set_defaults(func=cmd_jobs)
+
+    usage = subparsers.add_parser('usage', help="LLM 호출 토큰/지연 시간 통계")
+    usage.add_argument('--vault', default=None, help="옵시디언 볼트 경로 (기본: 자동 탐색)")
+    usage.add_argument('--hours', type=float, default=24, help="최근 N시간 기록만 집계 (0이면 전체)")
+    usage.add_argument('--json', action='store_true', help="히스토그램을 포함한 JSON으로 출력")
+    usage.add_argument('--by', choices=['caller', 'route'], default='caller', help="호출 종류별 또는 모델 라우트별 집계")
+    usage.set_defaults(func=cmd_usage)
+
+    retag = subparsers.add_parser('retag', help="볼트 전체 노트 태그 재계산")
+    retag.add_argument('vault_path', help="옵시디언 볼트 경로")
+    retag.add_argument('--workers', type=int, default=None, help="워커 프로세스 수 (기본: CPU 수)")
+    retag.add_argument('--dry-run', action='store_true', help="파일을 수정하지 않고 변경 대상만 출력")
+    retag.add_argument('--resume', action='store_true', help="이전 실행에서 처리한 노트는 건너뜀")
+    retag.set_defaults(func=cmd_retag)
+
+    check = subparsers.add_parser('check', help="깨진 링크, 노트 없는 개념, 파일명 충돌, 관계/개념 불일치 검사")
+    check.add_argument('--vault', default=None, help="옵시디언 볼트 경로 (기본: 자동 탐색)")
+    check.add_argument('--workers', type=int, default=None, help="워커 프로세스 수 (기본: CPU 수)")
+    check.add_argument('--fix', action='store_true', help="깨진 링크와 관계/개념 불일치를 자동 수정")
+    check.add_argument('--create-stubs', action='store_true', help="--fix와 함께: 노트 없는 개념의 빈 노트 생성")
+    check.add_argument('--limit', type=int, default=20, help="종류별로 출력할 최대 문제 수")
+    check.add_argument('--json', action='store_true', help="전체 문제 목록을 JSON으로 출력")
+    check.set_defaults(func=cmd_check)
+
+    serve = subparsers.add_parser('serve', help="볼트 인덱스를 메모리에 유지하는 localhost 조회 서비스 실행")
+    serve.add_argument('--vault', default=None, help="옵시디언 볼트 경로 (기본: 자동 탐색)")
+    serve.add_argument('--port', type=int, default=8765, help="포트 (0이면 빈 포트 자동 선택)")
+    serve.set_defaults(func=cmd_serve)
+
+    query = subparsers.add_parser('query', help="관련 노트, 역링크, 개념 주변, 태그, Mermaid 조회")
+    query.add_argument('name', choices=['related', 'backlinks', 'neighborhood', 'tags', 'mermaid', 'suggest', 'cooccur'])
+    query.add_argument('--vault', default=None, help="옵시디언 볼트 경로 (기본: 자동 탐색)")
+    query.add_argument('--title', default=None, help="노트 제목 (related, backlinks, suggest)")
+    query.add_argument('--concept', action='append', default=None, help="개념 (related, suggest, cooccur는 여러 번 지정 가능)")
+    query.add_argument('--tag', default=None, help="태그 (tags)")
+    query.add_argument('--depth', type=int, default=None, help="개념 주변 탐색 깊이 (neighborhood, mermaid)")
+    query.add_argument('--limit', type=int, default=None, help="최대 결과 수 (related, suggest, cooccur)")
+    query.set_defaults(func=cmd_query)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.trace or args.metrics:
+        from src.tracing import tracer
+
+        tracer.configure(args.trace, args.metrics)
+    if args.profile:
+        from src import profiling
+
+        profiling.configure(args.profile, args.profile_dir, args.profile_top, args.profile_limit)
+    if args.share_llm:
+        from src.api.scheduler import llm_scheduler
+
+        llm_scheduler.share_enabled = True
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""
+개념 동시 등장 행렬
+
+NoteIndex 위에 노트 × 개념 희소 행렬 X(CSR)와 개념 × 개념 동시 등장 행렬 C = XᵀX를 유지하고,
+PMI(pointwise mutual information) 점수로 API 호출 없이 연결할 노트와 관련 개념을 찾는다.
+
+- C[a, b]: 개념 a, b가 함께 등장한 노트 수 (대각선 C[a, a]는 개념 a가 등장한 노트 수)
+- PMI(a, b) = log(C[a, b] · N / (C[a, a] · C[b, b])), 양수만 사용 (PPMI)
+- 노트 점수 = X · (q + w · PPMI · q): 직접 겹치는 개념과 자주 함께 등장하는 개념을 함께 반영
+
+인덱스가 바뀌면 바뀐 노트의 행만 빼고 더해 C를 갱신하고, 변경이 많으면 전체를 다시 계산한다.
+LLM은 여기서 찾은 상위 몇 개의 후보를 설명하거나 검증할 때만 쓰면 된다.
+"""
+import threading
+import numpy as np
+from scipy import sparse
+from src.note_index import title_key
+from src.tracing import span
+
+# 이보다 적게 함께 등장한 개념 쌍은 PMI를 계산하지 않음 (드문 쌍의 PMI가 과대평가되는 것 방지)
+MIN_COOCCURRENCE = 2
+# 바뀐 노트가 전체의 이 비율을 넘으면 증분 갱신 대신 전체 재계산
+REBUILD_RATIO = 0.2
+# 함께 등장하는 개념을 통한 점수의 가중치 (직접 겹치는 개념 하나가 1)
+EXPANSION_WEIGHT = 0.5
+
+class ConceptMatrix:
+    def __init__(self, index, min_count=MIN_COOCCURRENCE):
+        self.index = index
+        self.min_count = min_count
+        self._lock = threading.RLock()
+        self._generation = None
+        self._reset()
+
+    def _reset(self):
+        self._vocab = {}      # 개념 -> 열 번호
+        self._concepts = []   # 열 번호 -> 개념
+        self._rows = {}       # 파일 -> (레코드, 개념 열 번호 배열)
+        self._cooccurrence = sparse.csr_matrix((0, 0), dtype=np.int32)
+        self._invalidate()
+
+    def _invalidate(self):
+        self._notes = None
+        self._ppmi = None
+
+    def _column(self, concept):
+        col = self._vocab.get(concept)
+        if col is None:
+            col = self._vocab[concept] = len(self._concepts)
+            self._concepts.append(concept)
+        return col
+
+    def _row(self, record):
+        return np.unique(np.fromiter((self._column(c) for c in record.concepts), dtype=np.int32))
+
+    def _csr(self, rows):
+        """개념 열 번호 배열 목록으로 노트 × 개념 CSR 행렬 생성"""
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(row) for row in rows], out=indptr[1:])
+        indices = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int32)
+        data = np.ones(len(indices), dtype=np.int32)
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(rows), len(self._concepts)))
+
+    def _gram(self, rows):
+        x = self._csr(rows)
+        return (x.T @ x).tocsr()
+
+    def refresh(self):
+        """인덱스 변경을 반영하고 다시 계산한 노트 수 반환"""
+        with self._lock:
+            generation = self.index.generation
+            if generation == self._generation:
+                return 0
+            with span('concept_matrix') as sp:
+                records = {record.file: record for record in self.index}
+                removed = [file for file in self._rows if file not in records]
+                changed = [
+                    record for file, record in records.items()
+                    if file not in self._rows or self._rows[file][0] is not record
+                ]
+                count = len(removed) + len(changed)
+                if self._generation is None or count > REBUILD_RATIO * max(len(records), 1):
+                    self._rebuild(records.values())
+                    sp.set(mode='rebuild', notes=len(records))
+                elif count:
+                    self._update(removed, changed)
+                    sp.set(mode='incremental', changed=count)
+                self._generation = generation
+                return count
+
+    def _rebuild(self, records):
+        self._reset()
+        for record in records:
+            self._rows[record.file] = (record, self._row(record))
+        self._cooccurrence = self._gram([row for _, row in self._rows.values()])
+
+    def _update(self, removed, changed):
+        old_rows = [self._rows.pop(file)[1] for file in removed]
+        new_rows = []
+        for record in changed:
+            previous = self._rows.get(record.file)
+            if previous is not None:
+                old_rows.append(previous[1])
+            row = self._row(record)
+            self._rows[record.file] = (record, row)
+            new_rows.append(row)
+
+        size = len(self._concepts)
+        cooccurrence = self._cooccurrence.copy()
+        cooccurrence.resize((size, size))
+        cooccurrence = cooccurrence - self._gram(old_rows) + self._gram(new_rows)
+        cooccurrence.eliminate_zeros()
+        self._cooccurrence = cooccurrence.tocsr()
+        self._invalidate()
+
+    def _note_matrix(self):
+        """(파일 목록, 노트 × 개념 CSR) - 파일 경로 순"""
+        if self._notes is None:
+            files = sorted(self._rows)
+            self._notes = (files, self._csr([self._rows[file][1] for file in files]))
+        return self._notes
+
+    def _ppmi_matrix(self):
+        if self._ppmi is None:
+            counts = self._cooccurrence.tocoo()
+            frequency = self._cooccurrence.diagonal().astype(np.float64)
+            mask = (counts.row != counts.col) & (counts.data >= self.min_count)
+            rows, cols = counts.row[mask], counts.col[mask]
+            pmi = np.log(counts.data[mask] * float(len(self._rows)) / (frequency[rows] * frequency[cols]))
+            keep = pmi > 0
+            self._ppmi = sparse.csr_matrix(
+                (pmi[keep], (rows[keep], cols[keep])), shape=self._cooccurrence.shape
+            )
+        return self._ppmi
+
+    def _query_vector(self, concepts):
+        vector = np.zeros(len(self._concepts), dtype=np.float64)
+        for concept in concepts:
+            col = self._vocab.get(concept)
+            if col is not None:
+                vector[col] = 1.0
+        return vector
+
+    def cooccurrence(self, a, b):
+        """두 개념이 함께 등장한 노트 수"""
+        self.refresh()
+        with self._lock:
+            if a not in self._vocab or b not in self._vocab:
+                return 0
+            return int(self._cooccurrence[self._vocab[a], self._vocab[b]])
+
+    def related_concepts(self, concepts, limit=10):
+        """주어진 개념들과 PMI가 높은 다른 개념 [(개념, PMI 합, 동시 등장 노트 수)]"""
+        self.refresh()
+        with self._lock:
+            query = self._query_vector(concepts)
+            if not query.any():
+                return []
+            scores = self._ppmi_matrix() @ query
+            scores[query > 0] = 0
+            counts = self._cooccurrence @ query
+            candidates = np.flatnonzero(scores > 0)
+            order = candidates[np.lexsort((candidates, -scores[candidates]))][:limit]
+            return [(self._concepts[i], float(scores[i]), int(counts[i])) for i in order]
+
+    def suggest_notes(self, concepts, limit=20, exclude=()):
+        """주어진 개념과 연결할 만한 노트 [(레코드, 점수)] (점수 높은 순)
+
+        개념이 직접 겹치는 노트에 1, 함께 자주 등장하는 개념을 가진 노트에는
+        PMI에 비례해 최대 EXPANSION_WEIGHT를 더한다.
+        """
+        self.refresh()
+        with self._lock:
+            query = self._query_vector(concepts)
+            if not query.any():
+                return []
+            expansion = self._ppmi_matrix() @ query
+            expansion[query > 0] = 0
+            if expansion.max() > 0:
+                query = query + EXPANSION_WEIGHT * expansion / expansion.max()
+            files, notes = self._note_matrix()
+            scores = notes @ query
+            candidates = np.flatnonzero(scores > 0)
+            order = candidates[np.lexsort((candidates, -scores[candidates]))]
+            exclude = set(exclude)
+            results = []
+            for i in order:
+                if files[i] in exclude:
+                    continue
+                results.append((self._rows[files[i]][0], float(scores[i])))
+                if len(results) >= limit:
+                    break
+            return results
+
+    def suggest_links(self, title, limit=10):
+        """기존 노트에 아직 [[링크]]하지 않은 연결 후보 [(레코드, 점수)]"""
+        record = self.index.get_by_title(title)
+        if record is None:
+            return []
+        linked = {title_key(link) for link in record.links}
+        results = []
+        for candidate, score in self.suggest_notes(record.concepts, limit=limit + len(linked) + 1,
+                                                   exclude=(record.file,)):
+            names = (candidate.title, candidate.path.stem, *candidate.aliases)
+            if any(title_key(name) in linked for name in names):
+                continue
+            results.append((candidate, score))
+            if len(results) >= limit:
+                break
+        return results
@@ -0,0 +1,300 @@
+"""
+예산 제한 너비 우선 온톨로지 크롤러
+
+시드 주제로 노트를 만든 뒤, 생성된 노트에서 추출한 개념 중 중심성이 높은 개념으로
+너비 우선으로 확장하며 노트를 만든다. 깊이, 노트 수, 토큰 수 예산 중 하나라도 다 쓰면 멈춘다.
+
+- 이미 볼트에 있는 노트(제목/별칭 일치)는 다시 만들지 않고, 그 노트의 개념으로만 확장한다
+- 다음에 만들 개념은 깊이가 얕은 순, 그다음 크롤링 중 여러 노트에서 언급된 순,
+  볼트 링크 그래프 PageRank가 높은 순으로 고른다
+- LLM 호출은 BULK 우선순위로 llm_scheduler의 할당량 안에서 동시에 실행된다
+- 상태는 <볼트>/.ontology/crawl.sqlite에 저장되어, 중단되거나 예산을 다 쓴 뒤
+  같은 명령(또는 더 큰 예산)으로 다시 실행하면 남은 개념부터 이어서 처리한다
+
+    python -m src.cli crawl 분산시스템 --depth 2 --max-notes 50 --max-tokens 300000
+"""
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from src.note_index import title_key
+from src.api.usage import usage_tracker
+from src.tracing import span
+from src.profiling import profiled
+
+DEFAULT_DEPTH = 2
+DEFAULT_MAX_NOTES = 50
+DEFAULT_MAX_TOKENS = 300_000
+# 노트 하나에서 다음 깊이로 확장할 최대 개념 수
+DEFAULT_BRANCHING = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawl_nodes (
+    key TEXT PRIMARY KEY,
+    concept TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    parent TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    mentions INTEGER NOT NULL DEFAULT 1,
+    score REAL NOT NULL DEFAULT 0,
+    note TEXT,
+    error TEXT,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS crawl_nodes_pending ON crawl_nodes (status, depth, mentions, score);
+CREATE TABLE IF NOT EXISTS crawl_meta (
+    key TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+def total_tokens(tracker=None):
+    """프로세스 시작 이후 LLM 입력 + 출력 토큰 수"""
+    summary = (tracker or usage_tracker).run_summary()
+    return sum(stats['prompt_tokens'] + stats['output_tokens'] for stats in summary.values())
+
+class CrawlState:
+    """크롤링 대기열과 예산 사용량 (SQLite)"""
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def reset(self):
+        with self._lock:
+            self.conn.execute('DELETE FROM crawl_nodes')
+            self.conn.execute('DELETE FROM crawl_meta')
+
+    def add(self, concepts, depth, parent=None):
+        """개념을 대기열에 추가. 이미 있는 개념은 언급 횟수만 올림. 새로 추가된 수 반환"""
+        now = time.time()
+        added = 0
+        with self._lock:
+            self.conn.execute('BEGIN')
+            for concept, score in concepts:
+                cursor = self.conn.execute(
+                    'INSERT OR IGNORE INTO crawl_nodes (key, concept, depth, parent, score, updated) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (title_key(concept), concept, depth, parent, score, now)
+                )
+                if cursor.rowcount:
+                    added += 1
+                else:
+                    self.conn.execute(
+                        'UPDATE crawl_nodes SET mentions = mentions + 1, updated = ? WHERE key = ?',
+                        (now, title_key(concept))
+                    )
+            self.conn.execute('COMMIT')
+        return added
+
+    def known(self, concepts):
+        """concepts 중 이미 대기열이나 처리 기록에 있는 개념의 키"""
+        keys = [title_key(concept) for concept in concepts]
+        if not keys:
+            return set()
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT key FROM crawl_nodes WHERE key IN ({','.join('?' * len(keys))})", keys
+            ).fetchall()
+        return {row['key'] for row in rows}
+
+    def recover(self):
+        """비정상 종료로 'running'에 남은 개념을 다시 대기 상태로"""
+        with self._lock:
+            cursor = self.conn.execute(
+                "UPDATE crawl_nodes SET status = 'pending', updated = ? WHERE status = 'running'",
+                (time.time(),)
+            )
+            return cursor.rowcount
+
+    def claim(self, max_depth):
+        """가장 얕고 많이 언급된 대기 개념 하나를 'running'으로 표시하고 반환 (없으면 None)"""
+        with self._lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            row = self.conn.execute(
+                "SELECT * FROM crawl_nodes WHERE status = 'pending' AND depth <= ? "
+                "ORDER BY depth, mentions DESC, score DESC, key LIMIT 1",
+                (max_depth,)
+            ).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE crawl_nodes SET status = 'running', updated = ? WHERE key = ?",
+                    (time.time(), row['key'])
+                )
+            self.conn.execute('COMMIT')
+            return dict(row) if row is not None else None
+
+    def finish(self, key, status, note=None, error=None):
+        with self._lock:
+            self.conn.execute(
+                'UPDATE crawl_nodes SET status = ?, note = ?, error = ?, updated = ? WHERE key = ?',
+                (status, note, error, time.time(), key)
+            )
+
+    def release(self, key):
+        """예산이 끝나 처리하지 못한 개념을 다시 대기 상태로"""
+        self.finish(key, 'pending')
+
+    def get_meta(self, key, default=0.0):
+        with self._lock:
+            row = self.conn.execute('SELECT value FROM crawl_meta WHERE key = ?', (key,)).fetchone()
+        return row['value'] if row is not None else default
+
+    def add_meta(self, key, delta):
+        with self._lock:
+            self.conn.execute(
+                'INSERT INTO crawl_meta (key, value) VALUES (?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET value = value + excluded.value',
+                (key, delta)
+            )
+
+    def counts(self):
+        """상태별 개념 수"""
+        with self._lock:
+            rows = self.conn.execute('SELECT status, COUNT(*) AS n FROM crawl_nodes GROUP BY status').fetchall()
+        return {row['status']: row['n'] for row in rows}
+
+class OntologyCrawler:
+    def __init__(self, ontology, state, max_depth=DEFAULT_DEPTH, max_notes=DEFAULT_MAX_NOTES,
+                 max_tokens=DEFAULT_MAX_TOKENS, branching=DEFAULT_BRANCHING, workers=4,
+                 template_name='concept.md'):
+        self.ontology = ontology
+        self.state = state
+        self.max_depth = max_depth
+        self.max_notes = max_notes
+        self.max_tokens = max_tokens
+        self.branching = branching
+        self.workers = workers
+        self.template_name = template_name
+        self._budget_lock = threading.Lock()
+        self._reserved = 0
+        self._tokens_start = total_tokens()
+
+    def tokens_used(self):
+        """이전 실행을 포함해 크롤링에 쓴 토큰 수"""
+        return int(self.state.get_meta('tokens')) + total_tokens() - self._tokens_start
+
+    def notes_created(self):
+        return int(self.state.get_meta('notes'))
+
+    def _reserve(self):
+        """노트 하나를 만들 예산이 남았으면 예약하고 True (동시 실행 중인 노트도 계산)"""
+        with self._budget_lock:
+            if self.notes_created() + self._reserved >= self.max_notes:
+                return False
+            if self.tokens_used() >= self.max_tokens:
+                return False
+            self._reserved += 1
+            return True
+
+    def _unreserve(self, created):
+        with self._budget_lock:
+            self._reserved -= 1
+            if created:
+                self.state.add_meta('notes', 1)
+
+    @profiled('crawl', cpu=False)
+    def run(self, seeds, reporter=None):
+        """시드부터 예산이 끝나거나 대기열이 빌 때까지 크롤링하고 상태별 개념 수 반환"""
+        recovered = self.state.recover()
+        if recovered:
+            print(f"중단된 개념 {recovered}개를 이어서 처리합니다.")
+        self.state.add([(seed, 0.0) for seed in seeds], depth=0)
+        if self.ontology.query_client is None:
+            self.ontology.index.refresh()
+
+        with span('crawl', seeds=len(seeds), depth=self.max_depth) as sp:
+            try:
+                with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='crawl') as executor:
+                    futures = [executor.submit(self._work, reporter) for _ in range(self.workers)]
+                    # 상태 저장(claim/finish) 오류로 워커가 멈추면 여기서 다시 발생시킴
+                    for future in futures:
+                        future.result()
+            finally:
+                # 다음 실행에서 이어서 계산하도록 이번 실행의 토큰 사용량 저장
+                now = total_tokens()
+                self.state.add_meta('tokens', now - self._tokens_start)
+                self._tokens_start = now
+            counts = self.state.counts()
+            sp.set(notes=self.notes_created(), tokens=self.tokens_used(), **counts)
+        return counts
+
+    def _work(self, reporter):
+        while True:
+            node = self.state.claim(self.max_depth)
+            if node is None:
+                # 다른 워커가 처리 중인 노트의 확장 개념이 곧 추가될 수 있음
+                if self._reserved:
+                    time.sleep(0.5)
+                    continue
+                return
+            try:
+                if not self._visit(node, reporter):
+                    return
+            except Exception as e:
+                print(f"크롤링 오류 ({node['concept']}): {e}")
+                self.state.finish(node['key'], 'failed', error=str(e))
+
+    def _visit(self, node, reporter):
+        """개념 하나를 처리. 예산이 끝났으면 개념을 되돌리고 False"""
+        concept = node['concept']
+        record = self.ontology.index.get_by_title(concept)
+        if record is not None:
+            # 이미 있는 노트는 다시 만들지 않고 개념으로만 확장
+            self.state.finish(node['key'], 'exists', note=record.file)
+            self._expand(node, record.concepts)
+            return True
+
+        if not self._reserve():
+            self.state.release(node['key'])
+            return False
+        start = time.perf_counter()
+        created = False
+        extracted = []
+        try:
+            note_path = self.ontology.process_new_note(
+                concept, template_name=self.template_name, upsert=True,
+                on_ontology=lambda ontology: extracted.extend(ontology.get('concepts') or [])
+            )
+            created = note_path is not None
+        finally:
+            self._unreserve(created)
+        if reporter is not None:
+            reporter.record(time.perf_counter() - start, ok=created)
+        if not created:
+            self.state.finish(node['key'], 'failed', error='노트 생성 실패')
+            return True
+
+        self.state.finish(node['key'], 'done', note=str(note_path))
+        print(f"[{node['depth']}] {concept} -> {Path(note_path).name}")
+        if not extracted:
+            # upsert로 건너뛴 노트는 온톨로지를 다시 추출하지 않으므로 저장된 개념으로 확장
+            record = self.ontology.index.records.get(str(note_path))
+            extracted = list(record.concepts) if record is not None else []
+        self._expand(node, extracted)
+        return True
+
+    def _expand(self, node, concepts):
+        """개념 중 중심성이 높은 개념을 다음 깊이 대기열에 추가"""
+        depth = node['depth'] + 1
+        if not concepts or depth > self.max_depth:
+            return
+        known = self.state.known(concepts)
+        # 이미 대기열에 있는 개념은 언급 횟수만 올려 다음 선택 순위를 높임
+        mentioned = [(c, 0.0) for c in dict.fromkeys(concepts) if title_key(c) in known]
+        candidates = [
+            c for c in dict.fromkeys(concepts)
+            if title_key(c) not in known and title_key(c) != node['key']
+        ]
+        centrality = self.ontology.centrality
+        scored = sorted(((c, centrality.score(c)) for c in candidates), key=lambda item: -item[1])
+        self.state.add(mentioned, depth, parent=node['concept'])
+        self.state.add(scored[:self.branching], depth, parent=node['concept'])
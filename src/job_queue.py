@@ -0,0 +1,272 @@
+"""
+SQLite 기반 노트 생성 작업 큐
+
+각 작업은 title -> content -> ontology -> related -> render -> write 단계를 거치며,
+단계가 끝날 때마다 중간 결과를 체크포인트로 저장한다. 프로세스가 중간에
+종료되어도 다시 실행하면 마지막으로 완료된 단계 다음부터 이어서 처리한다.
+upsert 모드에서는 먼저 plan 단계에서 기존 노트 처리 방법을 정한다 (src/upsert.py).
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+from src.profiling import profiled
+
+STAGES = ('plan', 'title', 'content', 'ontology', 'related', 'render', 'write')
+# 실패한 작업은 RETRY_BASE_SECONDS * 2^(시도 횟수 - 1)초 뒤에 다시 시도 (최대 RETRY_MAX_SECONDS)
+RETRY_BASE_SECONDS = 2.0
+RETRY_MAX_SECONDS = 60.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    input_hash TEXT NOT NULL UNIQUE,
+    input TEXT NOT NULL,
+    template TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    stage TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    result TEXT,
+    not_before REAL NOT NULL DEFAULT 0,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    job_id INTEGER NOT NULL REFERENCES jobs (id),
+    stage TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (job_id, stage)
+);
+"""
+
+def input_hash(content, template):
+    """작업 중복 판별용 해시 (같은 입력/템플릿은 한 번만 큐에 들어감)"""
+    return hashlib.sha256(f"{template}\0{content.strip()}".encode('utf-8')).hexdigest()
+
+class JobQueue:
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        # not_before 열이 없던 이전 버전 데이터베이스
+        columns = {row['name'] for row in self.conn.execute('PRAGMA table_info(jobs)')}
+        if 'not_before' not in columns:
+            self.conn.execute('ALTER TABLE jobs ADD COLUMN not_before REAL NOT NULL DEFAULT 0')
+
+    def close(self):
+        self.conn.close()
+
+    def enqueue(self, items, template_name='concept.md'):
+        """(내용, 템플릿) 목록을 큐에 추가하고 새로 추가된 작업 수 반환"""
+        now = time.time()
+        rows = []
+        for content, template in items:
+            template = template or template_name
+            rows.append((input_hash(content, template), content.strip(), template, now))
+        with self._lock:
+            before = self.conn.total_changes
+            self.conn.execute('BEGIN')
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO jobs (input_hash, input, template, updated) VALUES (?, ?, ?, ?)',
+                rows
+            )
+            self.conn.execute('COMMIT')
+            return self.conn.total_changes - before
+
+    def recover(self):
+        """비정상 종료로 'running'에 남은 작업을 다시 대기 상태로 돌림"""
+        with self._lock:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = 'pending', updated = ? WHERE status = 'running'",
+                (time.time(),)
+            )
+            return cursor.rowcount
+
+    def retry_failed(self):
+        """실패한 작업을 다시 대기 상태로 돌림 (완료된 단계는 유지)"""
+        with self._lock:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = 'pending', attempts = 0, error = NULL, not_before = 0, updated = ? "
+                "WHERE status = 'failed'",
+                (time.time(),)
+            )
+            return cursor.rowcount
+
+    def claim(self):
+        """재시도 대기 시간이 지난 대기 작업 하나를 'running'으로 표시하고 반환 (없으면 None)"""
+        with self._lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            row = self.conn.execute(
+                "SELECT * FROM jobs WHERE status = 'pending' AND not_before <= ? ORDER BY id LIMIT 1",
+                (time.time(),)
+            ).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, updated = ? WHERE id = ?",
+                    (time.time(), row['id'])
+                )
+            self.conn.execute('COMMIT')
+            return dict(row) if row is not None else None
+
+    def next_retry(self):
+        """재시도 대기 중인 작업이 가장 먼저 다시 시도될 시각 (대기 작업이 없으면 None)"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT MIN(not_before) AS at FROM jobs WHERE status = 'pending'"
+            ).fetchone()
+        return row['at']
+
+    def load_checkpoints(self, job_id):
+        """작업의 완료된 단계별 결과"""
+        with self._lock:
+            rows = self.conn.execute(
+                'SELECT stage, payload FROM checkpoints WHERE job_id = ?', (job_id,)
+            ).fetchall()
+        return {row['stage']: json.loads(row['payload']) for row in rows}
+
+    def checkpoint(self, job_id, stage, payload):
+        """단계 결과 저장 (같은 단계를 다시 저장하면 덮어씀)"""
+        with self._lock:
+            self.conn.execute('BEGIN')
+            self.conn.execute(
+                'INSERT OR REPLACE INTO checkpoints (job_id, stage, payload) VALUES (?, ?, ?)',
+                (job_id, stage, json.dumps(payload, ensure_ascii=False))
+            )
+            self.conn.execute(
+                'UPDATE jobs SET stage = ?, updated = ? WHERE id = ?',
+                (stage, time.time(), job_id)
+            )
+            self.conn.execute('COMMIT')
+
+    def complete(self, job_id, result):
+        with self._lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, error = NULL, updated = ? WHERE id = ?",
+                (result, time.time(), job_id)
+            )
+
+    def fail(self, job_id, error, max_attempts=3):
+        """실패 기록. 재시도 횟수가 남아 있으면 지수 백오프 후 다시 시도하도록 대기 상태로 돌림"""
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts < ? THEN 'pending' ELSE 'failed' END, "
+                "not_before = ? + MIN(?, ? * (1 << (attempts - 1))), error = ?, updated = ? WHERE id = ?",
+                (max_attempts, now, RETRY_MAX_SECONDS, RETRY_BASE_SECONDS, error, now, job_id)
+            )
+
+    def counts(self):
+        """상태별 작업 수"""
+        with self._lock:
+            rows = self.conn.execute('SELECT status, COUNT(*) AS n FROM jobs GROUP BY status').fetchall()
+        return {row['status']: row['n'] for row in rows}
+
+class JobRunner:
+    """작업 큐의 대기 작업을 ObsidianOntology 단계 메서드로 처리"""
+    def __init__(self, ontology, queue, workers=4, max_attempts=3, upsert=False):
+        self.ontology = ontology
+        self.queue = queue
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.upsert = upsert
+
+    @profiled('job_queue', cpu=False)
+    def run(self, reporter=None):
+        """대기 작업이 없을 때까지 처리"""
+        recovered = self.queue.recover()
+        if recovered:
+            print(f"중단된 작업 {recovered}개를 이어서 처리합니다.")
+        # 관련 노트 조회와 기존 노트 확인용 인덱스는 배치 시작 시 한 번만 갱신 (이후 생성한 노트는 update_path로 반영)
+        self.ontology.warm_up()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(self._work, reporter) for _ in range(self.workers)]
+            # 워커 자체의 오류(큐 데이터베이스 오류 등)를 삼키지 않고 호출자에게 전달
+            for future in futures:
+                future.result()
+        return self.queue.counts()
+
+    def _work(self, reporter):
+        while True:
+            job = self.queue.claim()
+            if job is None:
+                # 재시도 대기 중인 작업이 있으면 다시 시도할 수 있을 때까지 기다림
+                retry_at = self.queue.next_retry()
+                if retry_at is None:
+                    return
+                time.sleep(min(max(retry_at - time.time(), 0.0), RETRY_MAX_SECONDS))
+                continue
+            start = time.perf_counter()
+            try:
+                note_path = self.process(job)
+            except Exception as e:
+                print(f"작업 {job['id']} 오류: {e}")
+                self.queue.fail(job['id'], str(e), self.max_attempts)
+                ok = False
+            else:
+                self.queue.complete(job['id'], note_path)
+                ok = True
+            if reporter is not None:
+                reporter.record(time.perf_counter() - start, ok=ok)
+
+    def process(self, job):
+        """체크포인트가 없는 단계만 실행하고 노트 경로 반환
+
+        upsert 모드에서는 처리 방법(plan)도 체크포인트로 남겨, 재개해도 같은 노트에 같은 방식으로 쓴다.
+        merge는 기존 노트의 본문을 두고 메타데이터만 합치고, regenerate는 기존 노트 파일에 다시 생성한다.
+        """
+        from src.ontology import PROMPT_VERSION
+        from src.upsert import plan_upsert
+        from src.api.scheduler import priority, INCREMENTAL
+
+        ontology = self.ontology
+        state = self.queue.load_checkpoints(job['id'])
+
+        def run_stage(stage, func):
+            if stage not in state:
+                state[stage] = func()
+                self.queue.checkpoint(job['id'], stage, state[stage])
+            return state[stage]
+
+        def make_plan():
+            plan = plan_upsert(ontology.index, job['input'], job['template'], PROMPT_VERSION)
+            path = str(plan.record.path) if plan.record is not None else None
+            return {'action': plan.action, 'path': path, 'title': plan.record.title if plan.record is not None else None}
+
+        source = {'source_hash': input_hash(job['input'], job['template']), 'prompt_version': PROMPT_VERSION}
+        plan = run_stage('plan', make_plan) if self.upsert else {'action': 'create', 'path': None, 'title': None}
+        if plan['action'] in ('skip', 'conflict'):
+            # 같은 입력/프롬프트 버전으로 이미 생성된 노트가 있으면 API를 호출하지 않음
+            return plan['path']
+        # 기존 노트 갱신(merge, regenerate)은 일괄 생성보다 먼저, GUI 요청보다는 나중에 실행
+        with priority(INCREMENTAL) if plan['action'] in ('merge', 'regenerate') else nullcontext():
+            return self._run_stages(job, plan, source, run_stage)
+
+    def _run_stages(self, job, plan, source, run_stage):
+        ontology = self.ontology
+        if plan['action'] == 'merge':
+            # 직접 작성한 노트: 본문은 두고 개념과 입력 해시만 frontmatter에 합침
+            extracted = run_stage('ontology', lambda: ontology._extract_ontology(job['input'], strict=True))
+            return run_stage('write', lambda: str(ontology._merge_metadata(plan['path'], extracted, source['source_hash'])))
+
+        if plan['action'] == 'regenerate':
+            title = plan['title']
+        else:
+            title = run_stage('title', lambda: ontology._extract_title(job['input'], strict=True))
+        content = run_stage('content', lambda: ontology._generate_content(title, job['input'], strict=True))
+        extracted = run_stage('ontology', lambda: ontology._extract_ontology(content, strict=True))
+        # process_new_note와 같은 관련 노트 섹션이 들어가도록 같은 조회 사용 (볼트 기준 상대 경로)
+        related = run_stage('related', lambda: ontology._related_notes(extracted))
+        note = run_stage('render', lambda: ontology._render_note(title, content, extracted, job['template'],
+                                                                 related_notes=related))
+        # 같은 제목(또는 다시 생성할 기존 파일)에 덮어쓰므로 재시도해도 결과가 같음
+        return run_stage('write', lambda: str(ontology._write_note(title, note, extracted, source, plan['path'])))
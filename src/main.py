@@ -1,15 +1,25 @@
 """
 Obsidian Note Automation GUI Application
+
+    python -m src.main
 """
 import sys
+from pathlib import Path
+
+if not __package__:
+    # Run as a script (python src/main.py): import through the same src.* root as
+    # the rest of the project so usage_tracker/llm_scheduler stay single instances
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QTextEdit, QComboBox, QLabel, QFileDialog, QMessageBox
 )
 from PyQt6.QtCore import Qt
-from api.gemini import GeminiAPI
-from obsidian.note import ObsidianNote
-from utils.config import Config
+from src.api.gemini import GeminiAPI
+from src.obsidian.note import ObsidianNote
+from src.utils.config import Config
+from src.workers import AsyncLoopThread
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -26,6 +36,10 @@ class MainWindow(QMainWindow):
             QMessageBox.critical(self, "Configuration Error", str(e))
             sys.exit(1)
 
+        # Coroutine API calls run on a background event loop, never on the UI thread
+        self.async_runner = AsyncLoopThread()
+        self.pending_jobs = 0
+
         # Create main widget and layout
         main_widget = QWidget()
         self.setCentralWidget(main_widget)
@@ -62,6 +76,7 @@ class MainWindow(QMainWindow):
         # Process button
         process_btn = QPushButton("처리")
         process_btn.clicked.connect(self._process_text)
+        self.status_label = QLabel("준비")
         
         # Save button
         save_btn = QPushButton("저장")
@@ -70,6 +85,7 @@ class MainWindow(QMainWindow):
         action_layout.addWidget(self.action_type)
         action_layout.addWidget(process_btn)
         action_layout.addWidget(save_btn)
+        action_layout.addWidget(self.status_label)
         
         layout.addLayout(action_layout)
 
@@ -82,29 +98,46 @@ class MainWindow(QMainWindow):
         layout.addWidget(output_label)
         layout.addWidget(self.output_text)
 
-    async def _process_text(self):
-        """Process the input text based on selected action"""
+    def _process_text(self):
+        """Queue the input text for processing based on selected action"""
         input_text = self.input_text.toPlainText()
         if not input_text:
             QMessageBox.warning(self, "입력 오류", "처리할 텍스트를 입력해주세요.")
             return
 
         action = self.action_type.currentText()
-        try:
-            if action == "텍스트 요약":
-                result = await self.gemini.summarize(input_text)
-            elif action == "개념 설명":
-                result = await self.gemini.explain_concept(input_text)
-            elif action == "질문 생성":
-                result = await self.gemini.generate_questions(input_text)
-            elif action == "키워드 추출":
-                result = await self.gemini.extract_keywords(input_text)
-            else:  # 아이디어 확장
-                result = await self.gemini.expand_idea(input_text)
-
-            self.output_text.setText(result)
-        except Exception as e:
-            QMessageBox.critical(self, "처리 오류", f"텍스트 처리 중 오류가 발생했습니다: {str(e)}")
+        if action == "텍스트 요약":
+            coro = self.gemini.summarize(input_text)
+        elif action == "개념 설명":
+            coro = self.gemini.explain_concept(input_text)
+        elif action == "질문 생성":
+            coro = self.gemini.generate_questions(input_text)
+        elif action == "키워드 추출":
+            coro = self.gemini.extract_keywords(input_text)
+        else:  # 아이디어 확장
+            coro = self.gemini.expand_idea(input_text)
+
+        self.pending_jobs += 1
+        self._update_status(f"{action} 처리 중...")
+        self.async_runner.submit(coro, on_finished=self._on_process_finished, on_error=self._on_process_error)
+
+    def _on_process_finished(self, result):
+        """Show the result of a finished processing job"""
+        self.pending_jobs -= 1
+        self.output_text.setText(result)
+        self._update_status("완료")
+
+    def _on_process_error(self, message):
+        """Report a failed processing job"""
+        self.pending_jobs -= 1
+        self._update_status("오류")
+        QMessageBox.critical(self, "처리 오류", f"텍스트 처리 중 오류가 발생했습니다: {message}")
+
+    def _update_status(self, message):
+        """Update the status label with the number of queued jobs"""
+        if self.pending_jobs:
+            message = f"{message} (대기 중인 작업: {self.pending_jobs})"
+        self.status_label.setText(message)
 
     def _save_to_obsidian(self):
         """Save the processed text to an Obsidian note"""
@@ -124,18 +157,30 @@ class MainWindow(QMainWindow):
                 'source': self.input_text.toPlainText()[:100] + "..."  # First 100 chars of source
             }
             
-            # Create the note
-            file_path = self.obsidian.create_note(title, output_text, metadata)
-            
-            QMessageBox.information(self, "저장 완료", f"노트가 성공적으로 저장되었습니다:\n{file_path}")
+            # Write the note on the background loop so the UI never waits on disk
+            self.async_runner.submit(
+                self.obsidian.create_note_async(title, output_text, metadata),
+                on_finished=self._on_note_saved,
+                on_error=self._on_note_save_error
+            )
         except Exception as e:
             QMessageBox.critical(self, "저장 오류", f"노트 저장 중 오류가 발생했습니다: {str(e)}")
 
+    def _on_note_saved(self, file_path):
+        """Confirm a saved note"""
+        QMessageBox.information(self, "저장 완료", f"노트가 성공적으로 저장되었습니다:\n{file_path}")
+
+    def _on_note_save_error(self, message):
+        """Report a failed note save"""
+        QMessageBox.critical(self, "저장 오류", f"노트 저장 중 오류가 발생했습니다: {message}")
+
 def main():
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
-    sys.exit(app.exec())
+    exit_code = app.exec()
+    window.async_runner.stop()
+    sys.exit(exit_code)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,402 @@
+"""
+볼트 노트 메타데이터 인덱스
+
+노트마다 frontmatter.Post 전체(본문 + 메타데이터 dict)를 들고 있지 않고,
+검색에 필요한 필드만 __slots__ 레코드에 담는다. 개념/태그 문자열은 intern하여
+같은 문자열을 노트 간에 공유하고, 본문은 필요할 때 파일에서 다시 읽는다.
+프롬프트에 넣을 짧은 발췌(snippet)는 파싱할 때 미리 만들어 캐시에 함께 저장한다.
+
+캐시는 볼트 안(.ontology/note_index.json)에 있어 다른 사람과 동기화될 수 있으므로
+pickle이 아닌 JSON으로 저장한다. 읽지 못한 노트도 mtime/크기와 함께 기록해 두고
+바뀌기 전까지는 다시 파싱하지 않는다.
+"""
+import heapq
+import json
+import os
+import re
+import sys
+import threading
+import unicodedata
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import frontmatter
+import yaml
+from src.utils.vault_scanner import iter_note_paths, get_state_dir
+from src.tracing import span
+
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+# 캐시 파일 형식이 바뀌면 올려서 기존 캐시를 무시하게 함
+CACHE_VERSION = 4
+# 이전 형식의 캐시 (읽지 않고 지움)
+LEGACY_CACHE_NAME = 'note_index.pickle'
+
+# 변경된 노트가 이 수보다 많을 때만 프로세스 풀로 파싱
+PARALLEL_THRESHOLD = 2000
+
+WIKILINK_PATTERN = re.compile(r'\[\[([^\]|#]+)(?:#[^\]|]*)?(?:\|[^\]]*)?\]\]')
+
+# 노트당 발췌 최대 길이 (문자)
+SNIPPET_CHARS = 300
+
+# 발췌로 우선 사용할 섹션 제목
+SNIPPET_SECTIONS = ('정의', '요약', 'Summary', 'Definition')
+
+def frontmatter_list(value):
+    """frontmatter 값을 문자열 리스트로 정규화 ("a, b" 형태의 문자열 포함)"""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(',') if item.strip()]
+    if isinstance(value, (list, tuple, set)):
+        return [str(item) for item in value if item is not None]
+    return [str(value)]
+
+def normalize_title(title):
+    """제목 비교용 정규화 (유니코드 NFC, 공백 정리)"""
+    return ' '.join(unicodedata.normalize('NFC', str(title)).split())
+
+def title_key(title):
+    """제목/링크 대상 비교 키 (대소문자, 공백/하이픈 차이 무시)"""
+    return normalize_title(title).replace('-', ' ').casefold()
+
+def _interned(values):
+    return tuple(sys.intern(value) for value in values)
+
+def estimate_tokens(text):
+    """프롬프트 토큰 수 추정 (한글은 대략 2자당 1토큰으로 보수적으로 계산)"""
+    return len(text) // 2 + 1
+
+def _clean_snippet(text):
+    text = WIKILINK_PATTERN.sub(lambda match: match.group(1), text)
+    text = ' '.join(text.split())
+    if len(text) > SNIPPET_CHARS:
+        text = text[:SNIPPET_CHARS].rstrip() + '…'
+    return text
+
+def extract_snippet(metadata, body):
+    """frontmatter 요약, 정의 섹션, 첫 문단 순으로 노트 발췌 생성"""
+    summary = metadata.get('summary') or metadata.get('description')
+    if isinstance(summary, str) and summary.strip():
+        return _clean_snippet(summary)
+
+    # 정의/요약 섹션의 첫 문단을 우선, 없으면 본문 첫 문단
+    lead = None
+    heading = None
+    paragraph = []
+    in_code = False
+    for line in body.splitlines() + ['']:
+        stripped = line.strip()
+        if stripped.startswith('```'):
+            in_code = not in_code
+            continue
+        if in_code:
+            continue
+        if stripped.startswith('#') or not stripped:
+            if paragraph:
+                if heading in SNIPPET_SECTIONS:
+                    return _clean_snippet(' '.join(paragraph))
+                if lead is None:
+                    lead = ' '.join(paragraph)
+                paragraph = []
+            if stripped:
+                heading = stripped.lstrip('#').strip()
+            continue
+        paragraph.append(stripped)
+    return _clean_snippet(lead or '')
+
+def split_frontmatter(text):
+    """노트 텍스트를 (메타데이터 dict, 본문)으로 분리"""
+    if text.startswith('---'):
+        end = text.find('\n---', 3)
+        if end != -1:
+            metadata = yaml.load(text[3:end], Loader=_YamlLoader)
+            body_start = text.find('\n', end + 4)
+            body = text[body_start + 1:] if body_start != -1 else ''
+            return (metadata if isinstance(metadata, dict) else {}), body
+    return {}, text
+
+class NoteRecord:
+    """노트 하나의 검색용 메타데이터"""
+    __slots__ = ('file', 'title', 'aliases', 'concepts', 'tags', 'links', 'snippet',
+                 'source_hash', 'prompt_version', 'mtime', 'size')
+
+    def __init__(self, file, title, aliases, concepts, tags, links, snippet,
+                 source_hash, prompt_version, mtime, size):
+        # Path 객체 대신 문자열로 보관 (레코드당 메모리 절약)
+        self.file = file
+        self.title = title
+        self.aliases = aliases
+        self.concepts = concepts
+        self.tags = tags
+        self.links = links
+        self.snippet = snippet
+        # 이 도구가 생성한 노트의 입력 해시/프롬프트 버전 (직접 작성한 노트는 None)
+        self.source_hash = source_hash
+        self.prompt_version = prompt_version
+        self.mtime = mtime
+        self.size = size
+
+    @property
+    def path(self):
+        return Path(self.file)
+
+    def load_post(self):
+        """frontmatter.Post 전체를 파일에서 읽음 (캐시하지 않음)"""
+        with open(self.file, 'r', encoding='utf-8') as f:
+            return frontmatter.load(f)
+
+    def load_body(self):
+        """노트 본문을 파일에서 읽음 (캐시하지 않음)"""
+        with open(self.file, 'r', encoding='utf-8') as f:
+            return split_frontmatter(f.read())[1]
+
+    def to_tuple(self):
+        return (self.file, self.title, self.aliases, self.concepts, self.tags, self.links,
+                self.snippet, self.source_hash, self.prompt_version, self.mtime, self.size)
+
+    @classmethod
+    def from_tuple(cls, values):
+        file, title, aliases, concepts, tags, links, snippet, source_hash, prompt_version, mtime, size = values
+        return cls(file, sys.intern(title), _interned(aliases), _interned(concepts),
+                   _interned(tags), _interned(links), snippet, source_hash, prompt_version, mtime, size)
+
+def parse_note(path, stat=None):
+    """노트 파일을 읽어 레코드 튜플 반환 (프로세스 풀 워커에서도 사용)"""
+    stat = stat or os.stat(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        metadata, body = split_frontmatter(f.read())
+    return record_tuple(path, metadata, body, stat)
+
+def record_tuple(path, metadata, body, stat):
+    """이미 읽어 분리한 frontmatter와 본문으로 레코드 튜플 생성"""
+    title = str(metadata.get('title') or Path(path).stem)
+    source_hash = metadata.get('source_hash')
+    prompt_version = metadata.get('prompt_version')
+    links = list(dict.fromkeys(match.strip() for match in WIKILINK_PATTERN.findall(body)))
+    return (
+        str(path), title,
+        frontmatter_list(metadata.get('aliases')),
+        frontmatter_list(metadata.get('concepts')),
+        frontmatter_list(metadata.get('tags')),
+        links, extract_snippet(metadata, body),
+        str(source_hash) if source_hash else None,
+        str(prompt_version) if prompt_version is not None else None,
+        stat.st_mtime_ns, stat.st_size,
+    )
+
+def _parse_note_safe(path):
+    try:
+        return parse_note(path)
+    except Exception as e:
+        print(f"Error processing {path}: {e}")
+        return None
+
+class NoteIndex:
+    def __init__(self, vault_path, workers=None, use_cache=True):
+        self.vault_path = Path(vault_path)
+        self.workers = workers
+        self.cache_path = get_state_dir(self.vault_path) / 'note_index.json' if use_cache else None
+        self.records = {}
+        # 읽지 못한 노트: 파일 -> (mtime, 크기). 파일이 바뀌기 전까지 다시 읽지 않음
+        self.failed = {}
+        self._by_concept = None
+        self._by_title = None
+        self._by_source = None
+        # 인덱스 내용이 바뀔 때마다 증가 (파생 자료구조가 다시 계산할 필요가 있는지 확인용)
+        self.generation = 0
+        self._lock = threading.RLock()
+        self._loaded = False
+
+    def _load_cache(self):
+        if self.cache_path is None:
+            return
+        legacy_path = self.cache_path.with_name(LEGACY_CACHE_NAME)
+        if legacy_path.exists():
+            try:
+                legacy_path.unlink()
+            except OSError:
+                pass
+        if not self.cache_path.exists():
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if cache.get('version') != CACHE_VERSION:
+                return
+            records = [NoteRecord.from_tuple(row) for row in cache['records']]
+            failed = {file: (mtime, size) for file, mtime, size in cache.get('failed', ())}
+        except Exception as e:
+            print(f"인덱스 캐시를 읽을 수 없습니다: {e}")
+            return
+        for record in records:
+            self.records[record.file] = record
+        self.failed.update(failed)
+
+    def _save_cache(self):
+        if self.cache_path is None:
+            return
+        cache = {
+            'version': CACHE_VERSION,
+            'records': [record.to_tuple() for record in self.records.values()],
+            'failed': [[file, mtime, size] for file, (mtime, size) in self.failed.items()],
+        }
+        tmp_path = self.cache_path.with_name(self.cache_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.cache_path)
+
+    def ensure_loaded(self):
+        """아직 한 번도 읽지 않았으면 refresh (배치 중에는 update_path로 바뀐 노트만 반영)"""
+        if not self._loaded:
+            self.refresh()
+
+    def refresh(self):
+        """변경(mtime/크기)된 노트만 다시 읽어 인덱스 갱신. 변경된 노트 수 반환"""
+        with self._lock, span('vault_scan', purpose='index') as sp:
+            if not self._loaded:
+                self._load_cache()
+                self._loaded = True
+
+            seen = set()
+            changed = []
+            for path in iter_note_paths(self.vault_path):
+                key = str(path)
+                seen.add(key)
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                record = self.records.get(key)
+                if record is not None:
+                    if record.mtime != stat.st_mtime_ns or record.size != stat.st_size:
+                        changed.append((key, stat))
+                elif self.failed.get(key) != (stat.st_mtime_ns, stat.st_size):
+                    changed.append((key, stat))
+
+            removed = [key for key in self.records if key not in seen]
+            for key in removed:
+                del self.records[key]
+            for key in [key for key in self.failed if key not in seen]:
+                del self.failed[key]
+
+            for (key, stat), row in zip(changed, self._parse([key for key, _ in changed])):
+                if row is not None:
+                    self.records[key] = NoteRecord.from_tuple(row)
+                    self.failed.pop(key, None)
+                else:
+                    # 파일이 바뀔 때까지 다시 파싱하지 않도록 기록 (이전 레코드는 제거)
+                    self.records.pop(key, None)
+                    self.failed[key] = (stat.st_mtime_ns, stat.st_size)
+
+            if changed or removed:
+                self._invalidate()
+                self._save_cache()
+            sp.set(files=len(seen), changed=len(changed), removed=len(removed))
+            return len(changed) + len(removed)
+
+    def _parse(self, paths):
+        if len(paths) < PARALLEL_THRESHOLD or self.workers == 0:
+            return [_parse_note_safe(path) for path in paths]
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(_parse_note_safe, paths, chunksize=256))
+
+    def update_path(self, path):
+        """노트 하나를 다시 읽어 반영 (노트를 직접 생성/수정한 직후 사용)"""
+        path = Path(path)
+        with self._lock:
+            key = str(path)
+            if path.exists():
+                row = _parse_note_safe(key)
+                if row is not None:
+                    self.records[key] = NoteRecord.from_tuple(row)
+                    self.failed.pop(key, None)
+            else:
+                self.records.pop(key, None)
+                self.failed.pop(key, None)
+            self._invalidate()
+
+    def _invalidate(self):
+        self.generation += 1
+        self._by_concept = None
+        self._by_title = None
+        self._by_source = None
+
+    def _concept_index(self):
+        with self._lock:
+            if self._by_concept is None:
+                by_concept = defaultdict(list)
+                for record in self.records.values():
+                    for concept in record.concepts:
+                        by_concept[concept].append(record)
+                self._by_concept = dict(by_concept)
+            return self._by_concept
+
+    def _title_index(self):
+        with self._lock:
+            if self._by_title is None:
+                by_title = {}
+                for record in self.records.values():
+                    for name in (record.title, Path(record.file).stem, *record.aliases):
+                        by_title.setdefault(title_key(name), record)
+                self._by_title = by_title
+            return self._by_title
+
+    def _source_index(self):
+        with self._lock:
+            if self._by_source is None:
+                self._by_source = {
+                    record.source_hash: record for record in self.records.values() if record.source_hash
+                }
+            return self._by_source
+
+    def find_by_concepts(self, concepts):
+        """주어진 개념 중 하나라도 가진 노트 레코드 (경로 순)"""
+        by_concept = self._concept_index()
+        found = {}
+        for concept in concepts:
+            for record in by_concept.get(concept, ()):
+                found[record.file] = record
+        return [found[key] for key in sorted(found)]
+
+    def notes_with_concept(self, concept):
+        """개념 하나를 가진 노트 레코드 목록"""
+        return self._concept_index().get(concept, ())
+
+    def rank_by_concepts(self, concepts, limit=None, exclude=(), score=None):
+        """주어진 개념과 겹치는 개념 수, 그다음 score(레코드)가 높은 순으로 노트 레코드 정렬
+
+        score가 없으면 링크 수를 쓴다. limit가 있으면 전체를 정렬하지 않고 상위 limit개만 고른다.
+        """
+        concepts = set(concepts)
+        by_concept = self._concept_index()
+        found = {}
+        for concept in concepts:
+            for record in by_concept.get(concept, ()):
+                found[record.file] = record
+        for key in exclude:
+            found.pop(key, None)
+        if score is None:
+            score = lambda record: len(record.links)
+        order = lambda record: (-len(concepts.intersection(record.concepts)), -score(record), record.file)
+        if limit is None:
+            return sorted(found.values(), key=order)
+        return heapq.nsmallest(limit, found.values(), key=order)
+
+    def get_by_title(self, title):
+        """제목, 파일명 또는 별칭으로 노트 레코드 조회 (대소문자, 공백/하이픈 차이 무시)"""
+        return self._title_index().get(title_key(title))
+
+    def get_by_source_hash(self, source_hash):
+        """같은 입력으로 생성된 노트 레코드 조회"""
+        return self._source_index().get(source_hash)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(list(self.records.values()))
@@ -7,77 +7,121 @@ import frontmatter
 import yaml
 import re
 from datetime import datetime
+from src.tracing import span
+from src.obsidian.async_io import run_io, write_text_batched
+from src.obsidian.safe_write import update_file, write_note
+
+# 옵시디언이 파일명이나 [[링크]]에 쓸 수 없는 문자
+FORBIDDEN_FILENAME_CHARS = re.compile(r'[\\/:*?"<>|#^\[\]]')
+
+def note_filename(title):
+    """제목으로 만드는 노트 파일명 (공백과 파일명에 쓸 수 없는 문자는 -로 바꿈)"""
+    name = FORBIDDEN_FILENAME_CHARS.sub('-', title.replace(' ', '-'))
+    # 점으로 시작하면 숨김 파일이 되어 볼트 스캔에서 빠짐
+    name = name.lstrip('.').rstrip('. ')
+    return f"{name or '새로운-노트'}.md"
 
 class NoteManager:
     def __init__(self, vault_path):
         self.vault_path = Path(vault_path)
         
-    def create_note(self, title, content, metadata=None):
-        """새로운 노트 생성"""
-        # 파일명 생성 (공백은 -로 변환)
-        filename = f"{title.replace(' ', '-')}.md"
-        filepath = self.vault_path / filename
-        
-        # 기본 메타데이터 설정
-        if metadata is None:
-            metadata = {}
-        
-        metadata.update({
-            'created': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'modified': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        })
-        
-        # frontmatter와 내용을 합쳐서 파일 생성
-        note_content = frontmatter.Post(content, **metadata)
+    def create_note(self, title, content, metadata=None, filepath=None):
+        """새로운 노트 생성
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(frontmatter.dumps(note_content))
+        content가 템플릿처럼 frontmatter로 시작하면 metadata와 합쳐 하나의 frontmatter로 저장한다.
+        filepath를 주면 제목으로 만든 파일명 대신 그 경로에 저장한다 (기존 노트 재생성).
+        """
+        filepath, text = self._prepare_note(title, content, metadata, filepath)
+        with span('write') as sp:
+            write_note(filepath, text)
+            sp.set(bytes=len(text.encode('utf-8')))
             
         return filepath
     
-    def update_note(self, filepath, content=None, metadata=None):
-        """기존 노트 업데이트"""
-        with open(filepath, 'r', encoding='utf-8') as f:
-            post = frontmatter.load(f)
-        
-        if content is not None:
-            post.content = content
+    async def create_note_async(self, title, content, metadata=None, filepath=None):
+        """create_note의 비동기 버전 (쓰기는 I/O 스레드 풀에서 모아서 처리)"""
+        filepath, text = self._prepare_note(title, content, metadata, filepath)
+        with span('write', mode='async') as sp:
+            await write_text_batched(filepath, text)
+            sp.set(bytes=len(text.encode('utf-8')))
+        return filepath
+    
+    def _prepare_note(self, title, content, metadata=None, filepath=None):
+        """저장할 경로와 frontmatter를 포함한 노트 텍스트 반환"""
+        # 파일명 생성 (공백과 경로 구분자 등은 -로 변환)
+        if filepath is None:
+            filepath = self.vault_path / note_filename(title)
         
+        # 기본 메타데이터 설정
+        try:
+            note_content = frontmatter.loads(content)
+        except yaml.YAMLError:
+            # 제목에 콜론이 들어가는 등 템플릿 frontmatter가 YAML로 읽히지 않으면 본문으로 취급
+            note_content = frontmatter.Post(content)
         if metadata is not None:
-            post.metadata.update(metadata)
+            note_content.metadata.update(metadata)
         
-        post.metadata['modified'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        note_content.metadata.setdefault('created', now)
+        note_content.metadata['modified'] = now
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(frontmatter.dumps(post))
+        return filepath, frontmatter.dumps(note_content)
     
-    def add_links(self, source_path, target_titles, bidirectional=True):
-        """노트 간 링크 추가"""
-        with open(source_path, 'r', encoding='utf-8') as f:
-            post = frontmatter.load(f)
-        
-        content = post.content
+    def update_note(self, filepath, content=None, metadata=None):
+        """기존 노트 업데이트
         
-        # 각 타겟에 대해 링크 추가
-        for title in target_titles:
-            if not self._has_link(content, title):
-                # 관련 노트 섹션 찾기 또는 생성
-                if '## 관련 노트' not in content:
-                    content += '\n\n## 관련 노트\n'
-                
-                # 링크 추가
-                content += f'- [[{title}]]\n'
+        읽은 뒤 다른 프로세스가 노트를 바꿨으면 최신 내용에 변경을 다시 적용한다.
+        """
+        def apply(text):
+            post = frontmatter.loads(text)
+            
+            if content is not None:
+                post.content = content
+            
+            if metadata is not None:
+                post.metadata.update(metadata)
+            
+            post.metadata['modified'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            return frontmatter.dumps(post)
         
-        post.content = content
+        update_file(filepath, apply)
+    
+    async def update_note_async(self, filepath, content=None, metadata=None):
+        """update_note를 I/O 스레드 풀에서 실행"""
+        await run_io(self.update_note, filepath, content, metadata)
+    
+    async def add_links_async(self, source_path, target_titles, bidirectional=True):
+        """add_links를 I/O 스레드 풀에서 실행"""
+        await run_io(self.add_links, source_path, target_titles, bidirectional)
+    
+    def add_links(self, source_path, target_titles, bidirectional=True):
+        """노트 간 링크 추가"""
+        def apply(text):
+            post = frontmatter.loads(text)
+            content = post.content
+            
+            # 각 타겟에 대해 링크 추가
+            for title in target_titles:
+                if not self._has_link(content, title):
+                    # 관련 노트 섹션 찾기 또는 생성
+                    if '## 관련 노트' not in content:
+                        content += '\n\n## 관련 노트\n'
+                    
+                    # 링크 추가
+                    content += f'- [[{title}]]\n'
+            
+            if content == post.content:
+                return None
+            post.content = content
+            return frontmatter.dumps(post)
         
-        # 파일 저장
-        with open(source_path, 'w', encoding='utf-8') as f:
-            f.write(frontmatter.dumps(post))
+        # 파일 저장 (이미 모든 링크가 있으면 쓰지 않음)
+        update_file(source_path, apply)
         
         # 양방향 링크 생성
         if bidirectional:
             for title in target_titles:
-                target_path = self.vault_path / f"{title.replace(' ', '-')}.md"
+                target_path = self.vault_path / note_filename(title)
                 if target_path.exists():
                     self._add_backlink(target_path, Path(source_path).stem)
     
@@ -88,20 +132,18 @@ class NoteManager:
     
     def _add_backlink(self, target_path, source_title):
         """역방향 링크 추가"""
-        with open(target_path, 'r', encoding='utf-8') as f:
-            post = frontmatter.load(f)
-        
-        content = post.content
-        
-        if not self._has_link(content, source_title):
+        def apply(text):
+            post = frontmatter.loads(text)
+            content = post.content
+            
+            if self._has_link(content, source_title):
+                return None
             if '## 관련 노트' not in content:
                 content += '\n\n## 관련 노트\n'
-            content += f'- [[{source_title}]]\n'
-        
-        post.content = content
+            post.content = content + f'- [[{source_title}]]\n'
+            return frontmatter.dumps(post)
         
-        with open(target_path, 'w', encoding='utf-8') as f:
-            f.write(frontmatter.dumps(post))
+        update_file(target_path, apply)
     
     def create_note_from_ontology(self, title, content, ontology):
         """온톨로지 정보를 포함한 새 노트 생성"""
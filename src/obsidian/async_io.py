@@ -0,0 +1,114 @@
+"""
+Async file I/O helpers for note operations
+
+Blocking reads and writes are offloaded to one bounded thread pool so an
+asyncio event loop driving LLM calls never waits on the disk. Small note
+writes issued close together are coalesced into a single executor job.
+"""
+import asyncio
+import functools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from .safe_write import write_note
+
+MAX_IO_WORKERS = 8
+
+# Writes are flushed when this many files are pending or after FLUSH_DELAY seconds
+MAX_BATCH = 32
+FLUSH_DELAY = 0.002
+
+_executor = None
+_executor_lock = threading.Lock()
+_batchers = weakref.WeakKeyDictionary()
+
+def io_executor() -> ThreadPoolExecutor:
+    """Shared executor for note file I/O"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_IO_WORKERS, thread_name_prefix='note-io')
+        return _executor
+
+async def run_io(func, *args, **kwargs):
+    """Run a blocking function on the I/O executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(io_executor(), functools.partial(func, *args, **kwargs))
+
+def _write_batch(items):
+    errors = {}
+    for path, text in items:
+        try:
+            write_note(path, text)
+        except Exception as e:
+            errors[path] = e
+    return errors
+
+class WriteBatcher:
+    """Coalesce note writes issued on one event loop into batched executor jobs
+
+    Writes to the same path before a flush are merged; the last text wins and
+    every caller is resumed once it is on disk.
+    """
+    def __init__(self, loop, max_batch=MAX_BATCH, delay=FLUSH_DELAY, writer=_write_batch):
+        self.loop = loop
+        self.max_batch = max_batch
+        self.delay = delay
+        self.writer = writer
+        self._pending = {}
+        self._handle = None
+
+    async def write(self, path, text: str) -> Path:
+        future = self.loop.create_future()
+        key = str(path)
+        entry = self._pending.get(key)
+        if entry is None:
+            self._pending[key] = [text, [future]]
+        else:
+            entry[0] = text
+            entry[1].append(future)
+
+        if len(self._pending) >= self.max_batch:
+            self.flush()
+        elif self._handle is None:
+            self._handle = self.loop.call_later(self.delay, self.flush)
+        return await future
+
+    def flush(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        items = [(path, entry[0]) for path, entry in batch.items()]
+        job = self.loop.run_in_executor(io_executor(), self.writer, items)
+        job.add_done_callback(functools.partial(self._resolve, batch))
+
+    @staticmethod
+    def _resolve(batch, job):
+        try:
+            errors = job.result()
+        except Exception as e:
+            errors = {path: e for path in batch}
+        for path, (_, waiters) in batch.items():
+            for waiter in waiters:
+                if waiter.done():
+                    continue
+                if path in errors:
+                    waiter.set_exception(errors[path])
+                else:
+                    waiter.set_result(Path(path))
+
+def get_batcher() -> WriteBatcher:
+    """Write batcher for the running event loop"""
+    loop = asyncio.get_running_loop()
+    batcher = _batchers.get(loop)
+    if batcher is None:
+        batcher = _batchers[loop] = WriteBatcher(loop)
+    return batcher
+
+async def write_text_batched(path, text: str) -> Path:
+    """Write text to path through the running loop's batcher"""
+    return await get_batcher().write(path, text)
@@ -6,6 +6,8 @@ from datetime import datetime
 import frontmatter
 from pathlib import Path
 from typing import Dict, List, Optional
+from .async_io import run_io, write_text_batched
+from .safe_write import update_file, write_note
 
 class ObsidianNote:
     def __init__(self, vault_path: str):
@@ -17,6 +19,21 @@ class ObsidianNote:
         """
         Create a new note with the given title and content
         """
+        file_path, text = self._build_note(title, content, metadata)
+        write_note(file_path, text)
+        return file_path
+
+    async def create_note_async(self, title: str, content: str, metadata: Optional[Dict] = None) -> Path:
+        """
+        Create a note without blocking the event loop (writes are batched)
+        """
+        file_path, text = self._build_note(title, content, metadata)
+        return await write_text_batched(file_path, text)
+
+    def _build_note(self, title: str, content: str, metadata: Optional[Dict] = None):
+        """
+        Return the file path and serialized text for a new note
+        """
         # Sanitize title for filename
         filename = title.replace(" ", "_").lower() + ".md"
         file_path = self.vault_path / filename
@@ -30,11 +47,7 @@ class ObsidianNote:
         note.metadata['created'] = datetime.now().isoformat()
         note.metadata['title'] = title
 
-        # Write to file
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(frontmatter.dumps(note))
-
-        return file_path
+        return file_path, frontmatter.dumps(note)
 
     def update_note(self, file_path: Path, content: str, append: bool = True) -> None:
         """
@@ -43,22 +56,27 @@ class ObsidianNote:
         if not file_path.exists():
             raise FileNotFoundError(f"Note not found: {file_path}")
 
-        # Read existing note
-        with open(file_path, 'r', encoding='utf-8') as f:
-            note = frontmatter.load(f)
+        def apply(text: str) -> str:
+            note = frontmatter.loads(text)
+
+            # Update content
+            if append:
+                note.content += f"\n\n{content}"
+            else:
+                note.content = content
 
-        # Update content
-        if append:
-            note.content += f"\n\n{content}"
-        else:
-            note.content = content
+            # Update modified timestamp
+            note.metadata['modified'] = datetime.now().isoformat()
+            return frontmatter.dumps(note)
 
-        # Update modified timestamp
-        note.metadata['modified'] = datetime.now().isoformat()
+        # Re-applied to the latest text if the note changed while we were editing it
+        update_file(file_path, apply)
 
-        # Write back to file
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(frontmatter.dumps(note))
+    async def update_note_async(self, file_path: Path, content: str, append: bool = True) -> None:
+        """
+        Update an existing note on the I/O executor
+        """
+        await run_io(self.update_note, file_path, content, append)
 
     def find_related_notes(self, keywords: List[str]) -> List[Path]:
         """
@@ -72,6 +90,12 @@ class ObsidianNote:
                     related_notes.append(file_path)
         return related_notes
 
+    async def find_related_notes_async(self, keywords: List[str]) -> List[Path]:
+        """
+        Find related notes on the I/O executor
+        """
+        return await run_io(self.find_related_notes, keywords)
+
     def create_link(self, title: str) -> str:
         """
         Create an Obsidian link format
@@ -0,0 +1,180 @@
+"""
+Safe concurrent note writes
+
+Several writers (GUI, batch jobs, watchers, Obsidian itself) may touch the
+same note. Writes go through three layers:
+
+- an advisory per-file lock (fcntl on POSIX, msvcrt on Windows) held only
+  around the final compare-and-write, so cooperating processes and threads
+  never interleave on one note;
+- optimistic concurrency: read-modify-write records a content hash when it
+  reads, and the write only happens if the file still has that hash. On a
+  conflict the modification is re-applied to the fresh content;
+- atomic replacement: text is written to a temporary file in the same
+  directory and moved over the note, so readers never see a partial file.
+
+Lock files live in the system temp directory rather than in the vault.
+"""
+import hashlib
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+LOCK_DIR = Path(tempfile.gettempdir()) / 'obsidian-ontology-locks'
+LOCK_TIMEOUT = 10.0
+MAX_RETRIES = 3
+
+def _current_umask() -> int:
+    # os.umask can only be read by setting it; do it once at import time
+    # rather than per write, since the umask is shared by all threads
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+UMASK = _current_umask()
+
+class LockTimeout(TimeoutError):
+    """The note lock could not be acquired in time"""
+
+class WriteConflict(RuntimeError):
+    """The note changed between read and write"""
+
+def _lock_path(path) -> Path:
+    # Symlinks to the same note share one lock
+    key = hashlib.sha1(os.path.realpath(str(path)).encode('utf-8')).hexdigest()
+    return LOCK_DIR / f"{key}.lock"
+
+def _try_lock(fd) -> bool:
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+def _unlock(fd) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+@contextmanager
+def file_lock(path, timeout: float = LOCK_TIMEOUT):
+    """Hold an exclusive advisory lock for path (across threads and processes)"""
+    LOCK_DIR.mkdir(parents=True, exist_ok=True)
+    fd = os.open(str(_lock_path(path)), os.O_RDWR | os.O_CREAT, 0o666)
+    try:
+        deadline = time.monotonic() + timeout
+        delay = 0.005
+        while not _try_lock(fd):
+            if time.monotonic() >= deadline:
+                raise LockTimeout(f"Timed out waiting for lock on {path}")
+            time.sleep(delay)
+            delay = min(delay * 2, 0.1)
+        try:
+            yield
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
+
+def content_version(text) -> str:
+    """Version token used for optimistic concurrency checks"""
+    if isinstance(text, str):
+        text = text.encode('utf-8')
+    return hashlib.sha1(text).hexdigest()
+
+def read_versioned(path):
+    """Return (text, version); version is None if the file does not exist"""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None, None
+    return data.decode('utf-8'), content_version(data)
+
+def atomic_write(path, text: str) -> None:
+    """Write text to a temporary file and move it over path
+
+    If path is a symlink the target is replaced, so the link is kept.
+    """
+    path = Path(os.path.realpath(str(path)))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix='.tmp', dir=str(path.parent))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+        # mkstemp creates the file as 0600; keep the note's existing permissions,
+        # or use what open() would give a new file under the process umask
+        try:
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+        except FileNotFoundError:
+            os.chmod(tmp_path, 0o666 & ~UMASK)
+        for attempt in range(5):
+            try:
+                os.replace(tmp_path, path)
+                break
+            except PermissionError:
+                # Windows refuses to replace a file another program has open
+                if attempt == 4:
+                    raise
+                time.sleep(0.05 * (attempt + 1))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+def write_if_unchanged(path, text: str, expected_version) -> None:
+    """Write text only if the file still has expected_version (None: must not exist)"""
+    with file_lock(path):
+        _, current = read_versioned(path)
+        if current != expected_version:
+            raise WriteConflict(f"{path} changed since it was read")
+        atomic_write(path, text)
+
+def write_note(path, text: str) -> None:
+    """Replace a note's text under its lock (last writer wins)"""
+    with file_lock(path):
+        atomic_write(path, text)
+
+def update_file(path, transform, retries: int = MAX_RETRIES):
+    """Read-modify-write path with optimistic concurrency
+
+    transform(text) returns the new text, or None to leave the file as is.
+    The transform runs without the lock; if the file changed in the
+    meantime it is re-applied to the new content. After retries
+    conflicts, the last attempt runs entirely under the lock.
+    Returns the text that was written (or None if nothing was written).
+    """
+    for _ in range(retries):
+        text, version = read_versioned(path)
+        if text is None:
+            raise FileNotFoundError(f"Note not found: {path}")
+        new_text = transform(text)
+        if new_text is None or new_text == text:
+            return None
+        try:
+            write_if_unchanged(path, new_text, version)
+            return new_text
+        except WriteConflict:
+            continue
+
+    with file_lock(path):
+        text, _ = read_versioned(path)
+        if text is None:
+            raise FileNotFoundError(f"Note not found: {path}")
+        new_text = transform(text)
+        if new_text is None or new_text == text:
+            return None
+        atomic_write(path, new_text)
+        return new_text
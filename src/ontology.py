@@ -1,15 +1,51 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import frontmatter
 import google.generativeai as genai
 from dotenv import load_dotenv
-import re
 import yaml
 from datetime import datetime
 from src.utils.vault_finder import find_obsidian_vaults
 from src.note_manager import NoteManager
 from src.visualizer import OntologyVisualizer
 from src.template_manager import TemplateManager
+from src.tagger import AutoTagger
+from src.utils.vault_scanner import get_state_dir
+from src.tracing import span, token_counts
+from src.api.llm_client import LLMClient
+from src.api.usage import usage_tracker
+from src.api.scheduler import llm_scheduler, priority, INCREMENTAL
+from src.profiling import profiled
+from src.note_index import NoteIndex
+from src.title_extractor import extract_title
+from src.pipeline import Pipeline, StageError
+from src.ontology_parser import extract_ontology
+from src.upsert import plan_upsert, merge_metadata, source_hash
+from src.query_service import QueryClient, QueryServiceError
+from src.centrality import Centrality, prune_ontology
+
+# 생성 프롬프트를 바꾸면 올려서 upsert 모드에서 기존 노트를 다시 생성하게 함
+PROMPT_VERSION = '1'
+# 노트의 관련 노트 섹션에 넣을 최대 노트 수 (겹치는 개념 수, 볼트 중심성 순)
+RELATED_NOTES_LIMIT = 20
+# 노트 파이프라인 단계를 실행하는 공용 스레드 수 (ingest 작업 4개가 각각 관련 노트 조회와 Mermaid를 동시에 실행)
+STAGE_WORKERS = 8
+
+@profiled('warm_up')
+def warm_up_ontology(ontology):
+    """템플릿 컴파일과 조회 서비스 연결, 서비스가 없으면 볼트 노트 인덱스 로드를 미리 수행
+
+    이 모듈과 test_ontology의 ObsidianOntology가 warm_up 메서드로 함께 쓴다.
+    """
+    for template_name in ontology.template_manager.list_templates():
+        try:
+            ontology.template_manager.get_template(template_name)
+        except Exception as e:
+            print(f"Error processing {template_name}: {e}")
+    ontology.query_client = QueryClient.connect(ontology.vault_path)
+    if ontology.query_client is None:
+        ontology.index.refresh()
 
 class ObsidianOntology:
     def __init__(self, vault_path=None):
@@ -29,14 +65,45 @@ class ObsidianOntology:
         # Gemini API 설정
         genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
         self.model = genai.GenerativeModel('gemini-pro')
+        # 제목, 온톨로지 추출 같은 짧은 호출은 라우트 설정에 따라 빠른 모델 사용 (src/api/routing.py)
+        self.llm = LLMClient(self.model, 'gemini-pro', model_factory=genai.GenerativeModel)
+        
+        # 호출별 사용량을 볼트 상태 디렉토리에 누적 기록
+        if usage_tracker.log_path is None:
+            usage_tracker.configure(get_state_dir(self.vault_path) / 'llm_usage.jsonl')
+        # 공유를 켜면 같은 볼트를 쓰는 GUI와 CLI 배치 프로세스가 LLM 슬롯과 호출 수를 함께 나눠 씀
+        if llm_scheduler.share_enabled and llm_scheduler.shared is None:
+            llm_scheduler.share(get_state_dir(self.vault_path) / 'llm_scheduler.sqlite')
         
         # 매니저 및 도구 초기화
         self.note_manager = NoteManager(vault_path)
         self.visualizer = OntologyVisualizer()
         self.template_manager = TemplateManager(vault_path)
+        self.tagger = AutoTagger()
+        self.index = NoteIndex(vault_path)
+        self.centrality = Centrality(self.index)
+        # 상주 조회 서비스가 실행 중이면 관련 노트 조회를 서비스에 맡김 (warm_up에서 연결)
+        self.query_client = None
+        # 노트마다 스레드 풀을 만들지 않도록 모든 파이프라인이 같은 풀을 사용
+        self.stage_executor = ThreadPoolExecutor(max_workers=STAGE_WORKERS, thread_name_prefix='stage')
+    
+    warm_up = warm_up_ontology
     
-    def _extract_title(self, content):
-        """내용에서 핵심 주제를 추출하여 제목 생성"""
+    def close(self):
+        """파이프라인 스레드 풀 종료 (실행 중인 단계는 끝날 때까지 대기)"""
+        self.stage_executor.shutdown()
+    
+    def _extract_title(self, content, strict=False):
+        """내용에서 핵심 주제를 추출하여 제목 생성
+        
+        짧은 주제어 입력은 로컬 규칙으로 처리하고, 확신할 수 없을 때만 API를 호출한다.
+        strict가 True면 API 오류 시 기본 제목 대신 예외를 발생시킨다.
+        """
+        title, confident = extract_title(content)
+        if confident:
+            with span('title', source='local'):
+                return title
+        
         prompt = f"""
 다음 내용의 핵심 주제를 추출해주세요.
 입력된 단어의 형태를 최대한 유지해주세요.
@@ -51,25 +118,180 @@ class ObsidianOntology:
 {content}
 """
         try:
-            response = self.model.generate_content(prompt)
+            with span('title') as sp:
+                response = self.llm.generate(prompt, caller='title')
+                sp.set(**token_counts(response))
             return response.text.strip()
         except Exception as e:
+            if strict:
+                raise
             print(f"제목 생성 오류: {e}")
             return "새로운 노트"
 
-    def process_new_note(self, content, template_name="concept.md"):
-        """새로운 노트를 생성하고 온톨로지 관계를 추출"""
+    # 단계는 파이프라인 스레드에서 실행되므로 CPU는 단계별로 측정 (process_new_note.<단계>)
+    @profiled('process_new_note', cpu=False)
+    def process_new_note(self, content, template_name="concept.md", progress=None, upsert=False, on_ontology=None):
+        """새로운 노트를 생성하고 온톨로지 관계를 추출
+        
+        progress가 주어지면 각 단계 시작 시 단계 이름으로 호출한다.
+        on_ontology가 주어지면 추출한 온톨로지로 호출한다 (upsert로 건너뛴 경우는 호출하지 않음).
+        upsert가 True면 같은 입력으로 만든 노트나 같은 제목의 노트가 있는지 먼저 확인해
+        건너뛰거나(skip, conflict), 메타데이터만 합치거나(merge), 같은 파일에 다시 생성한다(regenerate).
+        생성된 노트 경로를 반환하며, 실패하면 None을 반환한다.
+        """
+        if progress is None:
+            progress = lambda stage: None
+        if on_ontology is None:
+            on_ontology = lambda ontology: None
+        
         # 공백 제거 후 내용 확인
         content = content.strip()
         if not content:
             print("내용을 입력해주세요.")
-            return
+            return None
             
-        # 제목 자동 생성
-        title = self._extract_title(content)
-        print(f"\n=== '{title}' 노트 처리 중 ===\n")
+        with span('process_new_note'):
+            if upsert:
+                return self._upsert_note(content, template_name, progress, on_ontology)
+            return self._process_new_note(content, template_name, progress, on_ontology)
+    
+    def _upsert_note(self, content, template_name, progress, on_ontology):
+        progress('기존 노트 확인')
+        # 중복 확인은 로컬 인덱스의 source_hash로 하므로 서비스 사용 중에도 인덱스를 올림 (처음 한 번만)
+        plan = plan_upsert(self.index, content, template_name, PROMPT_VERSION, self._extract_title)
+        with span('upsert', action=plan.action):
+            if plan.action == 'skip':
+                print(f"변경 사항이 없어 건너뜁니다: {plan.record.path}")
+                return plan.record.path
+            if plan.action == 'conflict':
+                print(f"같은 제목의 노트가 다른 입력으로 생성되어 있어 건너뜁니다: {plan.record.path}")
+                return plan.record.path
+            # 기존 노트 갱신은 일괄 생성보다 먼저, GUI 요청보다는 나중에 실행
+            if plan.action == 'merge':
+                with priority(INCREMENTAL):
+                    return self._merge_into_note(plan, content, progress, on_ontology)
+        if plan.action == 'regenerate':
+            with priority(INCREMENTAL):
+                return self._process_new_note(content, template_name, progress, on_ontology,
+                                              title=plan.record.title, existing=plan.record)
+        return self._process_new_note(content, template_name, progress, on_ontology, title=plan.title)
+    
+    def _merge_into_note(self, plan, content, progress, on_ontology):
+        progress('온톨로지 추출')
+        ontology = self._extract_ontology(content)
+        on_ontology(ontology)
+        try:
+            return self._merge_metadata(plan.record.path, ontology, plan.source_hash)
+        except Exception as e:
+            print(f"오류 발생: {e}")
+            return None
+    
+    def _merge_metadata(self, path, ontology, source_hash):
+        """직접 작성한 노트는 본문을 두고 개념과 입력 해시만 frontmatter에 합침 (작업 큐와 공용)"""
+        path = Path(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            existing = frontmatter.load(f).metadata
+        metadata = merge_metadata(existing, {
+            'concepts': ontology.get('concepts') or [],
+            'source_hash': source_hash,
+            'prompt_version': PROMPT_VERSION,
+        })
+        self.note_manager.update_note(path, metadata=metadata)
+        self.index.update_path(path)
+        print(f"\n기존 노트에 병합했습니다: {path}\n")
+        return path
+    
+    def _process_new_note(self, content, template_name, progress, on_ontology, title=None, existing=None):
+        """title이 주어지면 제목 추출을 건너뛰고, existing(기존 노트 레코드)이 주어지면 그 파일에 다시 생성"""
+        source = {'source_hash': source_hash(content, template_name), 'prompt_version': PROMPT_VERSION}
+        # 제목 -> 내용 -> 온톨로지는 순서대로, 관련 노트 조회와 Mermaid 생성은 온톨로지가 나오면 동시에 실행
+        # 볼트 인덱스는 배치 시작 시(warm_up) 한 번 갱신하고, 이후에는 저장한 노트만 update_path로 반영
+        pipeline = Pipeline(progress=progress, profile='process_new_note', executor=self.stage_executor)
+        pipeline.add('title', lambda: title or self._extract_title(content), label='제목 추출')
+        pipeline.add('content', lambda title: self._generate_content(title, content),
+                     deps=('title',), label='내용 생성')
+        pipeline.add('ontology', lambda content: self._extract_ontology_stage(content, on_ontology),
+                     deps=('content',), label='온톨로지 추출')
+        pipeline.add('mermaid', self._mermaid_stage, deps=('ontology',))
+        pipeline.add('related', self._related_notes, deps=('ontology',))
+        pipeline.add(
+            'note',
+            lambda title, content, ontology, mermaid, related: self._save_note(
+                title, content, ontology, template_name, mermaid, related, source, existing),
+            deps=('title', 'content', 'ontology', 'mermaid', 'related'), label='노트 저장'
+        )
+        try:
+            return pipeline.run()['note']
+        except StageError as e:
+            print(f"오류 발생: {e.error}")
+            return None
+    
+    def _extract_ontology_stage(self, content, on_ontology):
+        ontology = self._extract_ontology(content)
+        print("추출된 온톨로지:")
+        print(yaml.dump(ontology, allow_unicode=True))
+        on_ontology(ontology)
+        return ontology
+    
+    def _mermaid_stage(self, ontology):
+        with span('mermaid'):
+            # 볼트에서 중심성이 높은 개념 위주로 노드 수 제한 (조회 서비스 사용 중이면 로컬 인덱스가 없어 관계 수로만)
+            if self.query_client is None:
+                self.index.ensure_loaded()
+                score = self.centrality.score
+            else:
+                score = lambda concept: 0.0
+            return self.visualizer.generate_mermaid(prune_ontology(ontology, score))
+    
+    def _related_notes(self, ontology):
+        """온톨로지 개념을 가진 기존 노트의 볼트 기준 상대 경로 (관련성 높은 순)"""
+        concepts = ontology.get('concepts') if isinstance(ontology, dict) else None
+        if not concepts:
+            return []
+        with span('related') as sp:
+            if self.query_client is not None:
+                try:
+                    sp.set(source='service')
+                    return [entry['path'] for entry in self.query_client.related(concepts=concepts, limit=RELATED_NOTES_LIMIT)]
+                except QueryServiceError as e:
+                    print(f"조회 서비스를 사용할 수 없어 로컬 인덱스를 사용합니다: {e}")
+                    self.query_client = None
+                    self.index.refresh()
+            self.index.ensure_loaded()
+            return [
+                str(record.path.relative_to(self.vault_path))
+                for record in self.centrality.rank_by_concepts(concepts, limit=RELATED_NOTES_LIMIT)
+            ]
+    
+    def _save_note(self, title, generated_content, ontology, template_name, mermaid_diagram, related_notes,
+                   source=None, existing=None):
+        note_content = self._render_note(title, generated_content, ontology, template_name,
+                                         mermaid_diagram=mermaid_diagram, related_notes=related_notes)
+        return self._write_note(title, note_content, ontology, source, existing.path if existing is not None else None)
+    
+    def _write_note(self, title, note_content, ontology, source=None, existing_path=None):
+        """렌더링한 노트 저장 (existing_path가 주어지면 그 파일에 다시 생성, 작업 큐와 공용)"""
+        if existing_path is not None:
+            # 다시 생성할 때 사용자가 추가한 태그/별칭과 created는 유지
+            existing_path = Path(existing_path)
+            try:
+                post = frontmatter.loads(note_content)
+                with open(existing_path, 'r', encoding='utf-8') as f:
+                    post.metadata = merge_metadata(frontmatter.load(f).metadata, post.metadata)
+                note_content = frontmatter.dumps(post)
+            except yaml.YAMLError as e:
+                print(f"기존 메타데이터를 합치지 못했습니다: {e}")
+        note_path = self.note_manager.create_note(title, note_content, metadata=self.note_metadata(ontology, source),
+                                                  filepath=existing_path)
+        self.index.update_path(note_path)
+        print(f"\n노트가 생성되었습니다: {note_path}\n")
+        return note_path
+    
+    def _generate_content(self, title, content, strict=False):
+        """Gemini API로 노트 본문 생성
         
-        # Gemini API로 내용 생성
+        strict가 False면 API 오류 시 입력 내용을 그대로 사용한다.
+        """
         prompt = f"""
 {title}에 대해 다음 형식으로 정확하게 설명해주세요:
 
@@ -94,34 +316,34 @@ class ObsidianOntology:
 3. "~적 설" 같은 불필요한 표현은 사용하지 마세요
 4. 각 섹션은 정확히 3가지 항목만 포함해주세요
 """
-        
         try:
-            response = self.model.generate_content(prompt)
-            generated_content = response.text
+            with span('content', title=title) as sp:
+                response = self.llm.generate(prompt, caller='content')
+                sp.set(bytes=len(response.text.encode('utf-8')), **token_counts(response))
+            return response.text
         except Exception as e:
+            if strict:
+                raise
             print(f"Gemini API 오류: {e}")
-            generated_content = content
-        
-        # 온톨로지 추출
-        ontology = self._extract_ontology(generated_content)
-        print("추출된 온톨로지:")
-        print(yaml.dump(ontology, allow_unicode=True))
-        
-        # Mermaid 다이어그램 생성
-        mermaid_diagram = self.visualizer.generate_mermaid(ontology)
-        
-        # 메타데이터 생성
+            return content
+    
+    def note_metadata(self, ontology, source=None):
+        """템플릿과 상관없이 frontmatter에 직접 넣을 값 (이전 템플릿으로도 인덱스가 개념을 읽도록)"""
+        return {**(source or {}), 'concepts': list(ontology.get('concepts') or [])}
+    
+    def _tags(self, content, ontology):
+        text_tags = self.tagger.extract_tags(content)
+        ontology_tags = self.tagger.suggest_tags_from_ontology(ontology)
+        keywords = self.tagger.extract_keywords(content)
+        return self.tagger.combine_tags(text_tags, ontology_tags, keywords)
+    
+    def _render_note(self, title, generated_content, ontology, template_name="concept.md",
+                     mermaid_diagram=None, related_notes=None):
+        """Mermaid 다이어그램, 개념, 관계, 태그를 포함해 노트 본문 렌더링"""
+        if mermaid_diagram is None:
+            mermaid_diagram = self._mermaid_stage(ontology)
         created = modified = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        metadata = {
-            'title': title,
-            'created': created,
-            'modified': modified,
-            'type': 'concept',
-            'concepts': ontology.get('concepts', [])
-        }
-        
-        # 노트 생성
-        try:
+        with span('render', template=template_name) as sp:
             note_content = self.template_manager.render_template(
                 template_name,
                 {
@@ -129,39 +351,29 @@ class ObsidianOntology:
                     'content': generated_content,
                     'mermaid_diagram': mermaid_diagram,
                     'ontology': ontology,
+                    'concepts': ontology.get('concepts') or [],
+                    'relationships': ontology.get('relationships') or [],
+                    'tags': self._tags(generated_content, ontology),
+                    'related_notes': related_notes or [],
                     'created': created,
                     'modified': modified,
                     'type': 'concept'
                 }
             )
-            
-            # 노트 저장
-            note_path = self.note_manager.create_note(title, note_content)
-            print(f"\n노트가 생성되었습니다: {note_path}\n")
-            
-        except Exception as e:
-            print(f"오류 발생: {e}")
+            sp.set(bytes=len(note_content.encode('utf-8')))
+        return note_content
     
-    def _extract_ontology(self, content):
-        """텍스트에서 온톨로지 관계를 추출"""
+    def _extract_ontology(self, content, strict=False):
+        """텍스트에서 온톨로지 관계를 추출
+        
+        JSON 응답을 검증하고 결함은 로컬에서 고치며, 고칠 수 없는 부분만 다시 요청한다.
+        strict가 True면 오류 시 빈 온톨로지 대신 예외를 발생시킨다.
+        """
         prompt = """
 다음 텍스트에서 주요 개념들과 그들 사이의 관계를 추출해주세요.
 리스트나 계층 구조가 있는 경우, 각 항목을 개별 개념으로 추출하고 관계를 명시해주세요.
 예를 들어 "1.1 API 호출 속도"는 "API 호출"의 하위 개념입니다.
 
-YAML 형식으로 반환해주세요:
-
-concepts:  # 텍스트에서 언급된 주요 개념들
-  - concept1
-  - concept2
-  ...
-
-relationships:  # 개념들 간의 관계
-  - source: 개념1  # 관계의 주체
-    target: 개념2  # 관계의 대상
-    type: is_a     # 관계 유형: is_a(종류), part_of(구성요소), used_for(용도), related_to(관련)
-  ...
-
 관계 유형은 다음 중 하나를 사용해주세요:
 - is_a: "A는 B의 한 종류이다" (예: "API 호출 속도는 API 호출의 한 종류이다")
 - part_of: "A는 B의 구성요소이다" (예: "초당 호출 횟수는 API 호출 속도의 구성요소이다")
@@ -172,16 +384,10 @@ relationships:  # 개념들 간의 관계
 {content}
 """
         try:
-            response = self.model.generate_content(prompt.format(content=content))
-            yaml_text = response.text.strip()
-            
-            # YAML 코드 블록이 있다면 제거
-            yaml_text = re.sub(r'^```yaml\s*|```\s*$', '', yaml_text)
-            
-            # YAML 파싱
-            ontology = yaml.safe_load(yaml_text)
-            
-            return ontology
+            with span('ontology') as sp:
+                return extract_ontology(self.llm, prompt.format(content=content), caller='ontology', sp=sp)
         except Exception as e:
+            if strict:
+                raise
             print(f"온톨로지 추출 중 오류 발생: {e}")
             return {'concepts': [], 'relationships': []}
@@ -0,0 +1,245 @@
+"""
+온톨로지 추출 응답의 구조화 파싱
+
+모델에 스키마를 지정한 JSON으로 응답하도록 요청하고, 받은 응답을 검증한다.
+코드 블록, 앞뒤 설명 문장, --- 구분자, 탭, 끝에 붙은 쉼표처럼 흔한 결함은
+로컬에서 고치고, 고칠 수 없는 관계 항목만 모델에 다시 물어본다.
+응답 전체를 해석할 수 없을 때만 그 응답을 JSON으로 고쳐 달라고 요청한다.
+"""
+import ast
+import json
+import re
+import yaml
+from src.tracing import token_counts
+
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+RELATION_TYPES = ('is_a', 'part_of', 'used_for', 'related_to')
+
+# 모델이 자주 쓰는 다른 표현을 허용된 관계 유형으로 변환
+RELATION_ALIASES = {
+    'isa': 'is_a', 'is': 'is_a', 'type_of': 'is_a', 'kind_of': 'is_a', 'subclass_of': 'is_a', 'instance_of': 'is_a',
+    'partof': 'part_of', 'has_part': 'part_of', 'component_of': 'part_of', 'member_of': 'part_of',
+    'usedfor': 'used_for', 'uses': 'used_for', 'used_by': 'used_for', 'applied_to': 'used_for',
+    'related': 'related_to', 'relatedto': 'related_to', 'associated_with': 'related_to',
+    '종류': 'is_a', '구성요소': 'part_of', '용도': 'used_for', '관련': 'related_to',
+}
+
+ONTOLOGY_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'concepts': {'type': 'array', 'items': {'type': 'string'}},
+        'relationships': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'source': {'type': 'string'},
+                    'target': {'type': 'string'},
+                    'type': {'type': 'string', 'enum': list(RELATION_TYPES)},
+                    'description': {'type': 'string'},
+                },
+                'required': ['source', 'target', 'type'],
+            },
+        },
+    },
+    'required': ['concepts', 'relationships'],
+}
+
+JSON_FORMAT_INSTRUCTIONS = """
+설명 문장이나 코드 블록 없이 아래 형식의 JSON 객체 하나로만 응답해주세요:
+
+{"concepts": ["개념1", "개념2"],
+ "relationships": [{"source": "개념1", "target": "개념2", "type": "is_a", "description": "관계 설명"}]}
+
+type은 is_a, part_of, used_for, related_to 중 하나여야 하며 description은 생략할 수 있습니다.
+"""
+
+_REPAIR_PROMPT = """
+다음 응답을 JSON으로 해석할 수 없습니다. 내용은 바꾸지 말고 형식만 고쳐서
+{{"concepts": [...], "relationships": [...]}} 형태의 JSON 객체 하나로만 응답해주세요.
+
+응답:
+{text}
+"""
+
+_RELATIONSHIP_PROMPT = """
+다음 관계 항목들이 형식에 맞지 않습니다. 각 항목을 source, target, type 키를 가진 객체로 고쳐서
+JSON 배열 하나로만 응답해주세요. type은 is_a, part_of, used_for, related_to 중 하나입니다.
+고칠 수 없는 항목은 빼주세요.
+
+개념 목록: {concepts}
+
+관계 항목:
+{items}
+"""
+
+class OntologyParseError(ValueError):
+    """응답을 온톨로지로 해석할 수 없음"""
+
+def supports_json_mode(model_name):
+    """response_mime_type을 지원하는 모델인지 (gemini-pro 1.0은 지원하지 않음)"""
+    return bool(re.match(r'(models/)?gemini-(1\.5|[2-9])', model_name or ''))
+
+def json_generation_config(model_name):
+    """JSON 모드를 지원하는 모델이면 스키마를 지정한 generation_config 반환"""
+    if not supports_json_mode(model_name):
+        return None
+    return {'response_mime_type': 'application/json', 'response_schema': ONTOLOGY_SCHEMA}
+
+def _strip_wrappers(text):
+    """코드 블록, --- 구분자, 앞뒤 설명 문장 제거"""
+    text = re.sub(r'```[a-zA-Z]*', '', text)
+    text = re.sub(r'^\s*---\s*$', '', text, flags=re.MULTILINE)
+    return text.strip()
+
+def _json_span(text, open_char, close_char):
+    start = text.find(open_char)
+    end = text.rfind(close_char)
+    if start == -1 or end <= start:
+        return None
+    return text[start:end + 1]
+
+def _load_lenient(text, open_char='{', close_char='}'):
+    """JSON -> 흔한 결함 수정 후 JSON -> 파이썬 리터럴 -> YAML 순으로 시도"""
+    text = _strip_wrappers(text)
+    candidate = _json_span(text, open_char, close_char)
+    if candidate is not None:
+        try:
+            return json.loads(candidate)
+        except ValueError:
+            pass
+        fixed = candidate.replace('\t', ' ')
+        fixed = fixed.replace('“', '"').replace('”', '"').replace('‘', "'").replace('’', "'")
+        fixed = re.sub(r',\s*([}\]])', r'\1', fixed)
+        fixed = re.sub(r'//[^\n"]*$', '', fixed, flags=re.MULTILINE)
+        try:
+            return json.loads(fixed)
+        except ValueError:
+            pass
+        try:
+            return ast.literal_eval(fixed)
+        except (ValueError, SyntaxError):
+            pass
+    # JSON 모드를 지원하지 않는 모델이 YAML로 답한 경우
+    try:
+        return yaml.load(text.replace('\t', '  '), Loader=_YamlLoader)
+    except yaml.YAMLError:
+        return None
+
+def _concept_name(value):
+    if isinstance(value, dict):
+        value = value.get('name') or value.get('concept') or value.get('title')
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+def normalize_relation_type(value):
+    """관계 유형 표기를 RELATION_TYPES 중 하나로 정규화 (알 수 없으면 None)"""
+    key = re.sub(r'[\s\-]+', '_', str(value or '').strip().lower())
+    if key in RELATION_TYPES:
+        return key
+    return RELATION_ALIASES.get(key) or RELATION_ALIASES.get(key.replace('_', ''))
+
+def _normalize_relationship(item):
+    """관계 항목을 스키마에 맞게 고침 (고칠 수 없으면 None)"""
+    if not isinstance(item, dict):
+        return None
+    source = _concept_name(item.get('source', item.get('from', item.get('subject'))))
+    target = _concept_name(item.get('target', item.get('to', item.get('object'))))
+    rel_type = normalize_relation_type(item.get('type', item.get('relation', item.get('relationship'))))
+    if not source or not target or rel_type is None:
+        return None
+    relationship = {'source': source, 'target': target, 'type': rel_type}
+    description = item.get('description')
+    if isinstance(description, str) and description.strip():
+        relationship['description'] = description.strip()
+    return relationship
+
+def validate_ontology(data):
+    """파싱된 데이터를 검증/수정해 (온톨로지, 고칠 수 없는 관계 항목 목록) 반환
+
+    관계에만 등장하는 개념은 concepts에 추가한다.
+    """
+    if isinstance(data, list):
+        data = {'relationships': data}
+    if not isinstance(data, dict):
+        raise OntologyParseError("온톨로지 객체가 아닙니다")
+
+    raw_concepts = data.get('concepts') or []
+    if isinstance(raw_concepts, str):
+        raw_concepts = raw_concepts.split(',')
+    concepts = {}
+    for value in raw_concepts if isinstance(raw_concepts, list) else []:
+        name = _concept_name(value)
+        if name:
+            concepts.setdefault(name, None)
+
+    raw_relationships = data.get('relationships') or []
+    if isinstance(raw_relationships, dict):
+        raw_relationships = [raw_relationships]
+    relationships = []
+    invalid = []
+    for item in raw_relationships if isinstance(raw_relationships, list) else []:
+        relationship = _normalize_relationship(item)
+        if relationship is None:
+            invalid.append(item)
+            continue
+        relationships.append(relationship)
+        concepts.setdefault(relationship['source'], None)
+        concepts.setdefault(relationship['target'], None)
+
+    return {'concepts': list(concepts), 'relationships': relationships}, invalid
+
+def parse_ontology(text):
+    """응답 텍스트를 (온톨로지, 고칠 수 없는 관계 항목 목록)으로 파싱"""
+    data = _load_lenient(text)
+    if data is None:
+        raise OntologyParseError("응답을 JSON/YAML로 해석할 수 없습니다")
+    return validate_ontology(data)
+
+def extract_ontology(llm, prompt, caller='ontology', sp=None):
+    """구조화된 온톨로지를 요청하고 검증. 필요한 부분만 다시 요청한다
+
+    sp가 주어지면 토큰 수, 로컬 수정/재요청 여부를 기록한다.
+    해석할 수 없는 응답이 재요청 후에도 남으면 OntologyParseError를 발생시킨다.
+    """
+    config = json_generation_config(llm.model_name_for(caller))
+    kwargs = {'generation_config': config} if config else {}
+    response = llm.generate(prompt + JSON_FORMAT_INSTRUCTIONS, caller=caller, **kwargs)
+    attrs = dict(token_counts(response))
+
+    try:
+        ontology, invalid = parse_ontology(response.text)
+    except OntologyParseError:
+        # 응답 전체가 깨진 경우에만 형식 수정을 요청 (내용 재생성보다 짧음)
+        attrs['reask'] = 'format'
+        repaired = llm.generate(_REPAIR_PROMPT.format(text=response.text), caller=f'{caller}_repair', **kwargs)
+        ontology, invalid = parse_ontology(repaired.text)
+
+    if invalid:
+        attrs['reask'] = 'relationships'
+        attrs['invalid'] = len(invalid)
+        items = json.dumps(invalid, ensure_ascii=False, default=str)
+        try:
+            repaired = llm.generate(
+                _RELATIONSHIP_PROMPT.format(concepts=', '.join(ontology['concepts']), items=items),
+                caller=f'{caller}_repair'
+            )
+            fixed, _ = validate_ontology(_load_lenient(repaired.text, '[', ']') or [])
+        except Exception as e:
+            # 일부 관계를 잃는 것이 전체 재생성보다 낫다
+            print(f"관계 항목 수정 요청 실패: {e}")
+        else:
+            for relationship in fixed['relationships']:
+                ontology['relationships'].append(relationship)
+                for name in (relationship['source'], relationship['target']):
+                    if name not in ontology['concepts']:
+                        ontology['concepts'].append(name)
+    if sp is not None:
+        sp.set(**attrs)
+    return ontology
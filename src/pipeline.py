@@ -0,0 +1,118 @@
+"""
+노트 파이프라인 단계 스케줄러
+
+단계마다 의존하는 단계를 선언해 두면 의존성이 모두 끝난 단계부터 스레드 풀에서
+동시에 실행한다. 노트 하나의 처리 시간이 단계 시간의 합이 아니라 가장 긴
+의존 경로(critical path)에 가까워진다.
+
+    pipeline = Pipeline()
+    pipeline.add('content', lambda: generate(topic))
+    pipeline.add('index', index.refresh)
+    pipeline.add('ontology', lambda content: extract(content), deps=('content',))
+    pipeline.add('related', lambda ontology, index: lookup(ontology), deps=('ontology', 'index'))
+    results = pipeline.run()
+
+단계 함수는 의존 단계의 결과를 단계 이름의 키워드 인자로 받는다.
+Gemini 호출은 동기 클라이언트를 사용하므로 LLM 단계도 스레드에서 실행된다.
+스레드 풀은 Pipeline마다 처음 run()할 때 한 번 만들어 close()까지 재사용하며, 노트마다
+Pipeline을 만드는 호출자는 executor로 공용 풀을 넘긴다 (이 경우 close()는 풀을 닫지 않음).
+cProfile은 프로파일러를 켠 스레드만 측정하므로, profile 이름을 주면 단계마다
+실행되는 스레드 안에서 '<이름>.<단계>'로 프로파일링한다 (src/profiling.py).
+"""
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from src.profiling import profile_block
+
+class StageError(Exception):
+    """단계 실행 중 발생한 예외 (stage에 실패한 단계 이름)"""
+    def __init__(self, stage, error):
+        super().__init__(f"{stage} 단계 실패: {error}")
+        self.stage = stage
+        self.error = error
+
+class Stage:
+    __slots__ = ('name', 'func', 'deps', 'label')
+
+    def __init__(self, name, func, deps, label):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.label = label
+
+class Pipeline:
+    def __init__(self, max_workers=4, progress=None, profile=None, executor=None):
+        self.max_workers = max_workers
+        self.progress = progress
+        self.profile = profile
+        self.stages = {}
+        self._executor = executor
+        self._owns_executor = executor is None
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='stage')
+        return self._executor
+
+    def close(self):
+        """직접 만든 스레드 풀 종료 (넘겨받은 풀은 호출자가 닫음)"""
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, name, func, deps=(), label=None):
+        """단계 추가 (label이 있으면 시작 시 progress(label) 호출)"""
+        if name in self.stages:
+            raise ValueError(f"이미 등록된 단계입니다: {name}")
+        for dep in deps:
+            if dep not in self.stages:
+                raise ValueError(f"{name} 단계의 의존 단계가 없습니다: {dep}")
+        self.stages[name] = Stage(name, func, deps, label)
+        return self
+
+    def _call(self, stage, results):
+        if stage.label and self.progress is not None:
+            self.progress(stage.label)
+        kwargs = {dep: results[dep] for dep in stage.deps}
+        if self.profile is None:
+            return stage.func(**kwargs)
+        with profile_block(f"{self.profile}.{stage.name}"):
+            return stage.func(**kwargs)
+
+    def run(self):
+        """모든 단계를 실행하고 {단계 이름: 결과} 반환
+
+        단계가 실패하면 아직 시작하지 않은 단계는 건너뛰고, 실행 중인 단계가
+        끝나기를 기다린 뒤 StageError를 발생시킨다.
+        """
+        results = {}
+        pending = dict(self.stages)
+        running = {}
+        failure = None
+        executor = self._get_executor()
+        while pending or running:
+            if failure is None:
+                ready = [stage for stage in pending.values() if all(dep in results for dep in stage.deps)]
+                for stage in ready:
+                    del pending[stage.name]
+                    # LLM 우선순위 같은 컨텍스트 변수를 단계 스레드로 전달
+                    context = contextvars.copy_context()
+                    running[executor.submit(context.run, self._call, stage, results)] = stage.name
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    if failure is None:
+                        failure = StageError(name, e)
+        if failure is not None:
+            raise failure
+        return results
@@ -0,0 +1,154 @@
+"""
+CPU / 메모리 프로파일링 훅
+
+파이프라인 진입점에 @profiled('이름')을 붙여 두고 필요할 때만 켠다.
+꺼져 있으면 래퍼는 플래그 하나만 확인하고 원래 함수를 호출한다.
+
+- ONTOLOGY_PROFILE: 'cpu', 'mem' 또는 'cpu,mem'
+- ONTOLOGY_PROFILE_DIR: 보고서 저장 디렉토리 (기본: ./profiles)
+- ONTOLOGY_PROFILE_TOP: 요약에 포함할 상위 항목 수 (기본: 30)
+- ONTOLOGY_PROFILE_LIMIT: 이름별로 남길 최대 보고서 수 (기본: 5)
+
+cProfile은 현재 스레드만 측정하고 한 번에 하나만 켤 수 있다. 그래서 작업을 스레드 풀로
+넘기는 배치 진입점(ingest, crawl, job_queue, retag, check)과 단계를 파이프라인 스레드로 넘기는
+process_new_note는 @profiled(..., cpu=False)로 메모리만 측정하고, CPU는 실제 작업이 실행되는
+곳에서 측정한다: 파이프라인 단계(Pipeline(profile=...)), 워커 프로세스의 묶음 처리 함수
+(retag_chunk, check_scan).
+다른 스레드가 CPU 프로파일러를 쓰고 있어 측정할 것이 없는 호출은 보고서 개수 제한에 세지 않는다.
+
+CPU 보고서는 <이름>-<시각>-<pid>-<번호>.prof (pstats/snakeviz용)와 상위 N개 요약 .txt,
+메모리 보고서는 블록 실행 전후 tracemalloc 스냅샷 차이의 상위 N개 .mem.txt로 저장된다.
+"""
+import cProfile
+import functools
+import io
+import os
+import pstats
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+class _ProfilerState:
+    def __init__(self):
+        self.modes = frozenset()
+        self.directory = Path('profiles')
+        self.top = 30
+        self.limit = 5
+        self.reports = {}
+        self.lock = threading.Lock()
+        # cProfile은 동시에 하나만 활성화할 수 있으므로 가장 바깥 블록만 측정
+        self.cpu_active = False
+        self.mem_depth = 0
+        self.mem_started = False
+
+_state = _ProfilerState()
+
+def configure(modes=None, directory=None, top=None, limit=None):
+    """프로파일링 모드 설정 (modes가 비어 있으면 비활성화)"""
+    if isinstance(modes, str):
+        modes = [mode.strip() for mode in modes.split(',') if mode.strip()]
+    unknown = set(modes or ()) - {'cpu', 'mem'}
+    if unknown:
+        raise ValueError(f"알 수 없는 프로파일링 모드: {', '.join(sorted(unknown))}")
+    _state.modes = frozenset(modes or ())
+    if directory is not None:
+        _state.directory = Path(directory)
+    if top is not None:
+        _state.top = int(top)
+    if limit is not None:
+        _state.limit = int(limit)
+
+def is_enabled():
+    return bool(_state.modes)
+
+def _report_path(name, suffix):
+    _state.directory.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    return _state.directory / f"{name}-{stamp}-{os.getpid()}-{_state.reports.get(name, 0)}{suffix}"
+
+@contextmanager
+def profile_block(name, cpu=True):
+    """설정된 모드로 블록을 프로파일링하고 보고서 기록 (cpu가 False면 메모리만)"""
+    if not _state.modes:
+        yield
+        return
+
+    profiler = None
+    with _state.lock:
+        use_cpu = cpu and 'cpu' in _state.modes and not _state.cpu_active
+        track_memory = 'mem' in _state.modes
+        # 배치 작업에서 호출마다 보고서가 쌓이지 않도록 이름별 개수 제한
+        skip = (not use_cpu and not track_memory) or _state.reports.get(name, 0) >= _state.limit
+        if not skip:
+            _state.reports[name] = _state.reports.get(name, 0) + 1
+            if use_cpu:
+                _state.cpu_active = True
+                profiler = cProfile.Profile()
+            if track_memory:
+                if _state.mem_depth == 0 and not tracemalloc.is_tracing():
+                    tracemalloc.start(25)
+                    _state.mem_started = True
+                _state.mem_depth += 1
+    if skip:
+        yield
+        return
+    before = tracemalloc.take_snapshot() if track_memory else None
+
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            _write_cpu_report(name, profiler)
+            with _state.lock:
+                _state.cpu_active = False
+        if track_memory:
+            after = tracemalloc.take_snapshot()
+            _write_memory_report(name, before, after)
+            with _state.lock:
+                _state.mem_depth -= 1
+                if _state.mem_depth == 0 and _state.mem_started:
+                    tracemalloc.stop()
+                    _state.mem_started = False
+
+def _write_cpu_report(name, profiler):
+    profiler.dump_stats(str(_report_path(name, '.prof')))
+    buffer = io.StringIO()
+    stats = pstats.Stats(profiler, stream=buffer)
+    stats.sort_stats('cumulative').print_stats(_state.top)
+    stats.sort_stats('tottime').print_stats(_state.top)
+    _report_path(name, '.txt').write_text(buffer.getvalue(), encoding='utf-8')
+
+def _write_memory_report(name, before, after):
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), 'lineno')
+    current, peak = tracemalloc.get_traced_memory()
+    lines = [f"현재 {current / 1024 / 1024:.1f} MiB, 최대 {peak / 1024 / 1024:.1f} MiB", '']
+    lines += [str(stat) for stat in diff[:_state.top]]
+    _report_path(name, '.mem.txt').write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+def profiled(name, cpu=True):
+    """함수 실행을 프로파일링하는 데코레이터 (비활성화 시 플래그 확인만 수행)
+
+    작업을 다른 스레드로 넘기고 기다리기만 하는 함수는 cpu=False로 메모리만 측정한다.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state.modes:
+                return func(*args, **kwargs)
+            with profile_block(name, cpu=cpu):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+configure(
+    os.getenv('ONTOLOGY_PROFILE'),
+    os.getenv('ONTOLOGY_PROFILE_DIR'),
+    os.getenv('ONTOLOGY_PROFILE_TOP'),
+    os.getenv('ONTOLOGY_PROFILE_LIMIT')
+)
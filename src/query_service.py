@@ -0,0 +1,365 @@
+"""
+상주 볼트 조회 서비스
+
+볼트 인덱스를 메모리에 올려 둔 채 localhost HTTP/JSON으로 조회를 받는다.
+CLI나 GUI가 조회할 때마다 파이썬 시작, 볼트 탐색, 인덱스 로드를 반복하지 않아도 된다.
+
+    python -m src.cli serve --vault ~/Obsidian/Study
+    python -m src.cli query related --title 카프카
+
+조회 (GET, 결과는 JSON):
+- /related?title=...&concept=...&limit=20   개념이 겹치는 노트 (겹치는 개념 수, 링크 그래프 PageRank 순)
+- /backlinks?title=...                      해당 노트를 [[링크]]하는 노트
+- /neighborhood?concept=...&depth=1         같은 노트에 함께 등장하는 개념
+- /tags?tag=...                             태그가 붙은 노트 (tag가 없으면 태그별 노트 수)
+- /mermaid?concept=...&depth=1              개념 주변 관계의 Mermaid 다이어그램
+- /suggest?title=...&concept=...&limit=10   연결할 만한 노트 (개념 동시 등장/PMI 점수, title 노트가 이미 링크한 노트 제외)
+- /cooccur?concept=...&limit=10             함께 자주 등장하는 개념 (PMI 순)
+- /health
+
+서비스는 <볼트>/.ontology/query_service.json에 포트와 pid를 기록하고,
+QueryClient.connect()는 이 파일로 실행 중인 서비스를 찾는다.
+인덱스는 백그라운드 스레드가 주기적으로 갱신하므로 조회 자체는 메모리에서만 처리된다.
+"""
+import http.client
+import json
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlencode, urlparse
+from src.note_index import NoteIndex, title_key
+from src.concept_matrix import ConceptMatrix
+from src.centrality import Centrality, prune_ontology
+from src.utils.vault_scanner import get_state_dir
+from src.visualizer import OntologyVisualizer
+
+DEFAULT_PORT = 8765
+REFRESH_INTERVAL = 2.0
+CLIENT_TIMEOUT = 2.0
+SERVICE_FILE = 'query_service.json'
+
+class QueryServiceError(Exception):
+    """조회 서비스에 연결할 수 없거나 요청이 실패함"""
+
+class VaultQueryModel:
+    """NoteIndex 위의 조회 모델 (역링크, 태그 색인을 인덱스 변경 시에만 다시 만듦)"""
+    def __init__(self, vault_path, index=None):
+        self.vault_path = Path(vault_path)
+        self.index = index or NoteIndex(self.vault_path)
+        self.matrix = ConceptMatrix(self.index)
+        self.centrality = Centrality(self.index)
+        self.visualizer = OntologyVisualizer()
+        self._lock = threading.Lock()
+        self._backlinks = None
+        self._tags = None
+
+    def refresh(self):
+        changed = self.index.refresh()
+        if changed:
+            with self._lock:
+                self._backlinks = None
+                self._tags = None
+        # 첫 조회가 행렬 계산을 기다리지 않도록 미리 갱신 (인덱스가 그대로면 바로 반환)
+        self.matrix.refresh()
+        self.centrality.refresh()
+        return changed
+
+    def _entry(self, record, score=None):
+        entry = {
+            'title': record.title,
+            'path': str(Path(record.file).relative_to(self.vault_path)),
+            'concepts': list(record.concepts),
+            'tags': list(record.tags),
+        }
+        if score is not None:
+            entry['score'] = score
+        entry['rank'] = round(self.centrality.note_score(record), 6)
+        return entry
+
+    def _backlink_index(self):
+        with self._lock:
+            if self._backlinks is None:
+                backlinks = defaultdict(list)
+                for record in self.index:
+                    for link in record.links:
+                        backlinks[title_key(link)].append(record)
+                self._backlinks = dict(backlinks)
+            return self._backlinks
+
+    def _tag_index(self):
+        with self._lock:
+            if self._tags is None:
+                tags = defaultdict(list)
+                for record in self.index:
+                    for tag in record.tags:
+                        tags[tag].append(record)
+                self._tags = dict(tags)
+            return self._tags
+
+    def related(self, title=None, concepts=None, limit=20):
+        """title 노트의 개념 또는 주어진 개념과 겹치는 노트 (겹치는 개념 수, PageRank 순)"""
+        concepts = set(concepts or ())
+        source = None
+        if title:
+            source = self.index.get_by_title(title)
+            if source is not None:
+                concepts.update(source.concepts)
+        exclude = (source.file,) if source is not None else ()
+        return [
+            self._entry(record, len(concepts.intersection(record.concepts)))
+            for record in self.centrality.rank_by_concepts(concepts, limit=limit, exclude=exclude)
+        ]
+
+    def backlinks(self, title):
+        record = self.index.get_by_title(title)
+        names = {title}
+        if record is not None:
+            names.update((record.title, Path(record.file).stem, *record.aliases))
+        found = {}
+        by_link = self._backlink_index()
+        for name in names:
+            for source in by_link.get(title_key(name), ()):
+                found[source.file] = source
+        return [self._entry(found[key]) for key in sorted(found)]
+
+    def neighborhood(self, concept, depth=1, limit=30):
+        """concept와 같은 노트에 등장하는 개념을 depth 단계까지 (동시 등장 횟수 순)"""
+        seen = {concept}
+        frontier = [concept]
+        edges = Counter()
+        for _ in range(depth):
+            next_frontier = []
+            for current in frontier:
+                counts = Counter()
+                for record in self.index.notes_with_concept(current):
+                    counts.update(other for other in record.concepts if other != current)
+                for other, count in counts.most_common(limit):
+                    edges[(current, other)] = count
+                    if other not in seen:
+                        seen.add(other)
+                        next_frontier.append(other)
+            frontier = next_frontier
+        return [
+            {'source': source, 'target': target, 'weight': weight}
+            for (source, target), weight in edges.most_common()
+        ]
+
+    def tags(self, tag=None):
+        by_tag = self._tag_index()
+        if tag is None:
+            return {name: len(records) for name, records in sorted(by_tag.items())}
+        return [self._entry(record) for record in sorted(by_tag.get(tag, ()), key=lambda r: r.file)]
+
+    def mermaid(self, concept, depth=1, limit=15):
+        edges = self.neighborhood(concept, depth=depth, limit=limit)
+        ontology = {
+            'concepts': sorted({concept} | {edge['target'] for edge in edges}),
+            'relationships': [
+                {'source': edge['source'], 'target': edge['target'], 'type': 'related_to'}
+                for edge in edges
+            ],
+        }
+        # 중심 개념은 항상 남기고 나머지는 PageRank가 높은 개념 위주로
+        score = lambda name: float('inf') if name == concept else self.centrality.score(name)
+        return self.visualizer.generate_mermaid(prune_ontology(ontology, score, max_nodes=limit))
+
+    def suggest(self, title=None, concepts=None, limit=10):
+        """title 노트에 아직 링크하지 않은 연결 후보, 또는 주어진 개념과 연결할 만한 노트"""
+        if title and not concepts:
+            pairs = self.matrix.suggest_links(title, limit=limit)
+        else:
+            source = self.index.get_by_title(title) if title else None
+            concepts = set(concepts or ())
+            if source is not None:
+                concepts.update(source.concepts)
+            exclude = (source.file,) if source is not None else ()
+            pairs = self.matrix.suggest_notes(concepts, limit=limit, exclude=exclude)
+        return [self._entry(record, round(score, 4)) for record, score in pairs]
+
+    def cooccur(self, concepts, limit=10):
+        return [
+            {'concept': concept, 'pmi': round(score, 4), 'notes': count}
+            for concept, score, count in self.matrix.related_concepts(concepts, limit=limit)
+        ]
+
+    def query(self, name, params):
+        """이름과 파라미터(dict)로 조회 실행 (HTTP 핸들러와 로컬 대체 경로 공용)"""
+        # depth=0(개념 자신만)처럼 0도 유효한 값이므로 빠진 파라미터만 기본값 사용
+        def int_param(key, default):
+            value = params.get(key)
+            if value in (None, ''):
+                return default
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{key}는 정수여야 합니다: {value!r}") from None
+        limit = int_param('limit', 20)
+        depth = int_param('depth', 1)
+        if name == 'related':
+            return self.related(params.get('title'), params.get('concept') or (), limit=limit)
+        if name == 'backlinks':
+            return self.backlinks(params['title'])
+        if name == 'neighborhood':
+            return self.neighborhood(params['concept'], depth=depth)
+        if name == 'tags':
+            return self.tags(params.get('tag'))
+        if name == 'mermaid':
+            return self.mermaid(params['concept'], depth=depth)
+        if name == 'suggest':
+            return self.suggest(params.get('title'), params.get('concept') or (), limit=int_param('limit', 10))
+        if name == 'cooccur':
+            return self.cooccur(params['concept'], limit=int_param('limit', 10))
+        if name == 'health':
+            return {'notes': len(self.index), 'vault': str(self.vault_path), 'pid': os.getpid()}
+        raise KeyError(name)
+
+QUERIES = ('related', 'backlinks', 'neighborhood', 'tags', 'mermaid', 'suggest', 'cooccur', 'health')
+
+def _make_handler(model):
+    class QueryHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # 헤더와 본문을 따로 쓰므로 Nagle 알고리즘이 켜져 있으면 응답마다 지연 ACK(~40ms)를 기다림
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            raw = parse_qs(url.query)
+            params = {key: values[0] for key, values in raw.items()}
+            # concept은 여러 번 지정 가능
+            if 'concept' in raw and url.path in ('/related', '/suggest', '/cooccur'):
+                params['concept'] = raw['concept']
+            name = url.path.strip('/')
+            try:
+                if name not in QUERIES:
+                    status, body = 404, {'error': f"알 수 없는 조회: {name}"}
+                else:
+                    status, body = 200, {'result': model.query(name, params)}
+            except KeyError as e:
+                status, body = 400, {'error': f"필수 파라미터가 없습니다: {e}"}
+            except (ValueError, TypeError) as e:
+                status, body = 400, {'error': f"잘못된 파라미터: {e}"}
+            except Exception as e:
+                status, body = 500, {'error': str(e)}
+            data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return QueryHandler
+
+class QueryService:
+    def __init__(self, vault_path, port=DEFAULT_PORT, refresh_interval=REFRESH_INTERVAL):
+        self.model = VaultQueryModel(vault_path)
+        self.port = port
+        self.refresh_interval = refresh_interval
+        self.service_file = get_state_dir(vault_path) / SERVICE_FILE
+        self._stop = threading.Event()
+        self.server = None
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.model.refresh()
+            except Exception as e:
+                print(f"인덱스 갱신 오류: {e}")
+
+    def serve_forever(self):
+        """인덱스를 올리고 Ctrl+C로 종료할 때까지 요청 처리"""
+        start = time.perf_counter()
+        self.model.refresh()
+        self.server = ThreadingHTTPServer(('127.0.0.1', self.port), _make_handler(self.model))
+        self.server.daemon_threads = True
+        port = self.server.server_address[1]
+        self.service_file.write_text(
+            json.dumps({'port': port, 'pid': os.getpid(), 'vault': str(self.model.vault_path)}),
+            encoding='utf-8'
+        )
+        print(f"노트 {len(self.model.index)}개 로드 ({time.perf_counter() - start:.1f}s), "
+              f"http://127.0.0.1:{port} 에서 대기 중")
+        refresher = threading.Thread(target=self._refresh_loop, daemon=True)
+        refresher.start()
+        try:
+            self.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._stop.set()
+            self.server.server_close()
+            try:
+                self.service_file.unlink()
+            except FileNotFoundError:
+                pass
+
+class QueryClient:
+    """실행 중인 조회 서비스 클라이언트 (연결을 재사용하며 스레드 간 공유 가능)"""
+    def __init__(self, port, timeout=CLIENT_TIMEOUT):
+        self.port = port
+        self.timeout = timeout
+        self._local = threading.local()
+
+    @classmethod
+    def connect(cls, vault_path, timeout=CLIENT_TIMEOUT):
+        """볼트의 서비스가 실행 중이면 클라이언트, 아니면 None"""
+        service_file = get_state_dir(vault_path) / SERVICE_FILE
+        try:
+            info = json.loads(service_file.read_text(encoding='utf-8'))
+            client = cls(info['port'], timeout)
+            client.query('health')
+            return client
+        except (OSError, ValueError, KeyError, QueryServiceError):
+            return None
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=self.timeout)
+        return conn
+
+    def query(self, name, **params):
+        params = {key: value for key, value in params.items() if value is not None}
+        path = f"/{name}?{urlencode(params, doseq=True)}"
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                body = json.loads(response.read().decode('utf-8'))
+                break
+            except (OSError, http.client.HTTPException) as e:
+                # 서비스가 재시작되어 끊긴 연결이면 한 번 다시 연결
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise QueryServiceError(f"조회 서비스 연결 실패: {e}") from e
+        if response.status != 200:
+            raise QueryServiceError(body.get('error', f"HTTP {response.status}"))
+        return body['result']
+
+    def related(self, title=None, concepts=None, limit=20):
+        return self.query('related', title=title, concept=list(concepts or []) or None, limit=limit)
+
+    def backlinks(self, title):
+        return self.query('backlinks', title=title)
+
+    def neighborhood(self, concept, depth=1):
+        return self.query('neighborhood', concept=concept, depth=depth)
+
+    def tags(self, tag=None):
+        return self.query('tags', tag=tag)
+
+    def suggest(self, title=None, concepts=None, limit=10):
+        return self.query('suggest', title=title, concept=list(concepts or []) or None, limit=limit)
+
+    def cooccur(self, concepts, limit=10):
+        return self.query('cooccur', concept=list(concepts), limit=limit)
+
+    def mermaid(self, concept, depth=1):
+        return self.query('mermaid', concept=concept, depth=depth)
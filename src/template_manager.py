@@ -2,9 +2,37 @@
 노트 템플릿 관리자
 """
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import yaml
 import jinja2
+from src.utils.vault_scanner import get_state_dir
+
+# 템플릿 렌더링 실패 시 사용하는 기본 템플릿
+FALLBACK_TEMPLATE = """---
+title: {{ title }}
+created: {{ created }}
+modified: {{ modified }}
+type: {{ type or 'note' }}
+---
+
+# {{ title }}
+
+{{ content }}
+
+## 관계도
+{{ mermaid_diagram }}
+
+## 관련 노트
+"""
+
+def yaml_list(value):
+    """frontmatter에 넣을 YAML 흐름 목록 ([a, b]). 값이 없으면 빈 목록"""
+    if value is None or isinstance(value, jinja2.Undefined):
+        return '[]'
+    if isinstance(value, str):
+        value = [value]
+    return yaml.safe_dump(list(value), allow_unicode=True, default_flow_style=True, width=1 << 30).strip()
 
 class TemplateManager:
     def __init__(self, vault_path):
@@ -12,11 +40,19 @@ class TemplateManager:
         self.template_dir = self.vault_path / '.templates'
         self.ensure_template_dir()
         
-        # Jinja2 환경 설정
+        # Jinja2 환경 설정 (컴파일 결과는 디스크 바이트코드 캐시에 보관)
+        cache_dir = get_state_dir(self.vault_path) / 'jinja_cache'
+        cache_dir.mkdir(exist_ok=True)
         self.env = jinja2.Environment(
             loader=jinja2.FileSystemLoader(str(self.template_dir)),
-            autoescape=jinja2.select_autoescape(['html', 'xml'])
+            autoescape=jinja2.select_autoescape(['html', 'xml'], default_for_string=False),
+            bytecode_cache=jinja2.FileSystemBytecodeCache(str(cache_dir))
         )
+        self.env.filters['yaml_list'] = yaml_list
+        
+        # 프로세스 내 컴파일된 템플릿 캐시: 이름 -> (mtime, 템플릿)
+        self._compiled = {}
+        self._fallback = self.env.from_string(FALLBACK_TEMPLATE)
     
     def ensure_template_dir(self):
         """템플릿 디렉토리가 없으면 생성"""
@@ -32,7 +68,7 @@ title: {{ title }}
 created: {{ created }}
 modified: {{ modified }}
 type: note
-tags: {{ tags | join(', ') }}
+tags: {{ tags | yaml_list }}
 ---
 
 # {{ title }}
@@ -56,8 +92,8 @@ title: {{ title }}
 created: {{ created }}
 modified: {{ modified }}
 type: concept
-tags: {{ tags | join(', ') }}
-concepts: {{ concepts | join(', ') }}
+tags: {{ tags | yaml_list }}
+concepts: {{ concepts | yaml_list }}
 ---
 
 # {{ title }}
@@ -122,34 +158,78 @@ tags: daily
                 f.write(content)
     
     def get_template(self, template_name='default.md'):
-        """템플릿 가져오기"""
-        return self.env.get_template(template_name)
+        """템플릿 가져오기 (파일이 수정된 경우에만 다시 컴파일)"""
+        path = self.template_dir / template_name
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            raise jinja2.TemplateNotFound(template_name)
+        
+        cached = self._compiled.get(template_name)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        
+        # 로더를 직접 호출해 새로 로드 (바이트코드 캐시는 그대로 사용)
+        template = self.env.loader.load(self.env, template_name, self.env.make_globals(None))
+        self._compiled[template_name] = (mtime, template)
+        return template
     
-    def render_template(self, template_name, variables):
-        """템플릿 렌더링"""
+    def render_template(self, template_name, variables, strict=False):
+        """템플릿 렌더링
+        
+        strict가 False면 오류 발생 시 기본 템플릿으로 렌더링한다.
+        """
         try:
-            template = self.env.get_template(template_name)
+            template = self.get_template(template_name)
             return template.render(**variables)
         except Exception as e:
-            print(f"Error processing {template_name}: {e}")
-            # 기본 템플릿 사용
-            return f"""---
-title: {variables.get('title', '')}
-created: {variables.get('created', '')}
-modified: {variables.get('modified', '')}
-type: {variables.get('type', 'note')}
----
-
-# {variables.get('title', '')}
-
-{variables.get('content', '')}
-
-## 관계도
-{variables.get('mermaid_diagram', '')}
-
-## 관련 노트
-"""
+            if strict:
+                raise
+            print(f"Error processing {template_name}: {e} (기본 템플릿 사용)")
+            return self._fallback.render(**variables)
+    
+    def render_many(self, template_name, variables_iter, workers=None, strict=False):
+        """여러 변수 묶음을 같은 템플릿으로 렌더링 (입력 순서대로 결과 반환)
+        
+        workers를 지정하면 프로세스 풀에서 병렬로 렌더링한다.
+        """
+        if not workers:
+            try:
+                template = self.get_template(template_name)
+            except Exception as e:
+                if strict:
+                    raise
+                print(f"Error processing {template_name}: {e} (기본 템플릿 사용)")
+                template = self._fallback
+            for variables in variables_iter:
+                try:
+                    yield template.render(**variables)
+                except Exception as e:
+                    if strict:
+                        raise
+                    print(f"Error processing {template_name}: {e} (기본 템플릿 사용)")
+                    yield self._fallback.render(**variables)
+            return
+        
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_render_worker,
+            initargs=(str(self.vault_path),)
+        ) as executor:
+            jobs = ((template_name, variables, strict) for variables in variables_iter)
+            yield from executor.map(_render_in_worker, jobs, chunksize=256)
     
     def list_templates(self):
         """사용 가능한 템플릿 목록 반환"""
         return [f.name for f in self.template_dir.glob('*.md')]
+
+# 병렬 렌더링 워커 프로세스별 템플릿 매니저
+_worker_manager = None
+
+def _init_render_worker(vault_path):
+    global _worker_manager
+    _worker_manager = TemplateManager(vault_path)
+
+def _render_in_worker(job):
+    template_name, variables, strict = job
+    return _worker_manager.render_template(template_name, variables, strict=strict)
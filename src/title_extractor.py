@@ -0,0 +1,95 @@
+"""
+로컬 제목 추출기
+
+"카프카", "인공지능이란 무엇인가?", "윤리학의 기본 개념"처럼 짧은 주제 입력은
+질문/접미 표현만 걷어내면 제목이 되므로 API를 호출하지 않고 규칙으로 처리한다.
+확신할 수 없는 입력(문장, 여러 줄, 긴 텍스트)은 LLM에 맡긴다.
+"""
+import re
+
+# 이보다 긴 입력은 주제어가 아니라 본문으로 보고 LLM에 맡김
+MAX_INPUT_CHARS = 40
+MAX_TITLE_WORDS = 4
+# 표현을 걷어낸 뒤 이보다 짧게 남으면 잘못 자른 것일 수 있어 LLM에 맡김
+MIN_STRIPPED_CHARS = 2
+
+# 뒤에서부터 제거할 질문/설명 표현 (긴 표현을 먼저 검사)
+QUESTION_SUFFIXES = (
+    '이란 무엇인가', '란 무엇인가', '은 무엇인가', '는 무엇인가', '이 무엇인가', '가 무엇인가',
+    '이란 무엇일까', '란 무엇일까', '은 무엇일까', '는 무엇일까',
+    '이란 뭔가', '란 뭔가', '무엇인가',
+)
+TOPIC_SUFFIXES = (
+    '의 기본 개념', '의 기본 원리', '의 개념', '의 원리', '의 이해', '의 정의', '의 특징',
+    '에 대한 설명', '에 관한 설명', '에 대하여', '에 대해서', '에 대해', '에 관하여',
+    ' 개요', ' 입문', ' 소개', ' 기초',
+)
+# 두 단어 이상 남을 때만 제거하는 일반 명사 ("자연어 처리 시스템" -> "자연어 처리")
+GENERIC_SUFFIXES = (' 시스템', ' 기술', ' 방법론', ' 분야')
+
+# 서술어로 끝나면 주제어가 아니라 문장
+_SENTENCE_ENDING = re.compile(r'(다|요|죠|까|니다|세요|해줘|알려줘)$')
+_ALLOWED = re.compile(r'^[\w\s\-+#./&()가-힣]+$')
+
+def _strip_suffix(text, suffixes, min_words=1):
+    for suffix in suffixes:
+        if text.endswith(suffix):
+            stripped = text[:-len(suffix)].strip()
+            if stripped and len(stripped.split()) >= min_words:
+                return stripped, True
+    return text, False
+
+def _has_final_consonant(char):
+    """한글 음절에 받침이 있는지 (한글이 아니면 None)"""
+    code = ord(char) - 0xAC00
+    if not 0 <= code < 11172:
+        return None
+    return code % 28 != 0
+
+def _strip_topic_particle(text):
+    """질문 끝의 조사 '이란'/'란' 제거 ("정규화란" -> "정규화", "인공지능이란" -> "인공지능")
+
+    받침 있는 음절 뒤의 '이란', 받침 없는 음절 뒤의 '란'만 조사로 본다 ("파이란" -> "파이").
+    """
+    if text.endswith('이란') and len(text) > 2 and _has_final_consonant(text[-3]) is not False:
+        return text[:-2].strip(), True
+    if text.endswith('란') and len(text) > 1 and not text[-2].isspace() and not _has_final_consonant(text[-2]):
+        return text[:-1].strip(), True
+    return text, False
+
+def extract_title(content):
+    """입력에서 제목 후보를 만들어 (제목, 확신 여부) 반환
+
+    확신 여부가 False면 제목 후보는 참고용이며 LLM으로 다시 추출해야 한다.
+    """
+    text = ' '.join(content.split())
+    if not text:
+        return '', False
+    if '\n' in content.strip() or len(text) > MAX_INPUT_CHARS:
+        return text[:MAX_INPUT_CHARS], False
+
+    text = text.strip('"\'“”‘’「」『』`*# ')
+    is_question = text.endswith('?')
+    text = text.rstrip('?!.。 ')
+
+    stripped = False
+    if is_question:
+        text, stripped = _strip_topic_particle(text)
+    changed = True
+    while changed:
+        text, question = _strip_suffix(text, QUESTION_SUFFIXES)
+        text, topic = _strip_suffix(text, TOPIC_SUFFIXES)
+        changed = question or topic
+        stripped = stripped or changed
+        text = text.rstrip('?!., ')
+    text, generic = _strip_suffix(text, GENERIC_SUFFIXES, min_words=2)
+    stripped = stripped or generic
+
+    confident = (
+        bool(text)
+        and (not stripped or len(text.replace(' ', '')) >= MIN_STRIPPED_CHARS)
+        and len(text.split()) <= MAX_TITLE_WORDS
+        and _ALLOWED.match(text) is not None
+        and _SENTENCE_ENDING.search(text) is None
+    )
+    return text, confident
@@ -0,0 +1,174 @@
+"""
+노트 파이프라인 단계별 시간 측정
+
+    with span('content', title=title) as sp:
+        response = model.generate_content(prompt)
+        sp.set(bytes=len(response.text), **token_counts(response))
+
+기본적으로 비활성화되어 있으며, 이때 span()은 공유된 빈 객체를 반환하므로
+비용이 거의 없다. 환경 변수 또는 configure()로 활성화한다.
+
+- ONTOLOGY_TRACE: 스팬을 JSON lines로 기록할 파일 경로
+- ONTOLOGY_METRICS: Prometheus textfile 형식 요약을 기록할 파일 경로
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from src.utils.progress import percentile
+
+# 단계별로 분위수 계산에 사용할 최근 측정값 수
+WINDOW_SIZE = 10000
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+_NOOP_SPAN = _NoopSpan()
+
+class Span:
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._t0
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self.tracer._record(self.name, self.start, duration, self.attrs)
+        return False
+
+    def set(self, **attrs):
+        """바이트 수, 토큰 수 등 측정값 추가"""
+        self.attrs.update(attrs)
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.jsonl_path = None
+        self.metrics_path = None
+        self._lock = threading.Lock()
+        self._jsonl = None
+        self._durations = defaultdict(lambda: deque(maxlen=WINDOW_SIZE))
+        self._sums = defaultdict(float)
+        self._counts = defaultdict(int)
+        self._errors = defaultdict(int)
+        self._totals = defaultdict(float)
+
+    def configure(self, jsonl_path=None, metrics_path=None):
+        """트레이싱 활성화 (두 경로가 모두 None이면 비활성화)"""
+        with self._lock:
+            if self._jsonl is not None:
+                self._jsonl.close()
+                self._jsonl = None
+            self.jsonl_path = Path(jsonl_path) if jsonl_path else None
+            self.metrics_path = Path(metrics_path) if metrics_path else None
+            if self.jsonl_path is not None:
+                self._jsonl = open(self.jsonl_path, 'a', encoding='utf-8')
+            self.enabled = self.jsonl_path is not None or self.metrics_path is not None
+
+    def span(self, name, **attrs):
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, attrs)
+
+    def _record(self, name, start, duration, attrs):
+        with self._lock:
+            self._durations[name].append(duration)
+            self._sums[name] += duration
+            self._counts[name] += 1
+            if 'error' in attrs:
+                self._errors[name] += 1
+            for key in ('bytes', 'prompt_tokens', 'output_tokens'):
+                if isinstance(attrs.get(key), (int, float)):
+                    self._totals[(name, key)] += attrs[key]
+            if self._jsonl is not None:
+                record = {'span': name, 'start': start, 'duration': duration, **attrs}
+                self._jsonl.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+
+    def summary(self):
+        """단계별 횟수와 p50/p95 지연 시간"""
+        with self._lock:
+            return {
+                name: {
+                    'count': self._counts[name],
+                    'errors': self._errors[name],
+                    'sum': self._sums[name],
+                    'p50': percentile(values, 50),
+                    'p95': percentile(values, 95),
+                }
+                for name, values in self._durations.items()
+            }
+
+    def export_prometheus(self, path=None):
+        """Prometheus textfile collector 형식으로 요약 기록"""
+        path = Path(path) if path else self.metrics_path
+        if path is None:
+            return
+        lines = [
+            '# HELP ontology_stage_duration_seconds Note pipeline stage duration.',
+            '# TYPE ontology_stage_duration_seconds summary',
+        ]
+        summary = self.summary()
+        for name, stats in sorted(summary.items()):
+            for quantile, key in (('0.5', 'p50'), ('0.95', 'p95')):
+                lines.append(f'ontology_stage_duration_seconds{{stage="{name}",quantile="{quantile}"}} {stats[key]:.6f}')
+            lines.append(f'ontology_stage_duration_seconds_sum{{stage="{name}"}} {stats["sum"]:.6f}')
+            lines.append(f'ontology_stage_duration_seconds_count{{stage="{name}"}} {stats["count"]}')
+        lines.append('# TYPE ontology_stage_errors_total counter')
+        for name, stats in sorted(summary.items()):
+            lines.append(f'ontology_stage_errors_total{{stage="{name}"}} {stats["errors"]}')
+        with self._lock:
+            totals = sorted(self._totals.items())
+        for metric in ('bytes', 'prompt_tokens', 'output_tokens'):
+            lines.append(f'# TYPE ontology_stage_{metric}_total counter')
+            for (name, key), value in totals:
+                if key == metric:
+                    lines.append(f'ontology_stage_{metric}_total{{stage="{name}"}} {value:g}')
+
+        # 수집기가 쓰다 만 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체
+        tmp_path = path.with_name(path.name + '.tmp')
+        tmp_path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+        os.replace(tmp_path, path)
+
+    def flush(self):
+        with self._lock:
+            if self._jsonl is not None:
+                self._jsonl.flush()
+        if self.metrics_path is not None:
+            self.export_prometheus()
+
+def token_counts(response):
+    """Gemini 응답의 usage_metadata에서 토큰 수 추출"""
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is None:
+        return {}
+    return {
+        'prompt_tokens': getattr(usage, 'prompt_token_count', 0),
+        'output_tokens': getattr(usage, 'candidates_token_count', 0),
+    }
+
+tracer = Tracer()
+tracer.configure(os.getenv('ONTOLOGY_TRACE'), os.getenv('ONTOLOGY_METRICS'))
+atexit.register(tracer.flush)
+
+def span(name, **attrs):
+    """전역 트레이서의 스팬 생성"""
+    if not tracer.enabled:
+        return _NOOP_SPAN
+    return Span(tracer, name, attrs)
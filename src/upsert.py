@@ -0,0 +1,74 @@
+"""
+기존 노트를 고려한 노트 생성 (upsert)
+
+같은 주제 목록을 다시 실행할 때 이미 만들어진 노트를 API로 다시 생성하지 않도록,
+노트 frontmatter에 입력 해시(source_hash)와 프롬프트 버전(prompt_version)을 저장해 두고
+다음 기준으로 처리 방법을 정한다.
+
+- skip: 같은 입력, 같은 프롬프트 버전으로 생성된 노트가 있음
+- regenerate: 같은 입력으로 생성한 노트지만 프롬프트 버전이 바뀜 (같은 파일에 다시 생성)
+- conflict: 같은 제목의 노트가 다른 입력으로 생성됨 (건너뜀)
+- merge: 같은 제목/별칭의 노트를 사용자가 직접 작성함 (본문은 두고 메타데이터만 합침)
+- create: 해당하는 노트가 없음
+
+제목이 같은 두 입력이 서로의 노트를 다시 생성하며 번갈아 덮어쓰지 않도록, 다른 입력으로
+생성된 노트는 먼저 만든 쪽을 유지한다. 입력을 고친 뒤 다시 생성하려면 기존 노트를 지운다.
+"""
+from src.job_queue import input_hash as source_hash
+from src.note_index import frontmatter_list, normalize_title
+from src.note_manager import note_filename
+from src.title_extractor import extract_title
+
+# 리스트 값은 합치고 나머지는 새 값을 우선하는 frontmatter 키
+LIST_FIELDS = ('tags', 'aliases', 'concepts')
+
+class UpsertPlan:
+    __slots__ = ('action', 'record', 'title', 'source_hash')
+
+    def __init__(self, action, record, title, source_hash):
+        self.action = action
+        self.record = record
+        self.title = title
+        self.source_hash = source_hash
+
+def plan_upsert(index, content, template, prompt_version, extract_title_func=None):
+    """기존 노트를 찾아 처리 방법 결정
+
+    입력 해시로 먼저 찾고, 없으면 제목으로 찾는다. 제목은 로컬 추출기를 먼저 쓰고
+    확신할 수 없을 때만 extract_title_func(API 호출)를 사용한다.
+    인덱스는 배치 시작 시 한 번 갱신되어 있다고 보고, 읽은 적이 없을 때만 읽는다.
+    """
+    digest = source_hash(content, template)
+    index.ensure_loaded()
+    record = index.get_by_source_hash(digest)
+    title = record.title if record is not None else None
+    if record is None:
+        title, confident = extract_title(content)
+        if not confident and extract_title_func is not None:
+            title = extract_title_func(content)
+        title = normalize_title(title)
+        record = index.get_by_title(title) or index.get_by_title(note_filename(title)[:-len('.md')])
+
+    if record is None:
+        action = 'create'
+    elif record.source_hash is None:
+        action = 'merge'
+    elif record.source_hash != digest:
+        action = 'conflict'
+    elif record.prompt_version == str(prompt_version):
+        action = 'skip'
+    else:
+        action = 'regenerate'
+    return UpsertPlan(action, record, title, digest)
+
+def merge_metadata(existing, updates):
+    """기존 frontmatter에 새 값을 합침 (태그/별칭/개념은 합집합, created는 유지)"""
+    merged = dict(existing)
+    for key, value in updates.items():
+        if key in LIST_FIELDS:
+            merged[key] = list(dict.fromkeys(frontmatter_list(existing.get(key)) + frontmatter_list(value)))
+        elif key == 'created' and existing.get('created'):
+            continue
+        else:
+            merged[key] = value
+    return merged
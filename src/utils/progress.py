@@ -0,0 +1,73 @@
+"""
+배치 작업 진행 상황 및 처리량 보고
+"""
+import math
+import sys
+import threading
+import time
+
+def percentile(values, p):
+    """정렬되지 않은 값 목록의 p 백분위수 (nearest-rank)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = math.ceil(p / 100 * len(ordered))
+    return ordered[max(0, min(len(ordered), rank) - 1)]
+
+class ThroughputReporter:
+    """완료된 작업의 지연 시간과 성공/실패를 모아 주기적으로 출력"""
+    def __init__(self, total=None, interval=2.0, stream=None):
+        self.total = total
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self.latencies = []
+        self.completed = 0
+        self.failures = 0
+        self.start = time.perf_counter()
+        self._last_print = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, latency, ok=True):
+        """작업 하나의 결과 기록"""
+        with self._lock:
+            self.completed += 1
+            self.latencies.append(latency)
+            if not ok:
+                self.failures += 1
+        now = time.perf_counter()
+        if now - self._last_print >= self.interval:
+            self._last_print = now
+            self.print_line()
+
+    def summary(self):
+        """현재까지의 처리량 통계"""
+        with self._lock:
+            latencies = list(self.latencies)
+            completed = self.completed
+            failures = self.failures
+        elapsed = time.perf_counter() - self.start
+        return {
+            'completed': completed,
+            'failures': failures,
+            'elapsed': elapsed,
+            'per_minute': completed / elapsed * 60 if elapsed > 0 else 0.0,
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+        }
+
+    def format(self, stats=None):
+        stats = stats or self.summary()
+        done = f"{stats['completed']}/{self.total}" if self.total else str(stats['completed'])
+        return (
+            f"완료 {done} | 실패 {stats['failures']} | "
+            f"{stats['per_minute']:.1f} notes/min | "
+            f"p50 {stats['p50']:.2f}s | p95 {stats['p95']:.2f}s"
+        )
+
+    def print_line(self, final=False):
+        line = self.format()
+        if self.stream.isatty() and not final:
+            self.stream.write('\r' + line)
+        else:
+            self.stream.write(('\r' if self.stream.isatty() else '') + line + '\n')
+        self.stream.flush()
@@ -0,0 +1,37 @@
+"""
+볼트 내 노트 파일을 순회하는 유틸리티
+"""
+import os
+from itertools import islice
+from pathlib import Path
+
+def iter_note_paths(vault_path):
+    """
+    볼트의 모든 마크다운 노트 경로를 순회
+
+    .obsidian, .templates 같은 숨김 디렉토리는 건너뛴다.
+    """
+    vault_path = str(vault_path)
+    for root, dirs, files in os.walk(vault_path):
+        # 숨김 디렉토리는 탐색하지 않음
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        for name in sorted(files):
+            if name.endswith('.md'):
+                yield Path(root) / name
+
+def iter_chunks(items, size):
+    """items를 size개씩 묶은 리스트로 순회 (워커 프로세스에 묶음 단위로 넘길 때 사용)"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def get_state_dir(vault_path):
+    """
+    볼트별 캐시/상태 파일을 저장하는 디렉토리 반환 (없으면 생성)
+    """
+    state_dir = Path(vault_path) / '.ontology'
+    state_dir.mkdir(parents=True, exist_ok=True)
+    return state_dir
@@ -0,0 +1,319 @@
+"""
+볼트 무결성 검사
+
+볼트를 한 번만 (노트가 많으면 프로세스 풀로 병렬) 읽어 링크/개념/제목 색인을 메모리에 만들고
+다음 문제를 찾는다.
+
+- broken_link: 옵시디언이 찾을 수 없는 [[링크]]. 제목/별칭은 같은데 파일명과 공백·하이픈·대소문자만
+  다른 경우(예: [[카프카 스트림즈]] -> 카프카-스트림즈.md)는 [[파일명|원래 텍스트]]로 고칠 수 있다
+- missing_concept: frontmatter concepts에는 있지만 해당 제목/별칭의 노트가 없는 개념
+  (create_stubs를 주면 빈 개념 노트를 만든다)
+- filename_collision: 서로 다른 노트의 제목이 같은 파일명(note_manager.note_filename)으로 저장되는 경우
+  (자동으로 고치지 않음)
+- relation_mismatch: ## 관계 섹션에 나오는 개념이 frontmatter concepts에 없는 경우
+  (빠진 개념을 concepts에 추가한다)
+
+    python -m src.cli check --vault ~/Obsidian/Study
+    python -m src.cli check --fix --create-stubs
+"""
+import os
+import re
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+import frontmatter
+from src.note_index import (
+    NoteRecord, PARALLEL_THRESHOLD, frontmatter_list, normalize_title, record_tuple, split_frontmatter,
+    title_key,
+)
+from src.note_manager import note_filename
+from src.ontology_parser import normalize_relation_type
+from src.obsidian.safe_write import update_file, write_if_unchanged, WriteConflict
+from src.utils.vault_scanner import iter_note_paths, iter_chunks
+from src.tracing import span
+from src.profiling import profiled, profile_block
+
+# 워커 프로세스에 한 번에 넘기는 노트 수
+SCAN_CHUNK_SIZE = 256
+
+ISSUE_KINDS = ('broken_link', 'missing_concept', 'filename_collision', 'relation_mismatch')
+
+RELATION_SECTION = '관계'
+# 노트가 아닌 첨부 파일 링크 (검사하지 않음)
+ATTACHMENT_SUFFIXES = frozenset((
+    '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.svg', '.webp', '.pdf', '.mp3', '.wav', '.m4a',
+    '.ogg', '.mp4', '.webm', '.mov', '.canvas', '.excalidraw',
+))
+# [[대상#제목|표시 텍스트]] 전체 (링크를 고쳐 쓸 때 사용)
+LINK_PATTERN = re.compile(r'\[\[([^\]|#]+)(#[^\]|]*)?(\|[^\]]*)?\]\]')
+
+class Issue:
+    __slots__ = ('kind', 'file', 'target', 'detail', 'fix')
+
+    def __init__(self, kind, file, target, detail, fix=None):
+        self.kind = kind
+        self.file = file        # 문제가 있는 노트 (개념 문제는 None)
+        self.target = target    # 링크 대상, 개념 또는 파일명
+        self.detail = detail
+        self.fix = fix          # 자동 수정에 쓸 값 (없으면 수정 불가)
+
+    def to_dict(self):
+        return {'kind': self.kind, 'file': self.file, 'target': self.target,
+                'detail': self.detail, 'fixable': self.fix is not None}
+
+def parse_relations(body):
+    """## 관계 섹션의 "- 원본 유형 대상: 설명" 줄을 (원본, 유형, 대상) 목록으로"""
+    relations = []
+    in_section = False
+    for line in body.splitlines():
+        stripped = line.strip()
+        if stripped.startswith('#'):
+            in_section = stripped.lstrip('#').strip() == RELATION_SECTION
+            continue
+        if not in_section or not stripped.startswith(('-', '*')):
+            continue
+        head = stripped[1:].strip()
+        head = re.split(r':(?:\s|$)', head, maxsplit=1)[0]
+        tokens = head.replace('[[', '').replace(']]', '').split()
+        for i in range(1, len(tokens) - 1):
+            rel_type = normalize_relation_type(tokens[i])
+            if rel_type:
+                relations.append((' '.join(tokens[:i]), rel_type, ' '.join(tokens[i + 1:])))
+                break
+    return relations
+
+def scan_note(path):
+    """워커: 노트를 한 번 읽어 (레코드 튜플, 관계 목록) 반환"""
+    try:
+        stat = os.stat(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            metadata, body = split_frontmatter(f.read())
+        return record_tuple(path, metadata, body, stat), parse_relations(body)
+    except Exception as e:
+        print(f"Error processing {path}: {e}")
+        return None
+
+def scan_chunk(paths):
+    """워커: 노트 묶음을 scan_note로 읽음 (CPU 프로파일은 실제로 읽는 프로세스에서 측정)"""
+    with profile_block('check_scan'):
+        return [scan_note(path) for path in paths]
+
+def _casefold(value):
+    return normalize_title(value).casefold()
+
+class VaultChecker:
+    def __init__(self, vault_path, workers=None):
+        self.vault_path = Path(vault_path)
+        self.workers = workers
+        self.records = []
+        self.relations = {}
+        # 마지막 fix()에서 고치지 못한 Issue
+        self.failed = []
+
+    def scan(self):
+        """볼트를 한 번 읽어 레코드와 관계 목록을 메모리에 올림"""
+        paths = [str(path) for path in iter_note_paths(self.vault_path)]
+        with span('vault_scan', purpose='check') as sp:
+            if len(paths) < PARALLEL_THRESHOLD or self.workers == 0:
+                results = scan_chunk(paths)
+            else:
+                with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                    chunks = executor.map(scan_chunk, iter_chunks(paths, SCAN_CHUNK_SIZE))
+                    results = [result for chunk in chunks for result in chunk]
+            self.records = []
+            self.relations = {}
+            for result in results:
+                if result is None:
+                    continue
+                row, relations = result
+                record = NoteRecord.from_tuple(row)
+                self.records.append(record)
+                if relations:
+                    self.relations[record.file] = relations
+            sp.set(files=len(paths), notes=len(self.records))
+        return len(self.records)
+
+    def _build_indexes(self):
+        # 옵시디언 방식: 파일명(대소문자 무시) 또는 볼트 기준 경로로 찾음
+        self._by_stem = {}
+        self._by_relpath = {}
+        # 이 도구 방식: 제목/파일명/별칭 (공백·하이픈·대소문자 무시)
+        self._by_title = {}
+        for record in self.records:
+            path = record.path
+            self._by_stem.setdefault(_casefold(path.stem), record)
+            relpath = path.relative_to(self.vault_path).with_suffix('').as_posix()
+            self._by_relpath.setdefault(_casefold(relpath), record)
+            for name in (record.title, path.stem, *record.aliases):
+                self._by_title.setdefault(title_key(name), record)
+
+    def _resolves(self, target):
+        target = target.strip()
+        if target.lower().endswith('.md'):
+            target = target[:-3]
+        key = _casefold(target)
+        return key in self._by_relpath or key.rsplit('/', 1)[-1] in self._by_stem
+
+    @profiled('check', cpu=False)
+    def check(self):
+        """검사 후 Issue 목록 반환 (scan을 먼저 호출하지 않았으면 볼트를 읽음)"""
+        if not self.records:
+            self.scan()
+        with span('check') as sp:
+            self._build_indexes()
+            issues = []
+            issues.extend(self._check_links())
+            issues.extend(self._check_concepts())
+            issues.extend(self._check_collisions())
+            issues.extend(self._check_relations())
+            sp.set(issues=len(issues))
+        return issues
+
+    def _check_links(self):
+        for record in self.records:
+            for link in record.links:
+                if Path(link).suffix.lower() in ATTACHMENT_SUFFIXES:
+                    continue
+                if self._resolves(link):
+                    continue
+                match = self._by_title.get(title_key(link.rsplit('/', 1)[-1].removesuffix('.md')))
+                if match is not None:
+                    yield Issue('broken_link', record.file, link,
+                                f"파일명이 다름: {match.path.name}", fix=match.path.stem)
+                else:
+                    yield Issue('broken_link', record.file, link, "해당 노트 없음")
+
+    def _check_concepts(self):
+        referenced = defaultdict(list)
+        for record in self.records:
+            for concept in record.concepts:
+                if title_key(concept) not in self._by_title:
+                    referenced[concept].append(record.file)
+        # 표기만 다른 같은 개념은 하나로 묶음
+        grouped = defaultdict(lambda: [None, set()])
+        for concept, files in referenced.items():
+            entry = grouped[title_key(concept)]
+            entry[0] = entry[0] or concept
+            entry[1].update(files)
+        for concept, files in sorted(grouped.values(), key=lambda e: (-len(e[1]), e[0])):
+            yield Issue('missing_concept', None, concept, f"{len(files)}개 노트에서 사용", fix=concept)
+
+    def _check_collisions(self):
+        by_filename = defaultdict(list)
+        for record in self.records:
+            by_filename[_casefold(note_filename(record.title))].append(record)
+        for filename, records in sorted(by_filename.items()):
+            titles = {record.title for record in records}
+            existing = self._by_relpath.get(filename[:-3])
+            owners = {record.file for record in records}
+            if existing is not None:
+                owners.add(existing.file)
+            if len(owners) > 1:
+                detail = ', '.join(sorted(titles)) + ' -> ' + ', '.join(
+                    sorted(str(Path(file).relative_to(self.vault_path)) for file in owners))
+                yield Issue('filename_collision', None, note_filename(records[0].title), detail)
+
+    def _check_relations(self):
+        for record in self.records:
+            relations = self.relations.get(record.file)
+            if not relations:
+                continue
+            known = {title_key(name) for name in (record.title, record.path.stem, *record.aliases, *record.concepts)}
+            missing = []
+            for source, _, target in relations:
+                for name in (source, target):
+                    key = title_key(name)
+                    if key not in known:
+                        known.add(key)
+                        missing.append(name)
+            if missing:
+                yield Issue('relation_mismatch', record.file, ', '.join(missing),
+                            "## 관계에 있지만 concepts에 없음", fix=missing)
+
+    def fix(self, issues, create_stubs=False, workers=8):
+        """고칠 수 있는 문제를 수정하고 수정한 항목(링크, 추가한 개념, 만든 노트) 수 반환
+
+        수정하다 실패한 Issue는 self.failed에 남는다.
+        """
+        by_file = defaultdict(lambda: {'links': {}, 'concepts': [], 'issues': []})
+        stubs = []
+        for issue in issues:
+            if issue.fix is None:
+                continue
+            if issue.kind == 'broken_link':
+                by_file[issue.file]['links'][issue.target] = issue.fix
+            elif issue.kind == 'relation_mismatch':
+                by_file[issue.file]['concepts'].extend(issue.fix)
+            elif issue.kind == 'missing_concept' and create_stubs:
+                stubs.append(issue)
+                continue
+            else:
+                continue
+            by_file[issue.file]['issues'].append(issue)
+
+        self.failed = []
+        with span('check_fix', files=len(by_file), stubs=len(stubs)) as sp, \
+                ThreadPoolExecutor(max_workers=workers, thread_name_prefix='check-fix') as executor:
+            fixed = 0
+            for changes, count in zip(by_file.values(), executor.map(lambda item: self._fix_note(*item), by_file.items())):
+                if count is None:
+                    self.failed.extend(changes['issues'])
+                else:
+                    fixed += count
+            for issue, count in zip(stubs, executor.map(self._create_stub, (issue.fix for issue in stubs))):
+                if count is None:
+                    self.failed.append(issue)
+                else:
+                    fixed += count
+            sp.set(fixed=fixed, failed=len(self.failed))
+        return fixed
+
+    def _fix_note(self, file, changes):
+        links = changes['links']
+        concepts = changes['concepts']
+        count = 0
+
+        def rewrite_link(match):
+            nonlocal count
+            target, heading, alias = match.group(1), match.group(2) or '', match.group(3)
+            stem = links.get(target.strip())
+            if stem is None:
+                return match.group(0)
+            count += 1
+            return f"[[{stem}{heading}{alias or '|' + target.strip()}]]"
+
+        def apply(text):
+            nonlocal count
+            count = 0
+            if links:
+                text = LINK_PATTERN.sub(rewrite_link, text)
+            if concepts:
+                post = frontmatter.loads(text)
+                current = frontmatter_list(post.metadata.get('concepts'))
+                post.metadata['concepts'] = current + [c for c in concepts if c not in current]
+                text = frontmatter.dumps(post)
+                count += len(concepts)
+            return text
+
+        try:
+            update_file(file, apply)
+        except Exception as e:
+            print(f"Error fixing {file}: {e}")
+            return None
+        return count
+
+    def _create_stub(self, concept):
+        """개념 노트를 만들고 1, 이미 있으면 0, 만들 수 없으면 None 반환"""
+        path = self.vault_path / note_filename(concept)
+        post = frontmatter.Post(f"# {concept}\n\n## 정의\n", title=concept, type='concept',
+                                created=time.strftime('%Y-%m-%d %H:%M:%S'), concepts=[concept])
+        try:
+            # 이미 파일이 있으면 덮어쓰지 않음
+            write_if_unchanged(path, frontmatter.dumps(post) + '\n', None)
+        except WriteConflict:
+            return 0
+        except OSError as e:
+            print(f"Error creating {path}: {e}")
+            return None
+        return 1
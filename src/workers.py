@@ -0,0 +1,77 @@
+"""
+GUI 백그라운드 작업 실행기
+
+무거운 작업(API 호출, 파일 I/O)을 UI 스레드 밖에서 실행하고
+시그널로 진행 상황과 결과를 전달한다.
+"""
+import asyncio
+import threading
+import traceback
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+
+class WorkerSignals(QObject):
+    """작업 스레드에서 UI 스레드로 전달되는 시그널"""
+    started = pyqtSignal()
+    progress = pyqtSignal(str)
+    finished = pyqtSignal(object)
+    error = pyqtSignal(str)
+
+class Worker(QRunnable):
+    """QThreadPool에서 실행되는 일반 작업
+
+    with_progress가 True면 fn에 progress 콜백을 키워드 인자로 넘긴다.
+    """
+    def __init__(self, fn, *args, with_progress=False, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        if with_progress:
+            self.kwargs['progress'] = self.signals.progress.emit
+
+    def run(self):
+        self.signals.started.emit()
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            traceback.print_exc()
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.finished.emit(result)
+
+class AsyncLoopThread:
+    """별도 스레드에서 asyncio 이벤트 루프를 계속 실행
+
+    코루틴 API(GeminiAPI 등)는 항상 같은 루프에서 실행되어야 하므로
+    요청마다 asyncio.run을 호출하지 않고 이 루프에 제출한다.
+    """
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro, on_finished=None, on_error=None):
+        """코루틴을 제출하고 결과를 UI 스레드의 콜백으로 전달"""
+        signals = WorkerSignals()
+        if on_finished is not None:
+            signals.finished.connect(on_finished)
+        if on_error is not None:
+            signals.error.connect(on_error)
+
+        def _done(future):
+            try:
+                signals.finished.emit(future.result())
+            except Exception as e:
+                signals.error.emit(str(e))
+
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        future.add_done_callback(_done)
+        return signals
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
@@ -0,0 +1,69 @@
+"""
+개념 동시 등장 행렬의 증분 갱신이 전체 재계산과 같은지 확인
+
+    python -m pytest test_concept_matrix.py
+"""
+import itertools
+import random
+import tempfile
+from pathlib import Path
+from src.note_index import NoteIndex
+from src.concept_matrix import ConceptMatrix
+
+CONCEPTS = [f"개념{i}" for i in range(8)]
+
+def write_note(vault, name, concepts):
+    path = Path(vault) / f"{name}.md"
+    path.write_text(f"---\ntitle: {name}\nconcepts: [{', '.join(concepts)}]\n---\n본문\n", encoding='utf-8')
+    return path
+
+def cooccurrence_table(matrix):
+    return {(a, b): matrix.cooccurrence(a, b) for a, b in itertools.product(CONCEPTS, repeat=2)}
+
+def test_incremental_matches_rebuild():
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as vault:
+        paths = [write_note(vault, f"note{i}", rng.sample(CONCEPTS, 3)) for i in range(20)]
+        index = NoteIndex(vault, use_cache=False)
+        index.refresh()
+        matrix = ConceptMatrix(index)
+        assert matrix.refresh() == 20
+        suggestions = matrix.suggest_notes(['개념0'], limit=5)
+
+        # 수정, 추가, 삭제 각각 하나 (전체의 20% 이하라 증분 갱신)
+        write_note(vault, 'note0', ['개념6', '개념7'])
+        index.update_path(paths[0])
+        index.update_path(write_note(vault, 'note20', ['개념0', '개념1', '개념2']))
+        paths[1].unlink()
+        index.update_path(paths[1])
+        assert matrix.refresh() == 3
+        assert matrix.refresh() == 0
+
+        rebuilt = ConceptMatrix(index)
+        rebuilt.refresh()
+        assert cooccurrence_table(matrix) == cooccurrence_table(rebuilt)
+        assert ([(r.file, round(s, 6)) for r, s in matrix.suggest_notes(['개념0'], limit=5)]
+                == [(r.file, round(s, 6)) for r, s in rebuilt.suggest_notes(['개념0'], limit=5)])
+        assert suggestions
+
+def test_many_changes_rebuild():
+    with tempfile.TemporaryDirectory() as vault:
+        paths = [write_note(vault, f"note{i}", CONCEPTS[i % 4:i % 4 + 3]) for i in range(10)]
+        index = NoteIndex(vault, use_cache=False)
+        index.refresh()
+        matrix = ConceptMatrix(index)
+        matrix.refresh()
+        # 절반을 바꾸면 전체 재계산하고, 사라진 개념은 행렬에서 빠짐
+        for path in paths[:5]:
+            path.unlink()
+            index.update_path(path)
+        assert matrix.refresh() == 5
+        remaining = [record.concepts for record in index]
+        for a, b in itertools.product(CONCEPTS, repeat=2):
+            expected = sum(1 for concepts in remaining if a in concepts and b in concepts)
+            assert matrix.cooccurrence(a, b) == expected
+
+if __name__ == "__main__":
+    test_incremental_matches_rebuild()
+    test_many_changes_rebuild()
+    print("개념 행렬 테스트 통과")
@@ -0,0 +1,58 @@
+"""
+크롤러 예산 제한과 재개 확인 (모델 응답은 test_pipeline의 고정값 사용)
+
+    python -m pytest test_crawler.py
+"""
+import tempfile
+from pathlib import Path
+from src.crawler import CrawlState, OntologyCrawler
+from test_pipeline import make_ontology
+
+CONCEPTS = ['카프카', '파티션', '브로커']
+
+def test_note_budget_and_resume():
+    with tempfile.TemporaryDirectory() as vault:
+        ontology = make_ontology(vault, CONCEPTS)
+        db_path = Path(vault) / 'crawl.sqlite'
+        state = CrawlState(db_path)
+        try:
+            counts = OntologyCrawler(ontology, state, max_depth=1, max_notes=1, workers=2).run(['카프카'])
+            assert counts == {'done': 1, 'pending': 2}
+        finally:
+            state.close()
+
+        # 같은 상태 파일로 예산을 늘려 다시 실행하면 남은 개념만 처리 (노트 수 예산은 이전 실행 포함)
+        state = CrawlState(db_path)
+        try:
+            crawler = OntologyCrawler(ontology, state, max_depth=1, max_notes=3, workers=2)
+            assert crawler.notes_created() == 1
+            counts = crawler.run([])
+            assert counts == {'done': 3}
+            assert crawler.notes_created() == 3
+            assert {Path(p).stem for p in ontology.index.records} >= {'카프카', '파티션', '브로커'}
+        finally:
+            state.close()
+
+def test_token_budget_and_recover():
+    with tempfile.TemporaryDirectory() as vault:
+        ontology = make_ontology(vault, CONCEPTS)
+        state = CrawlState(Path(vault) / 'crawl.sqlite')
+        try:
+            # 이전 실행에서 토큰 예산을 다 썼으면 노트를 만들지 않고 개념을 대기열에 남김
+            state.add_meta('tokens', 1000)
+            crawler = OntologyCrawler(ontology, state, max_depth=1, max_tokens=1000, workers=1)
+            assert crawler.run(['카프카']) == {'pending': 1}
+            assert crawler.notes_created() == 0
+
+            # 비정상 종료로 running에 남은 개념은 다음 실행에서 다시 처리
+            assert state.claim(max_depth=1)['concept'] == '카프카'
+            assert state.counts() == {'running': 1}
+            crawler = OntologyCrawler(ontology, state, max_depth=0, max_tokens=10_000, workers=1)
+            assert crawler.run([]) == {'done': 1}
+        finally:
+            state.close()
+
+if __name__ == "__main__":
+    test_note_budget_and_resume()
+    test_token_budget_and_recover()
+    print("크롤러 테스트 통과")
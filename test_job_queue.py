@@ -0,0 +1,111 @@
+"""
+작업 큐 처리 확인 (모델 응답은 test_pipeline의 고정값 사용)
+
+    python -m pytest test_job_queue.py
+"""
+import tempfile
+import time
+from pathlib import Path
+import frontmatter
+from src.api.llm_client import LLMClient
+from src.job_queue import JobQueue, JobRunner, RETRY_BASE_SECONDS
+from test_pipeline import StubModel, make_ontology
+
+class FlakyModel(StubModel):
+    """온톨로지 추출 요청을 처음 fail_times번 실패시키고 요청 수를 셈"""
+    def __init__(self, concepts, fail_times=0):
+        super().__init__(concepts)
+        self.fail_times = fail_times
+        self.calls = []
+
+    def generate_content(self, prompt, **kwargs):
+        kind = 'ontology' if '주요 개념들과' in prompt else 'content'
+        self.calls.append(kind)
+        if kind == 'ontology' and self.fail_times:
+            self.fail_times -= 1
+            raise RuntimeError('일시적 오류')
+        return super().generate_content(prompt, **kwargs)
+
+def run_queue(vault, items, upsert=True):
+    queue = JobQueue(Path(vault) / 'jobs.sqlite')
+    try:
+        queue.enqueue(items)
+        return JobRunner(make_ontology(vault, ['카프카', '파티션', '브로커']), queue, workers=1, upsert=upsert).run()
+    finally:
+        queue.close()
+
+def test_upsert_keeps_hand_written_note():
+    with tempfile.TemporaryDirectory() as vault:
+        note = Path(vault) / 'Apache-Kafka.md'
+        note.write_text("---\ntitle: Apache Kafka\naliases: [카프카]\ntags: [직접작성]\n---\n직접 쓴 본문\n",
+                        encoding='utf-8')
+
+        counts = run_queue(vault, [('카프카', None)])
+        assert counts == {'done': 1}
+
+        # 별칭으로 찾은 노트에 메타데이터만 합치고 새 파일은 만들지 않음
+        assert sorted(path.name for path in Path(vault).glob('*.md')) == ['Apache-Kafka.md']
+        post = frontmatter.load(str(note))
+        assert post.content == '직접 쓴 본문'
+        assert post.metadata['tags'] == ['직접작성']
+        assert set(post.metadata['concepts']) == {'카프카', '파티션', '브로커'}
+        assert post.metadata['source_hash']
+
+def test_queued_note_has_related_notes():
+    with tempfile.TemporaryDirectory() as vault:
+        (Path(vault) / '파티션.md').write_text("---\nconcepts: [파티션, 카프카]\n---\n파티션 설명\n", encoding='utf-8')
+        assert run_queue(vault, [('카프카', None)], upsert=False) == {'done': 1}
+        text = (Path(vault) / '카프카.md').read_text(encoding='utf-8')
+        assert '## 관련 노트' in text and '[[파티션.md]]' in text
+
+def test_failed_job_backs_off_and_recovers():
+    with tempfile.TemporaryDirectory() as vault:
+        queue = JobQueue(Path(vault) / 'jobs.sqlite')
+        try:
+            queue.enqueue([('카프카', None)])
+            job = queue.claim()
+            queue.fail(job['id'], '오류')
+            # 첫 실패 후에는 RETRY_BASE_SECONDS 동안 다시 가져가지 않음
+            assert queue.claim() is None
+            assert queue.next_retry() - time.time() > RETRY_BASE_SECONDS * 0.9
+            queue.conn.execute('UPDATE jobs SET not_before = 0')
+            job = queue.claim()
+            queue.fail(job['id'], '오류')
+            assert queue.next_retry() - time.time() > RETRY_BASE_SECONDS * 1.9
+
+            # 'running'에서 멈춘 작업은 다시 열 때 대기 상태로 돌아감
+            queue.conn.execute('UPDATE jobs SET not_before = 0')
+            queue.claim()
+        finally:
+            queue.close()
+        queue = JobQueue(Path(vault) / 'jobs.sqlite')
+        try:
+            assert queue.recover() == 1
+            assert queue.counts() == {'pending': 1}
+        finally:
+            queue.close()
+
+def test_resume_skips_checkpointed_stages():
+    with tempfile.TemporaryDirectory() as vault:
+        queue = JobQueue(Path(vault) / 'jobs.sqlite')
+        try:
+            queue.enqueue([('카프카', None)])
+            ontology = make_ontology(vault, ['카프카', '파티션'])
+            model = FlakyModel(['카프카', '파티션'], fail_times=1)
+            ontology.llm = LLMClient(model, 'stub')
+            # 재시도 없이 실패로 끝나도록 한 번만 시도
+            assert JobRunner(ontology, queue, workers=1, max_attempts=1).run() == {'failed': 1}
+            assert model.calls == ['content', 'ontology']
+
+            queue.retry_failed()
+            assert JobRunner(ontology, queue, workers=1).run() == {'done': 1}
+            # 본문 생성은 체크포인트에서 읽고 실패한 온톨로지 단계부터 다시 실행
+            assert model.calls == ['content', 'ontology', 'ontology']
+        finally:
+            queue.close()
+
+if __name__ == "__main__":
+    test_upsert_keeps_hand_written_note()
+    test_queued_note_has_related_notes()
+    test_failed_job_backs_off_and_recovers()
+    test_resume_skips_checkpointed_stages()
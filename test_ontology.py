@@ -1,9 +1,8 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import frontmatter
 import google.generativeai as genai
 from dotenv import load_dotenv
-import re
 import yaml
 from datetime import datetime
 from src.utils.vault_finder import find_obsidian_vaults
@@ -11,6 +10,26 @@ from src.note_manager import NoteManager
 from src.visualizer import OntologyVisualizer
 from src.tagger import AutoTagger
 from src.template_manager import TemplateManager
+from src.utils.vault_scanner import get_state_dir
+from src.tracing import span, token_counts
+from src.api.llm_client import LLMClient
+from src.api.usage import usage_tracker
+from src.api.scheduler import llm_scheduler
+from src.profiling import profiled
+from src.note_index import NoteIndex, estimate_tokens
+from src.pipeline import Pipeline
+from src.concept_matrix import ConceptMatrix
+from src.centrality import Centrality, prune_ontology
+from src.query_service import QueryClient, QueryServiceError
+from src.ontology_parser import extract_ontology, OntologyParseError
+from src.ontology import warm_up_ontology, STAGE_WORKERS
+
+# 연결 제안 프롬프트에 넣을 기존 노트 발췌의 토큰 예산
+SUGGESTION_TOKEN_BUDGET = 1500
+# 노트에 넣을 관련 노트 수 (겹치는 개념 수, 볼트 중심성 순)
+RELATED_NOTES_LIMIT = 20
+# 동시 등장 점수로 찾은 후보 중 LLM에게 연결 이유 설명을 맡길 노트 수
+SUGGESTION_EXPLAIN_LIMIT = 5
 
 class ObsidianOntology:
     def __init__(self, vault_path=None):
@@ -25,67 +44,69 @@ class ObsidianOntology:
         self.vault_path = Path(vault_path)
         self.note_manager = NoteManager(self.vault_path)
         self.template_manager = TemplateManager(self.vault_path)
+        self.index = NoteIndex(self.vault_path)
+        self.concept_matrix = ConceptMatrix(self.index)
+        self.centrality = Centrality(self.index)
+        # 상주 조회 서비스가 실행 중이면 관련 노트 조회를 서비스에 맡김 (warm_up에서 연결)
+        self.query_client = None
+        # 노트마다 스레드 풀을 만들지 않도록 모든 파이프라인이 같은 풀을 사용
+        self.stage_executor = ThreadPoolExecutor(max_workers=STAGE_WORKERS, thread_name_prefix='stage')
         
         # API 설정
         load_dotenv()
         api_key = os.getenv('GEMINI_API_KEY')
         genai.configure(api_key=api_key)
         self.model = genai.GenerativeModel('gemini-pro')
+        # 제목, 온톨로지 추출 같은 짧은 호출은 라우트 설정에 따라 빠른 모델 사용 (src/api/routing.py)
+        self.llm = LLMClient(self.model, 'gemini-pro', model_factory=genai.GenerativeModel)
+        
+        # 호출별 사용량을 볼트 상태 디렉토리에 누적 기록
+        if usage_tracker.log_path is None:
+            usage_tracker.configure(get_state_dir(self.vault_path) / 'llm_usage.jsonl')
+        # 공유를 켜면 같은 볼트를 쓰는 GUI와 CLI 배치 프로세스가 LLM 슬롯과 호출 수를 함께 나눠 씀
+        if llm_scheduler.share_enabled and llm_scheduler.shared is None:
+            llm_scheduler.share(get_state_dir(self.vault_path) / 'llm_scheduler.sqlite')
         
         # 태거 초기화
-        self.tagger = AutoTagger(self.model)
+        self.tagger = AutoTagger()
+
+    # 템플릿 컴파일, 조회 서비스 연결, 인덱스 로드 (src.ontology.warm_up_ontology)
+    warm_up = warm_up_ontology
+
+    def close(self):
+        """파이프라인 스레드 풀 종료 (실행 중인 단계는 끝날 때까지 대기)"""
+        self.stage_executor.shutdown()
 
     def extract_ontology(self, text):
         """텍스트에서 온톨로지 관계를 추출"""
         prompt = f"""
 다음 텍스트를 분석하여 개념들 간의 관계를 추출해주세요.
-마크다운이나 코드 블록을 사용하지 말고, 순수한 YAML 형식으로만 응답해주세요.
-
-예시 형식:
-concepts:
-  - 개념1
-  - 개념2
-relationships:
-  - type: is_a
-    source: 개념1
-    target: 개념2
-    description: 관계 설명
 
 텍스트:
 {text}
 """
-        response = self.model.generate_content(prompt)
-        yaml_text = response.text.strip()
-        
-        # 마크다운 코드 블록이 있다면 제거
-        yaml_text = re.sub(r'^```yaml\s*|```\s*$', '', yaml_text)
-        
-        # YAML 형식에서 frontmatter 구분자(---)를 제거
-        yaml_text = re.sub(r'^---\s*|---\s*$', '', yaml_text)
-        
-        # YAML 파싱
         try:
-            ontology = yaml.safe_load(yaml_text)
-            return ontology if isinstance(ontology, dict) else {'concepts': [], 'relationships': []}
-        except Exception as e:
-            print(f"YAML 파싱 오류: {e}")
+            with span('ontology') as sp:
+                return extract_ontology(self.llm, prompt, caller='ontology', sp=sp)
+        except OntologyParseError as e:
+            print(f"온톨로지 파싱 오류: {e}")
             return {'concepts': [], 'relationships': []}
 
+    @profiled('find_related_notes')
     def find_related_notes(self, concepts):
-        """주어진 개념들과 관련된 노트들을 찾음"""
-        related_notes = []
-        for note_path in self.vault_path.glob("**/*.md"):
+        """주어진 개념들과 관련된 노트들을 찾음 (조회 서비스가 실행 중이면 서비스 사용)"""
+        if self.query_client is not None:
             try:
-                with open(note_path, 'r', encoding='utf-8') as f:
-                    metadata = frontmatter.load(f)
-                    if 'concepts' in metadata.metadata:
-                        note_concepts = set(metadata.metadata['concepts'])
-                        if note_concepts.intersection(concepts):
-                            related_notes.append(note_path)
-            except Exception as e:
-                print(f"Error processing {note_path}: {e}")
-        return related_notes
+                return [self.vault_path / entry['path']
+                        for entry in self.query_client.related(concepts=concepts, limit=RELATED_NOTES_LIMIT)]
+            except QueryServiceError as e:
+                print(f"조회 서비스를 사용할 수 없어 로컬 인덱스를 사용합니다: {e}")
+                self.query_client = None
+        self.index.refresh()
+        return [record.path for record in self.centrality.rank_by_concepts(concepts, limit=RELATED_NOTES_LIMIT)]
 
+    # 단계는 파이프라인 스레드에서 실행되므로 CPU는 단계별로 측정 (process_new_note.<단계>)
+    @profiled('process_new_note', cpu=False)
     def process_new_note(self, title, content, template_name='default.md'):
         """새로운 노트 처리"""
         print(f"\n=== '{title}' 노트 처리 중 ===")
@@ -100,27 +121,51 @@ relationships:
 
 주제: {content}
 """
-        response = self.model.generate_content(generate_prompt)
-        generated_content = response.text.strip()
+        def generate():
+            with span('content', title=title) as sp:
+                response = self.llm.generate(generate_prompt, caller='content')
+                generated = response.text.strip()
+                sp.set(bytes=len(generated.encode('utf-8')), **token_counts(response))
+            return generated
         
-        # 2. 온톨로지 추출
-        ontology = self.extract_ontology(generated_content)
-        print("\n추출된 온톨로지:")
-        print(yaml.dump(ontology, allow_unicode=True))
+        def extract(content):
+            ontology = self.extract_ontology(content)
+            print("\n추출된 온톨로지:")
+            print(yaml.dump(ontology, allow_unicode=True))
+            return ontology
         
-        # 3. 태그 생성
-        text_tags = self.tagger.extract_tags(generated_content)
-        ontology_tags = self.tagger.suggest_tags_from_ontology(ontology)
-        keywords = self.tagger.extract_keywords(generated_content)
-        tags = self.tagger.combine_tags(text_tags, ontology_tags, keywords)
+        def tag(content, ontology):
+            with span('tags'):
+                text_tags = self.tagger.extract_tags(content)
+                ontology_tags = self.tagger.suggest_tags_from_ontology(ontology)
+                keywords = self.tagger.extract_keywords(content)
+                return self.tagger.combine_tags(text_tags, ontology_tags, keywords)
         
-        # 4. 관련 노트 찾기
-        concepts = self._extract_concepts_from_yaml(ontology)
-        related_notes = self.find_related_notes(concepts)
+        def related(ontology, index):
+            concepts = self._extract_concepts_from_yaml(ontology)
+            return [record.path for record in self.centrality.rank_by_concepts(concepts, limit=RELATED_NOTES_LIMIT)]
         
-        # 5. 시각화
-        visualizer = OntologyVisualizer()
-        mermaid_diagram = visualizer.generate_mermaid(ontology)
+        def visualize(ontology, index):
+            with span('mermaid'):
+                # 볼트에서 중심성이 높은 개념 위주로 노드 수 제한
+                return OntologyVisualizer().generate_mermaid(prune_ontology(ontology, self.centrality.score))
+        
+        # 1. 내용 생성과 인덱스 갱신은 동시에, 2. 온톨로지 추출 후
+        # 3~5. 태그 생성, 관련 노트 찾기, 시각화를 동시에 실행
+        pipeline = Pipeline(profile='process_new_note', executor=self.stage_executor)
+        pipeline.add('content', generate)
+        pipeline.add('index', self.index.refresh)
+        pipeline.add('ontology', extract, deps=('content',))
+        pipeline.add('tags', tag, deps=('content', 'ontology'))
+        pipeline.add('related', related, deps=('ontology', 'index'))
+        pipeline.add('mermaid', visualize, deps=('ontology', 'index'))
+        results = pipeline.run()
+        generated_content = results['content']
+        ontology = results['ontology']
+        tags = results['tags']
+        related_notes = results['related']
+        mermaid_diagram = results['mermaid']
+        concepts = self._extract_concepts_from_yaml(ontology)
         
         # 6. 노트 생성
         metadata = {
@@ -142,37 +187,54 @@ relationships:
         }
         
         # 노트 생성
-        note_content = self.template_manager.render_template(template_name, template_vars)
+        with span('render', template=template_name):
+            note_content = self.template_manager.render_template(template_name, template_vars)
         note_path = self.note_manager.create_note(title, note_content)
         
         print(f"\n노트가 생성되었습니다: {note_path}")
         return note_path
 
-    def suggest_connections(self, text):
-        """새로운 텍스트와 기존 노트들 사이의 연결 제안"""
+    @profiled('suggest_connections')
+    def suggest_connections(self, text, explain=True):
+        """새로운 텍스트와 기존 노트들 사이의 연결 제안
+
+        후보 노트와 관련 개념은 개념 동시 등장 행렬로 로컬에서 찾고,
+        explain이 True면 상위 SUGGESTION_EXPLAIN_LIMIT개 노트만 LLM에게 연결 이유를 설명하게 함
+        """
         # 1. 온톨로지 추출
         ontology = self.extract_ontology(text)
         print("=== 추출된 온톨로지 ===")
         print(ontology)
         print()
 
-        # 2. 관련 노트 찾기
+        # 2. 관련 노트 찾기 (API 호출 없음)
         concepts = self._extract_concepts_from_yaml(ontology)
-        related_notes = self.find_related_notes(concepts)
-        
-        if related_notes:
+        self.index.refresh()
+        candidates = self.concept_matrix.suggest_notes(concepts)
+        related_concepts = self.concept_matrix.related_concepts(concepts)
+
+        if related_concepts:
+            print("=== 함께 자주 등장하는 개념 ===")
+            for concept, score, count in related_concepts:
+                print(f"- {concept} (PMI {score:.2f}, {count}개 노트)")
+            print()
+
+        if candidates:
             print("=== 관련된 노트들 ===")
-            for note in related_notes:
-                print(f"- {note.name}")
+            for record, score in candidates:
+                print(f"- {record.path.name} ({score:.2f})")
             print()
 
-            # 3. 연결 관계 제안
-            notes_content = self._get_notes_content(related_notes)
-            suggestions = self._generate_connection_suggestions(text, notes_content)
-            print("=== 제안된 연결 관계 ===")
-            print(suggestions)
+            # 3. 상위 후보만 연결 관계 설명 (예산 안에서 노트 발췌만 사용)
+            if explain:
+                top = [record for record, _ in candidates[:SUGGESTION_EXPLAIN_LIMIT]]
+                notes_content = self._select_note_snippets(top)
+                suggestions = self._generate_connection_suggestions(text, notes_content)
+                print("=== 제안된 연결 관계 ===")
+                print(suggestions)
         else:
             print("관련된 노트를 찾을 수 없습니다.")
+        return candidates
 
     def _extract_concepts_from_yaml(self, ontology):
         """온톨로지에서 개념 리스트 추출"""
@@ -180,21 +242,22 @@ relationships:
             return set(ontology['concepts'])
         return set()
 
-    def _get_notes_content(self, note_paths):
-        """노트들의 내용을 가져옴"""
-        contents = []
-        for path in note_paths:
-            try:
-                with open(path, 'r', encoding='utf-8') as f:
-                    post = frontmatter.load(f)
-                    contents.append({
-                        'title': path.stem,
-                        'content': post.content,
-                        'metadata': post.metadata
-                    })
-            except Exception as e:
-                print(f"Error reading {path}: {e}")
-        return contents
+    def _select_note_snippets(self, records, token_budget=SUGGESTION_TOKEN_BUDGET):
+        """순위가 높은 노트부터 예산이 찰 때까지 인덱스의 발췌를 모음 (파일은 읽지 않음)"""
+        selected = []
+        used = 0
+        for record in records:
+            entry = {
+                'title': record.title,
+                'content': record.snippet,
+                'metadata': {'concepts': list(record.concepts), 'tags': list(record.tags)}
+            }
+            cost = estimate_tokens(record.title) + estimate_tokens(record.snippet)
+            if selected and used + cost > token_budget:
+                break
+            selected.append(entry)
+            used += cost
+        return selected
 
     def _generate_connection_suggestions(self, new_text, existing_notes):
         """새로운 텍스트와 기존 노트들 사이의 연결 관계 제안"""
@@ -209,14 +272,14 @@ relationships:
 {existing_notes}
 """
         formatted_notes = "\n".join([
-            f"제목: {note['title']}\n내용: {note['content'][:200]}..." 
+            f"제목: {note['title']}\n내용: {note['content']}"
             for note in existing_notes
         ])
         
-        response = self.model.generate_content(prompt.format(
+        response = self.llm.generate(prompt.format(
             new_text=new_text,
             existing_notes=formatted_notes
-        ))
+        ), caller='suggest_connections')
         return response.text
 
 def test_ontology():
@@ -0,0 +1,93 @@
+"""
+API 없이 노트 생성 파이프라인 확인 (모델 응답을 고정값으로 대체)
+
+    python -m pytest test_pipeline.py
+"""
+import json
+import tempfile
+import threading
+from pathlib import Path
+from src.api.llm_client import LLMClient
+from src.ontology import ObsidianOntology
+from src.crawler import CrawlState, OntologyCrawler
+from src.pipeline import Pipeline
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+        self.usage_metadata = None
+
+class StubModel:
+    """온톨로지 추출 요청에는 concepts의 개념으로 JSON을, 그 외에는 짧은 본문을 반환"""
+    def __init__(self, concepts):
+        self.concepts = concepts
+
+    def generate_content(self, prompt, **kwargs):
+        if '주요 개념들과' in prompt:
+            title = self.concepts[0]
+            return StubResponse(json.dumps({
+                'concepts': self.concepts,
+                'relationships': [
+                    {'source': concept, 'target': title, 'type': 'part_of', 'description': '구성요소'}
+                    for concept in self.concepts[1:]
+                ],
+            }, ensure_ascii=False))
+        return StubResponse("## 정의\n- 테스트용 본문\n")
+
+def make_ontology(vault_path, concepts):
+    ontology = ObsidianOntology(vault_path)
+    ontology.llm = LLMClient(StubModel(concepts), 'stub')
+    ontology.warm_up()
+    return ontology
+
+def test_generated_note_has_concepts():
+    with tempfile.TemporaryDirectory() as vault:
+        ontology = make_ontology(vault, ['카프카', '파티션', '브로커'])
+        note_path = ontology.process_new_note('카프카', upsert=True)
+        assert note_path is not None
+
+        ontology.index.refresh()
+        record = ontology.index.records[str(note_path)]
+        assert set(record.concepts) == {'카프카', '파티션', '브로커'}
+        assert '## 관계' in Path(note_path).read_text(encoding='utf-8')
+        print(f"개념: {record.concepts}, 태그: {record.tags}")
+
+def test_crawl_queues_child_concepts():
+    with tempfile.TemporaryDirectory() as vault:
+        ontology = make_ontology(vault, ['카프카', '파티션', '브로커'])
+        state = CrawlState(Path(vault) / 'crawl.sqlite')
+        try:
+            # 노트 하나만 만들 수 있으므로 시드의 하위 개념은 대기열에 남음
+            crawler = OntologyCrawler(ontology, state, max_depth=1, max_notes=1, workers=2)
+            counts = crawler.run(['카프카'])
+            assert counts == {'done': 1, 'pending': 2}
+            assert state.known(['파티션', '브로커']) == {'파티션', '브로커'}
+            print(f"크롤링 결과: {counts}")
+        finally:
+            state.close()
+
+def test_pipeline_reuses_executor():
+    threads = []
+    with Pipeline(max_workers=2) as pipeline:
+        pipeline.add('a', lambda: threading.current_thread())
+        pipeline.add('b', lambda a: threading.current_thread(), deps=('a',))
+        for _ in range(3):
+            threads.extend(pipeline.run().values())
+        executor = pipeline._executor
+    # 실행마다 풀을 새로 만들지 않고, close() 뒤에는 풀이 닫힘
+    assert len(set(threads)) <= 2
+    assert executor._shutdown
+
+    with tempfile.TemporaryDirectory() as vault:
+        ontology = make_ontology(vault, ['카프카', '파티션', '브로커'])
+        for topic in ('카프카', '파티션', '브로커'):
+            assert ontology.process_new_note(topic) is not None
+        # 노트마다 만드는 파이프라인은 온톨로지의 공용 풀을 사용
+        stage_threads = {t for t in threading.enumerate() if t.name.startswith('stage')}
+        assert stage_threads <= set(ontology.stage_executor._threads)
+        ontology.close()
+
+if __name__ == "__main__":
+    test_generated_note_has_concepts()
+    test_crawl_queues_child_concepts()
+    test_pipeline_reuses_executor()
@@ -0,0 +1,87 @@
+"""
+조회 서비스 HTTP 상태 코드와 관련 노트 순위 확인
+
+    python -m pytest test_query_service.py
+"""
+import http.client
+import json
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from src.query_service import VaultQueryModel, QueryClient, QueryServiceError, _make_handler
+
+NOTES = {
+    '카프카.md': "---\ntitle: 카프카\nconcepts: [브로커, 파티션, 로그]\n---\n[[파티션]] [[브로커]]\n",
+    '파티션.md': "---\ntitle: 파티션\nconcepts: [파티션, 로그]\n---\n[[카프카]]\n",
+    '브로커.md': "---\ntitle: 브로커\nconcepts: [브로커]\n---\n[[카프카]]\n",
+    '요리.md': "---\ntitle: 요리\nconcepts: [레시피]\n---\n본문\n",
+}
+
+def serve(vault):
+    model = VaultQueryModel(vault)
+    model.refresh()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _make_handler(model))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return model, server
+
+def get(port, path):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    try:
+        conn.request('GET', path)
+        response = conn.getresponse()
+        return response.status, json.loads(response.read().decode('utf-8'))
+    finally:
+        conn.close()
+
+def test_status_codes():
+    with tempfile.TemporaryDirectory() as vault:
+        for name, text in NOTES.items():
+            (Path(vault) / name).write_text(text, encoding='utf-8')
+        model, server = serve(vault)
+        port = server.server_address[1]
+        try:
+            status, body = get(port, '/related?title=%EC%B9%B4%ED%94%84%EC%B9%B4&limit=5')
+            assert status == 200
+            assert [entry['title'] for entry in body['result']] == ['파티션', '브로커']
+            assert get(port, '/unknown')[0] == 404
+            # 필수 파라미터 누락과 정수가 아닌 값은 서버 오류(500)가 아니라 400
+            assert get(port, '/backlinks')[0] == 400
+            status, body = get(port, '/related?title=x&limit=abc')
+            assert status == 400 and 'limit' in body['error']
+            assert get(port, '/neighborhood?concept=x&depth=1.5')[0] == 400
+
+            client = QueryClient(port)
+            assert client.query('health')['notes'] == len(NOTES)
+            try:
+                client.query('related', title='x', limit='abc')
+            except QueryServiceError as e:
+                assert 'limit' in str(e)
+            else:
+                raise AssertionError("QueryServiceError가 발생해야 함")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+def test_related_uses_current_index():
+    with tempfile.TemporaryDirectory() as vault:
+        for name, text in NOTES.items():
+            (Path(vault) / name).write_text(text, encoding='utf-8')
+        model = VaultQueryModel(vault)
+        model.refresh()
+        assert [entry['title'] for entry in model.related(concepts=['로그'])] == ['카프카', '파티션']
+        # 순위를 다시 계산하기 전에 추가된 노트도 결과에 포함 (PageRank 0점)
+        note = Path(vault) / '로그.md'
+        note.write_text("---\ntitle: 로그\nconcepts: [로그]\n---\n본문\n", encoding='utf-8')
+        model.index.update_path(note)
+        assert [entry['title'] for entry in model.related(concepts=['로그'])] == ['카프카', '파티션', '로그']
+        # 제외한 노트는 순위 계산 전에 빠지므로 limit만큼 채워짐
+        titles = [record.title for record in
+                  model.centrality.rank_by_concepts(['로그'], limit=2, exclude=(model.index.get_by_title('카프카').file,))]
+        assert titles == ['파티션', '로그']
+
+if __name__ == "__main__":
+    test_status_codes()
+    test_related_uses_current_index()
+    print("조회 서비스 테스트 통과")
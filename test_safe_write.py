@@ -0,0 +1,78 @@
+"""
+노트 동시 쓰기 보호 확인 (충돌 감지, 재적용, 심볼릭 링크와 권한 유지)
+
+    python -m pytest test_safe_write.py
+"""
+import os
+import stat
+import tempfile
+from pathlib import Path
+from src.obsidian.safe_write import (
+    WriteConflict, read_versioned, write_if_unchanged, update_file, atomic_write, UMASK,
+)
+
+def test_write_if_unchanged_detects_conflict():
+    with tempfile.TemporaryDirectory() as vault:
+        note = Path(vault) / 'note.md'
+        # 없어야 하는 파일(None)은 새로 쓰고, 이미 있으면 충돌
+        write_if_unchanged(note, 'v1', None)
+        try:
+            write_if_unchanged(note, 'other', None)
+        except WriteConflict:
+            pass
+        else:
+            raise AssertionError("WriteConflict가 발생해야 함")
+
+        text, version = read_versioned(note)
+        assert text == 'v1'
+        note.write_text('다른 프로그램이 수정', encoding='utf-8')
+        try:
+            write_if_unchanged(note, 'v2', version)
+        except WriteConflict:
+            pass
+        else:
+            raise AssertionError("WriteConflict가 발생해야 함")
+        assert note.read_text(encoding='utf-8') == '다른 프로그램이 수정'
+
+def test_update_file_reapplies_after_conflict():
+    with tempfile.TemporaryDirectory() as vault:
+        note = Path(vault) / 'note.md'
+        note.write_text('본문\n', encoding='utf-8')
+        calls = []
+
+        def transform(text):
+            calls.append(text)
+            if len(calls) == 1:
+                # 변환하는 동안 다른 쓰기가 끼어듦
+                note.write_text('본문\n추가된 줄\n', encoding='utf-8')
+            return text + '태그\n'
+
+        assert update_file(note, transform) == '본문\n추가된 줄\n태그\n'
+        assert calls == ['본문\n', '본문\n추가된 줄\n']
+        assert note.read_text(encoding='utf-8') == '본문\n추가된 줄\n태그\n'
+        # 바뀌지 않으면 쓰지 않음
+        assert update_file(note, lambda text: text) is None
+
+def test_atomic_write_keeps_symlink_and_mode():
+    with tempfile.TemporaryDirectory() as vault:
+        target = Path(vault) / 'target.md'
+        target.write_text('원본', encoding='utf-8')
+        os.chmod(target, 0o640)
+        link = Path(vault) / 'link.md'
+        link.symlink_to(target)
+
+        atomic_write(link, '새 내용')
+        assert link.is_symlink()
+        assert target.read_text(encoding='utf-8') == '새 내용'
+        assert stat.S_IMODE(target.stat().st_mode) == 0o640
+
+        new_note = Path(vault) / 'new.md'
+        atomic_write(new_note, '새 노트')
+        assert stat.S_IMODE(new_note.stat().st_mode) == 0o666 & ~UMASK
+        assert not [p for p in Path(vault).iterdir() if p.suffix == '.tmp']
+
+if __name__ == "__main__":
+    test_write_if_unchanged_detects_conflict()
+    test_update_file_reapplies_after_conflict()
+    test_atomic_write_keeps_symlink_and_mode()
+    print("safe_write 테스트 통과")
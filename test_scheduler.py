@@ -0,0 +1,102 @@
+"""
+LLM 스케줄러 우선순위와 INTERACTIVE 예약분 확인
+
+    python -m pytest test_scheduler.py
+"""
+import tempfile
+import threading
+import time
+from pathlib import Path
+from src.api.scheduler import LLMScheduler, INTERACTIVE, INCREMENTAL, BULK
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "시간 안에 조건을 만족하지 못함"
+        time.sleep(0.01)
+
+def start_waiter(scheduler, level, granted):
+    """슬롯을 받으면 level을 granted에 기록하고 바로 반납하는 스레드"""
+    def run():
+        with scheduler.slot(level):
+            granted.append(level)
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+def waiting(scheduler):
+    return sum(scheduler.snapshot()['waiting'].values())
+
+def test_grants_in_priority_order():
+    scheduler = LLMScheduler(max_concurrent=1, interactive_slots=0)
+    granted = []
+    scheduler.acquire(BULK)
+    threads = []
+    for n, level in enumerate((BULK, INCREMENTAL, INTERACTIVE), 1):
+        threads.append(start_waiter(scheduler, level, granted))
+        wait_until(lambda: waiting(scheduler) == n)
+    scheduler.release()
+    for thread in threads:
+        thread.join(5)
+    assert granted == [INTERACTIVE, INCREMENTAL, BULK]
+    assert scheduler.snapshot()['stats']['incremental']['granted'] == 1
+
+def test_old_request_ages_past_new_interactive():
+    scheduler = LLMScheduler(max_concurrent=1, interactive_slots=0, aging=0.05)
+    granted = []
+    scheduler.acquire(INTERACTIVE)
+    bulk = start_waiter(scheduler, BULK, granted)
+    wait_until(lambda: waiting(scheduler) == 1)
+    # AGING_SECONDS * 2보다 오래 기다린 BULK 요청은 새 INTERACTIVE 요청보다 앞섬
+    time.sleep(0.2)
+    interactive = start_waiter(scheduler, INTERACTIVE, granted)
+    wait_until(lambda: waiting(scheduler) == 2)
+    scheduler.release()
+    bulk.join(5)
+    interactive.join(5)
+    assert granted == [BULK, INTERACTIVE]
+
+def test_interactive_reserve():
+    scheduler = LLMScheduler(max_concurrent=3, interactive_slots=1)
+    scheduler.acquire(BULK)
+    scheduler.acquire(INCREMENTAL)
+    granted = []
+    # 배치 요청은 INTERACTIVE 몫으로 남긴 마지막 슬롯을 쓰지 못함
+    blocked = start_waiter(scheduler, INCREMENTAL, granted)
+    wait_until(lambda: waiting(scheduler) == 1)
+    interactive = start_waiter(scheduler, INTERACTIVE, granted)
+    interactive.join(5)
+    assert granted == [INTERACTIVE]
+    scheduler.release()
+    blocked.join(5)
+    assert granted == [INTERACTIVE, INCREMENTAL]
+    scheduler.release()
+
+def test_shared_reserve_across_schedulers():
+    with tempfile.TemporaryDirectory() as state:
+        db_path = Path(state) / 'llm_scheduler.sqlite'
+        batch = LLMScheduler(max_concurrent=2, interactive_slots=1)
+        gui = LLMScheduler(max_concurrent=2, interactive_slots=1)
+        batch.share(db_path)
+        gui.share(db_path)
+        try:
+            granted = []
+            with batch.slot(BULK):
+                # 다른 프로세스(스케줄러)의 배치 요청은 남은 슬롯을 쓰지 못하고 GUI 요청만 실행됨
+                blocked = start_waiter(gui, BULK, granted)
+                wait_until(lambda: gui.shared.counts()['waiting'].get('bulk') == 1)
+                with gui.slot(INTERACTIVE):
+                    granted.append(INTERACTIVE)
+                assert granted == [INTERACTIVE]
+            blocked.join(5)
+            assert granted == [INTERACTIVE, BULK]
+        finally:
+            batch.share(None)
+            gui.share(None)
+
+if __name__ == "__main__":
+    test_grants_in_priority_order()
+    test_old_request_ages_past_new_interactive()
+    test_interactive_reserve()
+    test_shared_reserve_across_schedulers()
+    print("스케줄러 테스트 통과")
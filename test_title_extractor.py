@@ -0,0 +1,32 @@
+"""
+로컬 제목 추출 규칙 확인
+
+    python -m pytest test_title_extractor.py
+"""
+from src.title_extractor import extract_title
+
+CASES = [
+    # (입력, 제목, 확신 여부)
+    ('카프카', '카프카', True),
+    ('인공지능이란 무엇인가?', '인공지능', True),
+    ('인공지능이란?', '인공지능', True),
+    ('데이터베이스 정규화란?', '데이터베이스 정규화', True),
+    ('윤리학의 기본 개념', '윤리학', True),
+    ('자연어 처리 시스템', '자연어 처리', True),
+    # 질문이 아니면 '란'/'이란'으로 끝나도 단어의 일부로 봄
+    ('파이란', '파이란', True),
+    ('정규화란', '정규화란', True),
+    # 받침 없는 음절 뒤의 '이란'은 조사가 아님
+    ('파이란?', '파이', True),
+    # 걷어낸 뒤 한 글자만 남으면 LLM에 맡김
+    ('이란?', '이', False),
+    ('C란?', 'C', False),
+]
+
+def test_extract_title():
+    for content, title, confident in CASES:
+        assert extract_title(content) == (title, confident), content
+
+if __name__ == "__main__":
+    test_extract_title()
+    print("ok")
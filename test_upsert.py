@@ -0,0 +1,55 @@
+"""
+upsert 처리 방법 결정과 메타데이터 병합 확인 (API 호출 없음)
+
+    python -m pytest test_upsert.py
+"""
+import tempfile
+from pathlib import Path
+from src.note_index import NoteIndex
+from src.upsert import plan_upsert, merge_metadata, source_hash
+
+TEMPLATE = 'concept.md'
+
+def write_note(vault, name, **metadata):
+    lines = ['---'] + [f"{key}: {value}" for key, value in metadata.items()] + ['---', '본문', '']
+    (Path(vault) / name).write_text('\n'.join(lines), encoding='utf-8')
+
+def plan(vault, content, prompt_version='1'):
+    return plan_upsert(NoteIndex(vault, use_cache=False), content, TEMPLATE, prompt_version)
+
+def test_plan_actions():
+    with tempfile.TemporaryDirectory() as vault:
+        write_note(vault, '카프카.md', title='카프카', source_hash=source_hash('카프카', TEMPLATE), prompt_version=1)
+        write_note(vault, 'Apache-Spark.md', title='Apache Spark', aliases='[스파크]')
+        write_note(vault, '레디스.md', title='레디스', source_hash=source_hash('레디스 캐시', TEMPLATE), prompt_version=1)
+
+        assert plan(vault, '카프카').action == 'skip'
+        regenerate = plan(vault, '카프카', prompt_version='2')
+        assert regenerate.action == 'regenerate' and regenerate.record.title == '카프카'
+        # 직접 작성한 노트는 별칭으로도 찾음
+        merge = plan(vault, '스파크')
+        assert merge.action == 'merge' and merge.record.path.name == 'Apache-Spark.md'
+        # 같은 제목이지만 다른 입력으로 생성된 노트는 덮어쓰지 않음
+        assert plan(vault, '레디스').action == 'conflict'
+        create = plan(vault, '몽고디비')
+        assert create.action == 'create' and create.record is None and create.title == '몽고디비'
+        assert create.source_hash == source_hash('몽고디비', TEMPLATE)
+
+def test_merge_metadata():
+    existing = {'title': '카프카', 'created': '2024-01-01', 'tags': ['직접작성'], 'aliases': '카프카', 'status': 'draft'}
+    merged = merge_metadata(existing, {
+        'created': '2026-10-19', 'tags': ['메시징', '직접작성'], 'aliases': ['Kafka'],
+        'concepts': ['브로커'], 'status': 'done',
+    })
+    # 목록은 기존 순서를 유지한 합집합, created는 유지, 나머지는 새 값
+    assert merged['tags'] == ['직접작성', '메시징']
+    assert merged['aliases'] == ['카프카', 'Kafka']
+    assert merged['concepts'] == ['브로커']
+    assert merged['created'] == '2024-01-01'
+    assert merged['status'] == 'done'
+    assert existing['tags'] == ['직접작성']
+
+if __name__ == "__main__":
+    test_plan_actions()
+    test_merge_metadata()
+    print("upsert 테스트 통과")